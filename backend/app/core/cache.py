@@ -0,0 +1,152 @@
+"""
+Cache building blocks
+TTLCache is a bounded in-process LRU with per-entry expiry. SharedCache
+backends hold JSON-serializable values across workers: RedisCache for
+deployments, LocalSharedCache as a drop-in stand-in for local runs/tests.
+MemoryCache puts a TTLCache behind the SharedCache interface, for callers
+that take any backend but default to process-local storage.
+"""
+import json
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Optional
+
+
+class TTLCache:
+    """Bounded LRU cache with a default TTL (not thread-safe; asyncio only)"""
+
+    def __init__(self, max_entries: int = 10000, ttl: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data: "OrderedDict[str, tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def delete(self, key: str):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+class SharedCache(ABC):
+    """Cache shared between workers. Values must be JSON-serializable."""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Any]:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, ttl: float):
+        ...
+
+    @abstractmethod
+    async def delete(self, *keys: str):
+        ...
+
+
+class LocalSharedCache(SharedCache):
+    """In-process stand-in for a shared cache (same semantics, JSON round trip)"""
+
+    def __init__(self):
+        self._data: dict[str, tuple[float, str]] = {}
+
+    async def get(self, key: str) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, raw = entry
+        if expires_at < time.monotonic():
+            self._data.pop(key, None)
+            return None
+        return json.loads(raw)
+
+    async def set(self, key: str, value: Any, ttl: float):
+        self._data[key] = (time.monotonic() + ttl, json.dumps(value))
+
+    async def delete(self, *keys: str):
+        for key in keys:
+            self._data.pop(key, None)
+
+
+class MemoryCache(SharedCache):
+    """SharedCache interface over a process-local TTLCache (no JSON round trip; don't mutate stored values)"""
+
+    def __init__(self, max_entries: int = 10000):
+        self._cache = TTLCache(max_entries=max_entries)
+
+    async def get(self, key: str) -> Optional[Any]:
+        return self._cache.get(key)
+
+    async def set(self, key: str, value: Any, ttl: float):
+        self._cache.set(key, value, ttl)
+
+    async def delete(self, *keys: str):
+        for key in keys:
+            self._cache.delete(key)
+
+
+class RedisCache(SharedCache):
+    """Redis-backed shared cache (requires the optional `redis` package)"""
+
+    def __init__(self, url: str):
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("SHARED_CACHE_URL=redis://... requires `pip install redis`") from e
+        self._client = redis.from_url(url)
+
+    async def get(self, key: str) -> Optional[Any]:
+        raw = await self._client.get(key)
+        return json.loads(raw) if raw is not None else None
+
+    async def set(self, key: str, value: Any, ttl: float):
+        await self._client.set(key, json.dumps(value), px=int(ttl * 1000))
+
+    async def delete(self, *keys: str):
+        if keys:
+            await self._client.delete(*keys)
+
+
+def shared_cache_from_url(url: Optional[str]) -> Optional[SharedCache]:
+    """Build the shared cache named by SHARED_CACHE_URL (None disables it)"""
+    if not url:
+        return None
+    if url.startswith("local://"):
+        return LocalSharedCache()
+    if url.startswith("redis://") or url.startswith("rediss://"):
+        return RedisCache(url)
+    raise ValueError(f"Unsupported SHARED_CACHE_URL: {url}")
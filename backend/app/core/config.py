@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional, Union
+from typing import Optional, Union, Literal
 
 class Settings(BaseSettings):
     PROJECT_NAME: str = "ClawHub API"
@@ -11,12 +11,105 @@ class Settings(BaseSettings):
     POSTGRES_PASSWORD: str = "postgres"
     POSTGRES_DB: str = "clawhub"
     DATABASE_URL: Optional[str] = None
+    ASYNC_DATABASE_URL: Optional[str] = None  # Derived from DATABASE_URL if unset
+    
+    # Connection pool (per engine, per process)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800  # seconds, -1 disables
+    # always: ping on every checkout; idle: only connections idle longer than
+    # DB_PRE_PING_IDLE_SECONDS; never: rely on recycle + error handling
+    DB_PRE_PING: Literal["always", "idle", "never"] = "idle"
+    DB_PRE_PING_IDLE_SECONDS: float = 30.0
+    
+    # Per-request DB metrics (GET /metrics), optionally as Server-Timing headers
+    DB_METRICS_ENABLED: bool = True
+    DB_METRICS_HEADERS: bool = False
+    
+    # Request tracing: spans for dependencies, the handler, serialization and
+    # each SQL statement, appended as OTLP/JSON lines to TRACING_EXPORT_PATH
+    TRACING_ENABLED: bool = False
+    TRACING_SAMPLE_RATE: float = 1.0  # share of requests traced
+    TRACING_EXPORT_PATH: str = "traces.jsonl"
+    TRACING_SERVICE_NAME: str = "clawhub-api"
+    TRACING_MAX_STATEMENT_LENGTH: int = 2000  # db.statement is cut to this many characters
+    # Slow-request profiler: stacks sampled every PROFILE_INTERVAL_MS, written
+    # in folded format (flamegraphs) to PROFILE_DIR for requests slower than
+    # PROFILE_SLOW_REQUEST_MS. 0 disables
+    PROFILE_SLOW_REQUEST_MS: float = 0.0
+    PROFILE_INTERVAL_MS: float = 5.0
+    PROFILE_DIR: str = "profiles"
+    # Fast JSON: orjson rendering, and the hot listings skip response model
+    # validation (pre-built serializers). Requires orjson (requirements-optional.txt)
+    FAST_JSON: bool = False
     
     SECRET_KEY: str = "TEMP_KEY"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7
     
     ADMIN_KEY: str = "change_me_in_production"  # Override in .env
     
+    # Caching. SHARED_CACHE_URL: redis://... or local:// (in-process stand-in)
+    SHARED_CACHE_URL: Optional[str] = None
+    AUTH_CACHE_ENABLED: bool = True
+    AUTH_CACHE_MAX_ENTRIES: int = 10000
+    AUTH_CACHE_TTL: float = 300.0
+    
+    # GET /stats/: served from the counters table ("counters") or one COUNT
+    # query over the source tables ("live"), cached for STATS_CACHE_TTL seconds
+    STATS_SOURCE: Literal["counters", "live"] = "counters"
+    STATS_CACHE_TTL: float = 5.0
+    
+    # Response cache for hot GET routes (ETag / 304; writes invalidate by tag).
+    # "memory": per-process LRU, so other workers catch up at TTL expiry;
+    # "shared": the SHARED_CACHE_URL cache, invalidated for every worker
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_BACKEND: Literal["memory", "shared"] = "memory"
+    RESPONSE_CACHE_MAX_ENTRIES: int = 10000
+    RESPONSE_CACHE_TTL_EVENTS: float = 30.0  # GET /events/
+    RESPONSE_CACHE_TTL_EVENT: float = 30.0  # GET /events/{id}
+    RESPONSE_CACHE_TTL_AGENT: float = 60.0  # GET /agents/{username}
+    RESPONSE_CACHE_TTL_AGENT_STATS: float = 60.0  # GET /agents/{username}/stats
+    
+    # Live odds feed (SSE / WebSocket): at most one update per event every
+    # ODDS_COALESCE_SECONDS. ODDS_BROKER_URL=redis://... shares published
+    # updates between workers; unset keeps them within the process
+    ODDS_COALESCE_SECONDS: float = 0.25
+    ODDS_BROKER_URL: Optional[str] = None
+    
+    # Materialized leaderboard: poll for other workers' changes / full rebuild
+    LEADERBOARD_SYNC_SECONDS: float = 5.0
+    LEADERBOARD_SYNC_OVERLAP_SECONDS: float = 60.0
+    LEADERBOARD_REBUILD_SECONDS: float = 600.0
+    
+    # AI judge backend: "fake" (deterministic, local) or "openai" (any
+    # OpenAI-compatible chat completions API)
+    JUDGE_BACKEND: Literal["fake", "openai"] = "fake"
+    JUDGE_API_URL: str = "https://api.openai.com/v1"
+    JUDGE_API_KEY: Optional[str] = None
+    JUDGE_MODEL: str = "gpt-4o-mini"
+    JUDGE_TIMEOUT: float = 60.0
+    JUDGE_FAKE_DELAY: float = 0.0  # seconds per streamed line, simulates model latency
+    # Submissions per model call, concurrent model calls, and how many of each
+    # batch's best advance to the next tournament round
+    JUDGE_BATCH_SIZE: int = 10
+    JUDGE_CONCURRENCY: int = 4
+    JUDGE_FINALISTS_PER_BATCH: int = 1
+    
+    # Background jobs (resolution / judging)
+    JOB_WORKER_ENABLED: bool = True
+    JOB_CHUNK_SIZE: int = 1000
+    JOB_POLL_INTERVAL: float = 2.0
+    JOB_LEASE_SECONDS: int = 120
+    JOB_MAX_ATTEMPTS: int = 5
+    
+    # Event lifecycle scheduler: closes open events at closes_at. One leader
+    # across workers (Postgres advisory lock); the others retry for leadership
+    SCHEDULER_ENABLED: bool = True
+    SCHEDULER_BATCH_SIZE: int = 500
+    SCHEDULER_MAX_SLEEP_SECONDS: float = 300.0  # re-check even without a wake-up
+    SCHEDULER_LEADER_RETRY_SECONDS: float = 15.0
+    
     BACKEND_CORS_ORIGINS: Union[str, list] = "http://localhost:3000,https://clawhub.com,https://www.clawhub.com"
     
     @property
@@ -35,5 +128,21 @@ class Settings(BaseSettings):
         if self.DATABASE_URL:
             return self.DATABASE_URL
         return f"postgresql://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_SERVER}/{self.POSTGRES_DB}"
+    
+    @property
+    def async_database_url(self) -> str:
+        """database_url rewritten for the async drivers (asyncpg / aiosqlite)"""
+        if self.ASYNC_DATABASE_URL:
+            return self.ASYNC_DATABASE_URL
+        url = self.database_url
+        if url.startswith("postgres://"):
+            url = "postgresql://" + url[len("postgres://"):]
+        if url.startswith("postgresql://") or url.startswith("postgresql+psycopg2://"):
+            url = "postgresql+asyncpg://" + url.split("://", 1)[1]
+            # asyncpg takes `ssl`, not libpq's `sslmode`
+            url = url.replace("sslmode=", "ssl=")
+        elif url.startswith("sqlite://"):
+            url = "sqlite+aiosqlite://" + url[len("sqlite://"):]
+        return url
 
 settings = Settings()
\ No newline at end of file
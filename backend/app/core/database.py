@@ -1,19 +1,107 @@
-from sqlalchemy import create_engine
+import time
+from sqlalchemy import create_engine, event, exc, DateTime
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from .config import settings
+from .metrics import TimedAsyncQueuePool, instrument_engine
+from . import tracing
 
+def pool_options(url: str) -> dict:
+    """Engine pool arguments from settings (SQLite keeps SQLAlchemy's defaults)"""
+    if url.startswith("sqlite"):
+        return {}
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_PRE_PING == "always",
+    }
+
+def ping_idle_connections(engine, idle_seconds: float):
+    """Pre-ping only connections that sat in the pool longer than idle_seconds"""
+
+    @event.listens_for(engine, "checkin")
+    def _checkin(dbapi_connection, connection_record):
+        connection_record.info["checked_in_at"] = time.monotonic()
+
+    @event.listens_for(engine, "checkout")
+    def _checkout(dbapi_connection, connection_record, connection_proxy):
+        checked_in_at = connection_record.info.get("checked_in_at")
+        if checked_in_at is None or time.monotonic() - checked_in_at < idle_seconds:
+            return
+        try:
+            alive = engine.dialect.do_ping(dbapi_connection)
+        except Exception:
+            alive = False
+        if not alive:
+            # The pool discards this connection and retries with a fresh one
+            raise exc.DisconnectionError("Stale connection")
+
+# Sync engine: scripts, benchmarks and other tooling outside the request path
 engine = create_engine(
     settings.database_url,
-    pool_pre_ping=True,
-    echo=False
+    echo=False,
+    **pool_options(settings.database_url)
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine (asyncpg): used by every route and the job worker
+_async_pool_options = pool_options(settings.async_database_url)
+if _async_pool_options:
+    _async_pool_options["poolclass"] = TimedAsyncQueuePool
+
+async_engine = create_async_engine(
+    settings.async_database_url,
+    echo=False,
+    **_async_pool_options
+)
+
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+for _engine in (engine, async_engine.sync_engine):
+    if settings.DB_PRE_PING == "idle":
+        ping_idle_connections(_engine, settings.DB_PRE_PING_IDLE_SECONDS)
+    if settings.DB_METRICS_ENABLED:
+        instrument_engine(_engine)
+    if settings.TRACING_ENABLED:
+        tracing.instrument_engine(_engine)
+
 Base = declarative_base()
 
-def get_db():
+# Timestamp column type. On SQLite, datetimes are compared as text, so bound
+# values are stored in the same format as CURRENT_TIMESTAMP server defaults
+# (no fractional seconds) to keep keyset comparisons correct in local runs.
+Timestamp = DateTime(timezone=True).with_variant(
+    sqlite.DATETIME(storage_format="%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d"),
+    "sqlite"
+)
+
+def dialect_insert(model, dialect_name: str):
+    """INSERT with ON CONFLICT support (.on_conflict_do_nothing / .on_conflict_do_update) for Postgres / SQLite"""
+    if dialect_name == "postgresql":
+        return postgresql.insert(model)
+    if dialect_name == "sqlite":
+        return sqlite.insert(model)
+    raise NotImplementedError(f"ON CONFLICT is not supported on {dialect_name}")
+
+def insert_ignoring_conflicts(model, dialect_name: str):
+    """INSERT ... ON CONFLICT DO NOTHING (combine with .returning() to see what went in)"""
+    return dialect_insert(model, dialect_name).on_conflict_do_nothing()
+
+async def get_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def get_sync_db():
     db = SessionLocal()
     try:
         yield db
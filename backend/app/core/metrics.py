@@ -0,0 +1,113 @@
+"""
+Per-request database instrumentation
+Counts queries, DB time and pool checkout wait for the current request
+(tracked through a ContextVar) and keeps process-wide totals for /metrics.
+"""
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+@dataclass
+class RequestMetrics:
+    queries: int = 0
+    db_time: float = 0.0
+    checkout_wait: float = 0.0
+    checkouts: int = 0
+
+@dataclass
+class RouteTotals:
+    requests: int = 0
+    queries: int = 0
+    db_time: float = 0.0
+    checkout_wait: float = 0.0
+    max_checkout_wait: float = 0.0
+    duration: float = 0.0
+
+_current: ContextVar[Optional[RequestMetrics]] = ContextVar("db_request_metrics", default=None)
+_totals: dict[str, RouteTotals] = {}
+
+def start_request() -> RequestMetrics:
+    metrics = RequestMetrics()
+    _current.set(metrics)
+    return metrics
+
+def current() -> Optional[RequestMetrics]:
+    return _current.get()
+
+def finish_request(route: str, metrics: RequestMetrics, duration: float):
+    """Fold one request's numbers into the per-route totals"""
+    totals = _totals.setdefault(route, RouteTotals())
+    totals.requests += 1
+    totals.queries += metrics.queries
+    totals.db_time += metrics.db_time
+    totals.checkout_wait += metrics.checkout_wait
+    totals.max_checkout_wait = max(totals.max_checkout_wait, metrics.checkout_wait)
+    totals.duration += duration
+
+def reset():
+    _totals.clear()
+
+def snapshot() -> dict:
+    """Per-route averages plus totals, in milliseconds"""
+    routes = {}
+    for route, t in sorted(_totals.items()):
+        n = t.requests or 1
+        routes[route] = {
+            "requests": t.requests,
+            "avg_queries": round(t.queries / n, 2),
+            "avg_db_ms": round(t.db_time / n * 1000, 3),
+            "avg_checkout_wait_ms": round(t.checkout_wait / n * 1000, 3),
+            "max_checkout_wait_ms": round(t.max_checkout_wait * 1000, 3),
+            "avg_duration_ms": round(t.duration / n * 1000, 3),
+        }
+    return {
+        "requests": sum(t.requests for t in _totals.values()),
+        "queries": sum(t.queries for t in _totals.values()),
+        "routes": routes,
+    }
+
+def server_timing(metrics: RequestMetrics) -> str:
+    """Server-Timing header value for one request"""
+    return (
+        f"db;dur={metrics.db_time * 1000:.2f};desc=\"{metrics.queries} queries\", "
+        f"pool;dur={metrics.checkout_wait * 1000:.2f}"
+    )
+
+
+class TimedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that charges checkout wait time to the current request"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            metrics = _current.get()
+            if metrics is not None:
+                metrics.checkout_wait += time.perf_counter() - started
+                metrics.checkouts += 1
+
+
+def instrument_engine(engine):
+    """Count statements and DB time for the current request on a (sync) Engine"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        metrics = _current.get()
+        if metrics is not None:
+            metrics.queries += 1
+            metrics.db_time += time.perf_counter() - started
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context):
+        stack = exception_context.connection.info.get("query_started") if exception_context.connection else None
+        if stack:
+            stack.pop()
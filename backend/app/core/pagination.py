@@ -0,0 +1,69 @@
+"""
+Opaque keyset cursors
+A cursor is the sort key of the last row on a page, JSON-encoded and
+base64url'd, so clients pass it back without depending on its layout.
+Keyset applies one to a SQL query: the next page starts strictly after the
+last row's key, so deep pages cost the same as the first one (no OFFSET).
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence
+from sqlalchemy import tuple_
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def encode_cursor(*values: Any) -> str:
+    raw = json.dumps([_encode_value(v) for v in values], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, types: Sequence[type]) -> List[Any]:
+    """Decode a cursor into values of `types` (int, float, str or datetime)"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError("wrong arity")
+        return [
+            datetime.fromisoformat(value) if type_ is datetime else type_(value)
+            for type_, value in zip(types, values)
+        ]
+    except (ValueError, TypeError):
+        raise InvalidCursor("Invalid cursor")
+
+
+class Keyset:
+    """
+    Sort order for keyset pagination: NOT NULL columns, all ascending or all
+    descending, ending in a unique column (id) so ties never straddle pages
+    """
+
+    def __init__(self, *columns, descending: bool = False):
+        self.columns = columns
+        self.descending = descending
+        self.types = [column.type.python_type for column in columns]
+
+    def paginate(self, query, cursor: Optional[str], limit: int):
+        """Order `query` by the key and take `limit` rows after `cursor` (raises InvalidCursor)"""
+        if cursor:
+            key = tuple_(*self.columns)
+            after = tuple(decode_cursor(cursor, self.types))
+            query = query.where(key < after if self.descending else key > after)
+        order = [column.desc() if self.descending else column for column in self.columns]
+        return query.order_by(*order).limit(limit)
+
+    def next_cursor(self, rows: Sequence[Any], limit: int) -> Optional[str]:
+        """Cursor for the page after `rows` (ORM objects or rows naming the key columns), None on the last page"""
+        if not rows or len(rows) < limit:
+            return None
+        return encode_cursor(*(getattr(rows[-1], column.key) for column in self.columns))
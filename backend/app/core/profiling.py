@@ -0,0 +1,126 @@
+"""
+Sampling profiler for slow requests (opt-in, PROFILE_SLOW_REQUEST_MS)
+While a request is in flight, a background thread samples its stack every
+PROFILE_INTERVAL_MS. When its task is running, the sample is the event loop
+thread's Python stack. When it is suspended (waiting on the database, a
+lock, the judge API), the sample is its chain of awaiting coroutines, with a
+"[await]" leaf, so waiting time shows up as well as CPU time. Requests
+slower than the threshold have their samples written to PROFILE_DIR in
+folded-stack format ("frame;frame;frame count" per line). flamegraph.pl,
+inferno and speedscope read that directly.
+
+The sampler thread only runs while requests are being profiled.
+"""
+import asyncio
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+from app.core.config import settings
+
+
+# Import roots, longest first, so frames read "app/routes/events.py" rather than full paths
+_ROOTS = sorted({os.path.join(os.path.abspath(path), "") for path in sys.path}, key=len, reverse=True)
+
+
+def _label(code) -> str:
+    filename = code.co_filename
+    for root in _ROOTS:
+        if filename.startswith(root):
+            filename = filename[len(root):]
+            break
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+def _await_chain(task: asyncio.Task) -> List[str]:
+    """Frames of a suspended task, outermost first, following each coroutine's await"""
+    frames = []
+    coro = task.get_coro()
+    while coro is not None:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None) or getattr(coro, "ag_frame", None)
+        if frame is None:
+            break
+        frames.append(_label(frame.f_code))
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None) or getattr(coro, "ag_await", None)
+    frames.append("[await]")
+    return frames
+
+
+def _thread_stack(frame, root) -> List[str]:
+    """Frames from the task's root coroutine down to `frame`"""
+    frames = []
+    while frame is not None:
+        frames.append(_label(frame.f_code))
+        if frame is root:
+            break
+        frame = frame.f_back
+    frames.reverse()
+    return frames
+
+
+class SlowRequestProfiler:
+    def __init__(self):
+        self.dumped = 0
+        self._active: Dict[asyncio.Task, Tuple[asyncio.AbstractEventLoop, int, Counter]] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def begin(self, task: asyncio.Task) -> Counter:
+        """Start sampling `task`; returns its sample counts (folded stack -> samples)"""
+        samples = Counter()
+        with self._lock:
+            self._active[task] = (asyncio.get_running_loop(), threading.get_ident(), samples)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="slow-request-profiler", daemon=True)
+                self._thread.start()
+        self._wake.set()
+        return samples
+
+    def end(self, task: asyncio.Task):
+        with self._lock:
+            self._active.pop(task, None)
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            with self._lock:
+                active = list(self._active.items())
+                if not active:
+                    self._wake.clear()
+                    continue
+            frames = sys._current_frames()
+            for task, (loop, thread_id, samples) in active:
+                try:
+                    coro = task.get_coro()
+                    if asyncio.current_task(loop) is task and thread_id in frames:
+                        stack = _thread_stack(frames[thread_id], getattr(coro, "cr_frame", None))
+                    else:
+                        stack = _await_chain(task)
+                except (AttributeError, RuntimeError):  # the task moved on mid-walk
+                    continue
+                samples[";".join(stack)] += 1
+            del frames
+            time.sleep(settings.PROFILE_INTERVAL_MS / 1000)
+
+    async def dump(self, samples: Counter, route: str, duration: float) -> str:
+        """Write a slow request's samples to PROFILE_DIR; returns the file path"""
+        name = re.sub(r"[^A-Za-z0-9]+", "_", route).strip("_")
+        filename = f"{time.time_ns() // 1000}-{os.getpid()}-{name}-{duration * 1000:.0f}ms.folded"
+        path = os.path.join(settings.PROFILE_DIR, filename)
+        lines = "".join(f"{stack} {count}\n" for stack, count in samples.most_common())
+
+        def write():
+            os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(lines)
+
+        await asyncio.to_thread(write)
+        self.dumped += 1
+        return path
+
+
+profiler = SlowRequestProfiler()
@@ -0,0 +1,130 @@
+"""
+Fast JSON responses (opt-in, FAST_JSON)
+On the default path a listing builds pydantic response models, FastAPI
+validates them again against response_model and dumps them, and json.dumps
+renders the text. With FAST_JSON the hot read endpoints skip all of that.
+Rows go through a serializer pre-built from the response model's fields
+into plain dicts, orjson renders those, and the endpoint returns the
+finished response, so FastAPI does no validation of its own.
+FastJSONResponse is also the app's default response class, so every other
+endpoint renders with orjson too.
+
+The JSON is the same either way; benchmarks/bench_serialization checks it
+per endpoint. Requires orjson (requirements-optional.txt).
+"""
+from functools import lru_cache
+from operator import attrgetter, itemgetter
+from types import SimpleNamespace
+from typing import Any, Callable, Iterable, List, Optional, Type
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from app.core.config import settings
+
+_orjson = None
+
+
+def load_orjson():
+    """The orjson module; fails fast (at startup) when FAST_JSON is set without it"""
+    global _orjson
+    if _orjson is None:
+        try:
+            import orjson
+        except ImportError as e:
+            raise RuntimeError("FAST_JSON=true requires `pip install orjson`") from e
+        _orjson = orjson
+    return _orjson
+
+
+def dumps(content: Any) -> bytes:
+    """
+    orjson bytes. Datetimes come out as pydantic writes them (UTC as "Z");
+    anything orjson does not know natively (Decimal, models) goes through
+    jsonable_encoder, as on the default path.
+    """
+    orjson = _orjson or load_orjson()
+    return orjson.dumps(content, default=jsonable_encoder, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def _float(value):
+    return None if value is None else float(value)
+
+
+def _getter(name: str, field, mapping: bool) -> Callable[[Any], Any]:
+    """Reads one field off an object or mapping, as model_validate would"""
+    if field.is_required():
+        read = itemgetter(name) if mapping else attrgetter(name)
+    else:
+        default = field.default
+        if mapping:
+            def read(o):
+                return o.get(name, default)
+        else:
+            def read(o):
+                return getattr(o, name, default)
+    if field.annotation in (float, Optional[float]):
+        raw = read
+
+        def read(o):
+            return _float(raw(o))
+    return read
+
+
+@lru_cache(maxsize=None)
+def serializer(model: Type[BaseModel], mapping: bool = False) -> Callable[[Any], dict]:
+    """
+    A function turning an object (attributes, like from_attributes) or a
+    mapping into the dict `model` would dump, without validating: fields in
+    model order, defaults for missing ones, Decimal to float for float
+    fields, then the computed fields. Built once per model.
+    """
+    fields = tuple((name, _getter(name, field, mapping)) for name, field in model.model_fields.items())
+    computed = tuple((name, decorator.info.wrapped_property.fget)
+                     for name, decorator in model.__pydantic_decorators__.computed_fields.items())
+
+    def serialize(o):
+        return {name: read(o) for name, read in fields}
+
+    if not computed:
+        return serialize
+
+    def serialize_computed(o):
+        d = serialize(o)
+        view = SimpleNamespace(**d)
+        for name, fget in computed:
+            d[name] = fget(view)
+        return d
+
+    return serialize_computed
+
+
+def present(model: Type[BaseModel], obj: Any, mapping: bool = False):
+    """`obj` as a response body: a plain dict under FAST_JSON, otherwise the validated model"""
+    if settings.FAST_JSON:
+        return serializer(model, mapping)(obj)
+    return model.model_validate(obj)
+
+
+def present_many(model: Type[BaseModel], objects: Iterable[Any], mapping: bool = False) -> List:
+    if settings.FAST_JSON:
+        serialize = serializer(model, mapping)
+        return [serialize(obj) for obj in objects]
+    return [model.model_validate(obj) for obj in objects]
+
+
+def render(content: Any, response: Optional[Response] = None):
+    """
+    An endpoint's return value. Under FAST_JSON, a finished FastJSONResponse
+    carrying the headers set on `response` (FastAPI drops those once an
+    endpoint returns its own response); otherwise `content`, for FastAPI to
+    validate and render as usual.
+    """
+    if not settings.FAST_JSON:
+        return content
+    return FastJSONResponse(content, headers=dict(response.headers) if response is not None else None)
@@ -0,0 +1,328 @@
+"""
+Request tracing (opt-in, TRACING_ENABLED)
+Each sampled request gets a span tree: the request itself, dependency
+resolution, the endpoint handler, response serialization (from the handler
+returning to the response start) and every SQL statement, nested under
+whichever of those ran it. Finished traces are appended to
+TRACING_EXPORT_PATH as OTLP/JSON lines (one ExportTraceServiceRequest per
+trace), which the OpenTelemetry Collector's otlpjsonfile receiver and most
+trace viewers read. An incoming W3C traceparent header is continued, and
+the trace id is returned in X-Trace-Id.
+
+Dependency and handler spans come from wrapping FastAPI's solve_dependencies
+and run_endpoint_function (instrument_fastapi). SQL spans come from engine
+events (instrument_engine), like the DB metrics.
+
+The middleware also drives the slow-request profiler (app.core.profiling)
+when PROFILE_SLOW_REQUEST_MS is set; the two work independently.
+"""
+import asyncio
+import json
+import queue
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+from sqlalchemy import event
+from app.core.config import settings
+from app.core.profiling import profiler
+
+# OTLP span kinds and status codes
+KIND_INTERNAL, KIND_SERVER, KIND_CLIENT = 1, 2, 3
+STATUS_UNSET, STATUS_ERROR = 0, 2
+
+TRACEPARENT = re.compile(r"^[0-9a-f]{2}-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    kind: int
+    start: int  # ns since the epoch
+    end: Optional[int] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    def finish(self, error: Optional[str] = None):
+        if self.end is None:
+            self.end = time.time_ns()
+            self.error = error
+
+
+@dataclass
+class Trace:
+    trace_id: str
+    spans: List[Span] = field(default_factory=list)
+    serializing: Optional[Span] = None  # open from the handler's return to the response start
+
+
+_trace: ContextVar[Optional[Trace]] = ContextVar("trace", default=None)
+_span: ContextVar[Optional[Span]] = ContextVar("trace_span", default=None)
+
+
+def _new_id(bits: int) -> str:
+    return f"{random.getrandbits(bits):0{bits // 4}x}"
+
+
+def start_span(name: str, kind: int = KIND_INTERNAL, parent: Optional[Span] = None, **attributes) -> Optional[Span]:
+    """Open a span under `parent` (default: the current span) in the current trace; None when not tracing"""
+    trace = _trace.get()
+    if trace is None:
+        return None
+    parent = parent or _span.get()
+    span = Span(name, trace.trace_id, _new_id(64), parent.span_id if parent else None, kind, time.time_ns(),
+                attributes=attributes)
+    trace.spans.append(span)
+    return span
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Trace a block as a child of the current span (a no-op outside traced requests)"""
+    current = start_span(name, **attributes)
+    if current is None:
+        yield None
+        return
+    token = _span.set(current)
+    try:
+        yield current
+    except BaseException as exc:
+        current.finish(repr(exc))
+        raise
+    finally:
+        current.finish()
+        _span.reset(token)
+
+
+# ---------- export ----------
+
+def _attribute(key: str, value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+def otlp_json(trace: Trace) -> dict:
+    """The trace as an OTLP/JSON ExportTraceServiceRequest"""
+    spans = []
+    for s in trace.spans:
+        otlp = {
+            "traceId": s.trace_id,
+            "spanId": s.span_id,
+            "name": s.name,
+            "kind": s.kind,
+            "startTimeUnixNano": str(s.start),
+            "endTimeUnixNano": str(s.end or s.start),
+            "attributes": [_attribute(key, value) for key, value in s.attributes.items()],
+            "status": {"code": STATUS_ERROR, "message": s.error} if s.error else {"code": STATUS_UNSET},
+        }
+        if s.parent_id:
+            otlp["parentSpanId"] = s.parent_id
+        spans.append(otlp)
+    return {"resourceSpans": [{
+        "resource": {"attributes": [_attribute("service.name", settings.TRACING_SERVICE_NAME),
+                                    _attribute("service.version", settings.VERSION)]},
+        "scopeSpans": [{"scope": {"name": __name__}, "spans": spans}],
+    }]}
+
+
+class FileSpanExporter:
+    """
+    Appends one OTLP/JSON line per trace to a local file. Requests only queue
+    the finished trace; a writer thread encodes and writes whatever has
+    queued up, one flush per batch, so no disk I/O runs on the event loop.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.exported = 0
+        self._queue: "queue.SimpleQueue[Optional[Trace]]" = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def export(self, trace: Trace):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._write, name="trace-exporter", daemon=True)
+                    self._thread.start()
+        self._queue.put(trace)
+
+    def _write(self):
+        with open(self.path, "a", encoding="utf-8") as f:
+            while True:
+                batch = [self._queue.get()]
+                while True:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                traces = [trace for trace in batch if trace is not None]
+                f.writelines(json.dumps(otlp_json(trace), separators=(",", ":")) + "\n" for trace in traces)
+                f.flush()
+                self.exported += len(traces)
+                if len(traces) < len(batch):  # close() was called
+                    return
+
+    def close(self):
+        """Write out everything queued so far and stop the writer thread"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+
+
+exporter = FileSpanExporter(settings.TRACING_EXPORT_PATH)
+
+
+def stats() -> dict:
+    return {
+        "enabled": settings.TRACING_ENABLED,
+        "sample_rate": settings.TRACING_SAMPLE_RATE,
+        "exported_traces": exporter.exported,
+        "slow_request_profiles": profiler.dumped,
+    }
+
+
+# ---------- instrumentation ----------
+
+class TracingMiddleware:
+    """Pure ASGI middleware, so the request runs in this task and the profiler can follow it"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        sampled = settings.TRACING_ENABLED and random.random() < settings.TRACING_SAMPLE_RATE
+        profiling = settings.PROFILE_SLOW_REQUEST_MS > 0
+        if not sampled and not profiling:
+            return await self.app(scope, receive, send)
+
+        root = trace = trace_token = span_token = None
+        if sampled:
+            parent_id = None
+            match = TRACEPARENT.match(_header(scope, b"traceparent") or "")
+            trace = Trace(match.group(1) if match else _new_id(128))
+            if match:
+                parent_id = match.group(2)
+            trace_token = _trace.set(trace)
+            root = Span(scope["method"], trace.trace_id, _new_id(64), parent_id, KIND_SERVER, time.time_ns(),
+                        attributes={"http.request.method": scope["method"], "url.path": scope["path"]})
+            trace.spans.append(root)
+            span_token = _span.set(root)
+        samples = profiler.begin(asyncio.current_task()) if profiling else None
+
+        status = 500
+
+        async def send_traced(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if trace is not None:
+                    if trace.serializing is not None:
+                        trace.serializing.finish()
+                    message = {**message, "headers": [*message.get("headers", []), (b"x-trace-id", trace.trace_id.encode())]}
+            await send(message)
+
+        started = time.perf_counter()
+        error = None
+        try:
+            await self.app(scope, receive, send_traced)
+        except BaseException as exc:
+            error = repr(exc)
+            raise
+        finally:
+            duration = time.perf_counter() - started
+            route = scope.get("route")
+            route_name = f"{scope['method']} {route.path}" if route else f"{scope['method']} unmatched"
+            if samples is not None:
+                profiler.end(asyncio.current_task())
+                if duration * 1000 >= settings.PROFILE_SLOW_REQUEST_MS:
+                    path = await profiler.dump(samples, route_name, duration)
+                    if root is not None:
+                        root.attributes["profile.file"] = path
+            if root is not None:
+                if route:
+                    root.name = route_name
+                    root.attributes["http.route"] = route.path
+                root.attributes["http.response.status_code"] = status
+                root.finish(error or (f"HTTP {status}" if status >= 500 else None))
+                _span.reset(span_token)
+                _trace.reset(trace_token)
+                exporter.export(trace)
+
+
+def _header(scope, name: bytes) -> Optional[str]:
+    for key, value in scope.get("headers", ()):
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+def _traced(original, name: str, handler: bool = False):
+    async def wrapper(*args, **kwargs):
+        trace = _trace.get()
+        if trace is None:
+            return await original(*args, **kwargs)
+        call = getattr(kwargs.get("dependant"), "call", None)
+        with span(name, **{"code.function": getattr(call, "__qualname__", str(call))}):
+            result = await original(*args, **kwargs)
+        if handler:
+            # Ends at the response start: response_model validation, encoding and rendering
+            trace.serializing = start_span("serialize response", parent=_span.get())
+        return result
+
+    wrapper.__wrapped__ = original
+    return wrapper
+
+
+def instrument_fastapi():
+    """Span FastAPI's dependency resolution and endpoint calls (idempotent)"""
+    import fastapi.routing
+
+    if hasattr(fastapi.routing.run_endpoint_function, "__wrapped__"):
+        return
+    fastapi.routing.solve_dependencies = _traced(fastapi.routing.solve_dependencies, "resolve dependencies")
+    fastapi.routing.run_endpoint_function = _traced(fastapi.routing.run_endpoint_function, "handler", handler=True)
+
+
+def instrument_engine(engine):
+    """One client span per SQL statement on a (sync) Engine, under the current span"""
+    system = engine.dialect.name
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "SQL"
+        conn.info.setdefault("trace_spans", []).append(start_span(
+            operation, KIND_CLIENT,
+            **{"db.system": system, "db.operation": operation,
+               "db.statement": statement[:settings.TRACING_MAX_STATEMENT_LENGTH], "db.executemany": executemany}
+        ))
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        current = conn.info["trace_spans"].pop()
+        if current is not None:
+            current.finish()
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context):
+        stack = exception_context.connection.info.get("trace_spans") if exception_context.connection else None
+        if stack:
+            current = stack.pop()
+            if current is not None:
+                current.finish(repr(exception_context.original_exception))
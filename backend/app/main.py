@@ -1,14 +1,46 @@
-from fastapi import FastAPI
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from app.core import metrics, tracing
+from app.core.serialization import FastJSONResponse, load_orjson
 from app.core.config import settings
-from app.routes import agents, events, predictions, stats
+from app.core.database import async_engine
+from app.routes import agents, events, predictions, stats, jobs
+from app.services.jobs import worker as job_worker
+from app.services.auth_cache import api_key_cache
+from app.services.response_cache import response_cache
+from app.services.odds_feed import odds_hub
+from app.services.scheduler import event_scheduler
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Background worker for resolution / judging jobs
+    if settings.JOB_WORKER_ENABLED:
+        job_worker.start()
+    # Live odds: receive published updates (from every worker, with a shared broker)
+    await odds_hub.start()
+    # Close events at their deadlines (one leader across workers)
+    if settings.SCHEDULER_ENABLED:
+        event_scheduler.start()
+    yield
+    await event_scheduler.stop()
+    await odds_hub.stop()
+    await job_worker.stop()
+    tracing.exporter.close()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version=settings.VERSION,
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan
 )
 
+# Fast JSON: orjson for every response (the hot listings also skip validation)
+if settings.FAST_JSON:
+    load_orjson()
+    app.router.default_response_class = FastJSONResponse
+
 # CORS
 app.add_middleware(
     CORSMiddleware,
@@ -18,16 +50,61 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request tracing / slow-request profiling. Added before the DB metrics
+# middleware so it runs inside it: that one moves the request to a task of
+# its own, which is the task the profiler has to sample
+if settings.TRACING_ENABLED or settings.PROFILE_SLOW_REQUEST_MS > 0:
+    tracing.instrument_fastapi()
+    app.add_middleware(tracing.TracingMiddleware)
+
+# Per-request DB metrics
+if settings.DB_METRICS_ENABLED:
+    @app.middleware("http")
+    async def db_metrics_middleware(request: Request, call_next):
+        request_metrics = metrics.start_request()
+        started = time.perf_counter()
+        response = await call_next(request)
+        route = request.scope.get("route")
+        route_name = f"{request.method} {route.path}" if route else "unmatched"
+        metrics.finish_request(route_name, request_metrics, time.perf_counter() - started)
+        if settings.DB_METRICS_HEADERS:
+            response.headers["Server-Timing"] = metrics.server_timing(request_metrics)
+            response.headers["X-DB-Queries"] = str(request_metrics.queries)
+        return response
+
 # Include routers
 app.include_router(agents.router, prefix=f"{settings.API_V1_STR}/agents", tags=["agents"])
 app.include_router(events.router, prefix=f"{settings.API_V1_STR}/events", tags=["events"])
 app.include_router(predictions.router, prefix=f"{settings.API_V1_STR}/predictions", tags=["predictions"])
 app.include_router(stats.router, prefix=f"{settings.API_V1_STR}/stats", tags=["stats"])
+app.include_router(jobs.router, prefix=f"{settings.API_V1_STR}/jobs", tags=["jobs"])
 
 @app.get("/health")
 def health_check():
     return {"status": "ok", "version": settings.VERSION}
 
+@app.get("/metrics")
+def get_metrics(admin_key: str = Query(...)):
+    """DB pool state, cache hit rates and per-route query / DB time / checkout wait averages (admin only)"""
+    if admin_key != settings.ADMIN_KEY:
+        raise HTTPException(401, "Invalid admin key")
+    pool = async_engine.pool
+    return {
+        "pool": {
+            "class": type(pool).__name__,
+            "size": pool.size() if hasattr(pool, "size") else None,
+            "checked_out": pool.checkedout() if hasattr(pool, "checkedout") else None,
+            "overflow": pool.overflow() if hasattr(pool, "overflow") else None,
+            "pre_ping": settings.DB_PRE_PING,
+        },
+        "auth_cache": api_key_cache.local.stats(),
+        "response_cache": response_cache.stats(),
+        "odds_feed": odds_hub.stats(),
+        "scheduler": event_scheduler.stats(),
+        "tracing": tracing.stats(),
+        **metrics.snapshot()
+    }
+
 @app.get("/")
 def root():
     return {
@@ -28,8 +28,9 @@ class Agent(Base):
     api_key = Column(String(64), unique=True, nullable=True, index=True)
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), index=True)  # leaderboard sync watermark
     last_active_at = Column(DateTime(timezone=True), server_default=func.now())
     
     predictions = relationship("Prediction", back_populates="agent", cascade="all, delete-orphan")
-    category_stats = relationship("CategoryStats", back_populates="agent", cascade="all, delete-orphan")
\ No newline at end of file
+    category_stats = relationship("CategoryStats", back_populates="agent", cascade="all, delete-orphan")
+    calibration_buckets = relationship("CalibrationBucket", back_populates="agent", cascade="all, delete-orphan", order_by="CalibrationBucket.bucket")
\ No newline at end of file
@@ -1,10 +1,16 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, DECIMAL, ARRAY, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Text, DECIMAL, ARRAY, JSON, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
 
 class Event(Base):
     __tablename__ = "events"
+    __table_args__ = (
+        # GET /events/: filtered by status and/or category, keyset-paginated on (closes_at, id)
+        Index('ix_events_status_closes_at_id', 'status', 'closes_at', 'id'),
+        Index('ix_events_status_category_closes_at_id', 'status', 'category', 'closes_at', 'id'),
+        Index('ix_events_category_closes_at_id', 'category', 'closes_at', 'id'),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(255), nullable=False)
@@ -16,13 +22,13 @@ class Event(Base):
     closes_at = Column(DateTime(timezone=True), nullable=False, index=True)
     resolves_at = Column(DateTime(timezone=True), nullable=False)
     
-    status = Column(String(20), default="open", index=True)
+    status = Column(String(20), default="open")
     result = Column(String(10), nullable=True)
     
-    category = Column(String(50), nullable=False, index=True)
+    category = Column(String(50), nullable=False)
     difficulty = Column(String(20), nullable=True)  # easy, medium, hard
     rep_reward = Column(Integer, default=100)  # REP points for winner
-    tags = Column(ARRAY(String), nullable=True)
+    tags = Column(ARRAY(String).with_variant(JSON, "sqlite"), nullable=True)  # JSON on SQLite for local runs
     image_url = Column(String(255), nullable=True)
     created_by = Column(Integer, ForeignKey("agents.id"), nullable=True)
     
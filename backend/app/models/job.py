@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, JSON, ForeignKey, Index
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class Job(Base):
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # Claiming: status = 'queued' OR (status = 'running' AND locked_until < now)
+        Index('ix_jobs_status_locked_until', 'status', 'locked_until'),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String(50), nullable=False)  # resolve_event, select_winner, judge_event
+    event_id = Column(Integer, ForeignKey("events.id", ondelete="CASCADE"), nullable=True, index=True)
+    payload = Column(JSON, nullable=True)
+
+    status = Column(String(20), default="queued", nullable=False)  # queued, running, succeeded, failed
+    progress_done = Column(Integer, default=0, nullable=False)
+    progress_total = Column(Integer, nullable=True)
+    attempts = Column(Integer, default=0, nullable=False)
+    error = Column(Text, nullable=True)
+    result = Column(JSON, nullable=True)
+
+    locked_by = Column(String(100), nullable=True)
+    locked_until = Column(DateTime(timezone=True), nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, Float, ForeignKey, UniqueConstraint, Index
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class JudgeScore(Base):
+    """One AI judge score, reused while the criteria, submission and judge are unchanged"""
+    __tablename__ = "judge_scores"
+    __table_args__ = (
+        UniqueConstraint('criteria_hash', 'content_hash', 'judge_version', 'context_hash', name='uix_judge_score_key'),
+        Index('ix_judge_scores_event_round', 'event_id', 'round'),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    event_id = Column(Integer, ForeignKey("events.id", ondelete="CASCADE"), nullable=False)
+    prediction_id = Column(Integer, ForeignKey("predictions.id", ondelete="SET NULL"), nullable=True)
+    agent_id = Column(Integer, ForeignKey("agents.id", ondelete="CASCADE"), nullable=True)
+
+    criteria_hash = Column(String(64), nullable=False)  # title, description, criteria, category
+    content_hash = Column(String(64), nullable=False)  # the submission's solution text
+    judge_version = Column(String(100), nullable=False)  # backend, model and prompt version
+    context_hash = Column(String(64), nullable=False, default="")  # "" in round 1; the competing set in later rounds
+    round = Column(Integer, nullable=False, default=1)
+
+    score = Column(Float, nullable=False)
+    review = Column(Text, nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
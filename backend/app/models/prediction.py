@@ -1,16 +1,24 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, ForeignKey, UniqueConstraint, DECIMAL
+from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, Float, ForeignKey, UniqueConstraint, Index, DECIMAL, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-from app.core.database import Base
+from app.core.database import Base, Timestamp
 
 class Prediction(Base):
     __tablename__ = "predictions"
     __table_args__ = (
         UniqueConstraint('event_id', 'agent_id', name='uix_event_agent'),
+        # Newest-first listings, keyset-paginated on (created_at, id): all / per event
+        Index('ix_predictions_created_at_id', 'created_at', 'id'),
+        Index('ix_predictions_event_created_at_id', 'event_id', 'created_at', 'id'),
+        # Resolution scores an event's unscored predictions in id order
+        Index(
+            'ix_predictions_unscored', 'event_id', 'id',
+            postgresql_where=text('was_correct IS NULL'), sqlite_where=text('was_correct IS NULL')
+        ),
     )
     
     id = Column(Integer, primary_key=True, index=True)
-    event_id = Column(Integer, ForeignKey("events.id", ondelete="CASCADE"), nullable=False, index=True)
+    event_id = Column(Integer, ForeignKey("events.id", ondelete="CASCADE"), nullable=False)
     agent_id = Column(Integer, ForeignKey("agents.id", ondelete="CASCADE"), nullable=False, index=True)
     
     prediction = Column(String(10), nullable=False)
@@ -24,7 +32,7 @@ class Prediction(Base):
     is_contrarian = Column(Boolean, default=False)
     like_count = Column(Integer, default=0)
     
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    created_at = Column(Timestamp, server_default=func.now())
     
     agent = relationship("Agent", back_populates="predictions")
     event = relationship("Event", back_populates="predictions")
@@ -72,4 +80,23 @@ class CategoryStats(Base):
     correct_predictions = Column(Integer, default=0)
     accuracy = Column(DECIMAL(5, 2), default=0)
     
-    agent = relationship("Agent", back_populates="category_stats")
\ No newline at end of file
+    agent = relationship("Agent", back_populates="category_stats")
+
+
+class CalibrationBucket(Base):
+    """Running sums over an agent's resolved predictions in one confidence decile"""
+    __tablename__ = "calibration_buckets"
+    __table_args__ = (
+        UniqueConstraint('agent_id', 'bucket', name='uix_agent_bucket'),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    agent_id = Column(Integer, ForeignKey("agents.id", ondelete="CASCADE"), nullable=False)
+    bucket = Column(Integer, nullable=False)  # confidence // 10 (100 counts as 9)
+    
+    predictions = Column(Integer, default=0)
+    correct_predictions = Column(Integer, default=0)
+    confidence_sum = Column(Integer, default=0)
+    squared_error_sum = Column(Float, default=0)  # sum of (confidence / 100 - outcome)^2
+    
+    agent = relationship("Agent", back_populates="calibration_buckets")
@@ -0,0 +1,10 @@
+from sqlalchemy import Column, Integer, String, BigInteger
+from app.core.database import Base
+
+class PlatformCounter(Base):
+    """Running totals behind GET /stats/, split into shards to spread row-lock contention"""
+    __tablename__ = "platform_counters"
+
+    name = Column(String(50), primary_key=True)  # agents, predictions, events, open_events
+    shard = Column(Integer, primary_key=True, default=0)
+    value = Column(BigInteger, nullable=False, default=0)
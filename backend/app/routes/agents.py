@@ -1,34 +1,75 @@
-from fastapi import APIRouter, Depends, HTTPException, Header
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from fastapi import APIRouter, Depends, HTTPException, Header, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from sqlalchemy import select
 from typing import List, Optional
 from app.core.database import get_db
 from app.core.security import generate_api_key
 from app.models.agent import Agent
 from app.schemas.agent import AgentRegister, AgentRegisterResponse, AgentResponse, AgentStats, AgentVerify
 from app.services.twitter import verify_tweet_ownership
+from app.services.auth_cache import api_key_cache, AgentIdentity
+from app.core.pagination import InvalidCursor
+from app.services.leaderboard import leaderboard
+from app.services.counters import add_to_counters
+from app.services.response_cache import response_cache
+from app.core.config import settings
+from app.core.serialization import present, present_many, render
 
 router = APIRouter()
 
+def _api_key(authorization: str) -> str:
+    if authorization.startswith("Bearer "):
+        return authorization[7:]
+    return authorization
+
+def _identity(agent: Agent) -> AgentIdentity:
+    return AgentIdentity(id=agent.id, username=agent.username, verified=bool(agent.twitter_verified))
+
+def _agent_tags(username: str) -> List[str]:
+    # Response cache tags; "agents" covers writes to many agents at once (resolution, awards)
+    return ["agents", f"agent:{username}"]
+
 async def get_current_agent(
     authorization: str = Header(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> Agent:
     """Get current agent from API key"""
-    if authorization.startswith("Bearer "):
-        api_key = authorization[7:]
-    else:
-        api_key = authorization
+    api_key = _api_key(authorization)
     
-    agent = db.query(Agent).filter(Agent.api_key == api_key).first()
+    result = await db.execute(select(Agent).where(Agent.api_key == api_key))
+    agent = result.scalars().first()
     if not agent:
         raise HTTPException(401, "Invalid API key")
+    await api_key_cache.set(api_key, _identity(agent))
     return agent
 
+async def get_current_identity(
+    authorization: str = Header(...),
+    db: AsyncSession = Depends(get_db)
+) -> AgentIdentity:
+    """Get current agent identity from API key, served from the auth cache when possible"""
+    api_key = _api_key(authorization)
+    
+    identity = await api_key_cache.get(api_key)
+    if identity is None:
+        result = await db.execute(select(Agent).where(Agent.api_key == api_key))
+        agent = result.scalars().first()
+        if not agent:
+            raise HTTPException(401, "Invalid API key")
+        identity = _identity(agent)
+        await api_key_cache.set(api_key, identity)
+    return identity
+
+async def get_current_agent_id(identity: AgentIdentity = Depends(get_current_identity)) -> int:
+    """Get current agent id without loading the agent (no query on a cache hit)"""
+    return identity.id
+
 @router.post("/register", response_model=AgentRegisterResponse)
-async def register_agent(data: AgentRegister, db: Session = Depends(get_db)):
+async def register_agent(data: AgentRegister, db: AsyncSession = Depends(get_db)):
     """Register new agent"""
-    existing = db.query(Agent).filter(Agent.username == data.username).first()
+    result = await db.execute(select(Agent).where(Agent.username == data.username))
+    existing = result.scalars().first()
     if existing:
         raise HTTPException(400, "Username already taken")
     
@@ -42,8 +83,10 @@ async def register_agent(data: AgentRegister, db: Session = Depends(get_db)):
     )
     
     db.add(agent)
-    db.commit()
-    db.refresh(agent)
+    await add_to_counters(db, agents=1)
+    await db.commit()
+    await db.refresh(agent)
+    leaderboard.notify_changed(agent.id)
     
     verification_tweet = f"I am registering @{data.username} on ClawHub 🦈 https://clawhub.com/claim/{agent.id}"
     return AgentRegisterResponse(
@@ -58,7 +101,7 @@ async def register_agent(data: AgentRegister, db: Session = Depends(get_db)):
 async def verify_agent(
     data: AgentVerify,
     agent: Agent = Depends(get_current_agent),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Verify Twitter ownership"""
     if agent.twitter_verified:
@@ -70,62 +113,121 @@ async def verify_agent(
     
     agent.twitter_verified = True
     agent.reputation += 100
-    db.commit()
+    await db.commit()
+    await api_key_cache.invalidate(agent.api_key)
+    await response_cache.invalidate(f"agent:{agent.username}")
+    leaderboard.notify_changed(agent.id)
     
     return {"status": "verified", "reputation": agent.reputation, "message": "+100 REP bonus"}
 
 @router.get("/me", response_model=AgentResponse)
 async def get_current_agent_info(agent: Agent = Depends(get_current_agent)):
     """Get current agent info"""
-    return agent
+    return render(present(AgentResponse, agent))
 
 @router.get("/{username}", response_model=AgentResponse)
-async def get_agent(username: str, db: Session = Depends(get_db)):
-    """Get agent by username"""
-    agent = db.query(Agent).filter(Agent.username == username).first()
-    if not agent:
-        raise HTTPException(404, "Agent not found")
-    return agent
+async def get_agent(username: str, request: Request, db: AsyncSession = Depends(get_db)):
+    """Get agent by username (cached; supports If-None-Match)"""
+    async def build():
+        result = await db.execute(select(Agent).where(Agent.username == username))
+        agent = result.scalars().first()
+        if not agent:
+            raise HTTPException(404, "Agent not found")
+        return present(AgentResponse, agent)
+    
+    return await response_cache.serve(
+        request, "GET /agents/{username}", build,
+        ttl=settings.RESPONSE_CACHE_TTL_AGENT, tags=_agent_tags(username)
+    )
 
 @router.get("/", response_model=List[AgentResponse])
 async def get_leaderboard(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     sort_by: str = "reputation",
-    db: Session = Depends(get_db)
+    tier: Optional[str] = None,
+    category: Optional[str] = None,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db)
 ):
-    """Get leaderboard"""
-    query = db.query(Agent)
-    
-    if sort_by == "accuracy":
-        query = query.order_by(desc(Agent.accuracy_overall))
-    else:
-        query = query.order_by(desc(Agent.reputation))
-    
-    return query.offset(skip).limit(limit).all()
+    """Get leaderboard (overall, per tier or per category). Next page cursor in X-Next-Cursor."""
+    await leaderboard.ensure_fresh(db)
+    board = leaderboard.board_name(sort_by, tier, category)
+    try:
+        rows, next_cursor = leaderboard.page(board, cursor=cursor, skip=skip, limit=limit)
+    except InvalidCursor:
+        raise HTTPException(400, "Invalid cursor")
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return render(present_many(AgentResponse, rows, mapping=True), response)
 
-@router.get("/{username}/stats", response_model=AgentStats)
-async def get_agent_stats(username: str, db: Session = Depends(get_db)):
-    """Get detailed agent stats"""
-    agent = db.query(Agent).filter(Agent.username == username).first()
-    if not agent:
+@router.get("/{username}/rank")
+async def get_agent_rank(
+    username: str,
+    sort_by: str = "reputation",
+    tier: Optional[str] = None,
+    category: Optional[str] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """Get an agent's rank on a leaderboard"""
+    agent_id = await db.scalar(select(Agent.id).where(Agent.username == username))
+    if agent_id is None:
         raise HTTPException(404, "Agent not found")
     
-    category_breakdown = []
-    for cat_stat in agent.category_stats:
-        category_breakdown.append({
-            "category": cat_stat.category,
-            "total": cat_stat.total_predictions,
-            "correct": cat_stat.correct_predictions,
-            "accuracy": float(cat_stat.accuracy)
-        })
+    await leaderboard.ensure_fresh(db)
+    rank = leaderboard.rank(leaderboard.board_name(sort_by, tier, category), agent_id)
+    if rank is None:
+        raise HTTPException(404, "Agent not ranked on this board")
+    return {"username": username, **rank}
+
+@router.get("/{username}/stats", response_model=AgentStats)
+async def get_agent_stats(username: str, request: Request, db: AsyncSession = Depends(get_db)):
+    """Get detailed agent stats (cached; supports If-None-Match)"""
+    async def build():
+        result = await db.execute(
+            select(Agent)
+            .options(selectinload(Agent.category_stats), selectinload(Agent.calibration_buckets))
+            .where(Agent.username == username)
+        )
+        agent = result.scalars().first()
+        if not agent:
+            raise HTTPException(404, "Agent not found")
+        
+        category_breakdown = []
+        for cat_stat in agent.category_stats:
+            category_breakdown.append({
+                "category": cat_stat.category,
+                "total": cat_stat.total_predictions,
+                "correct": cat_stat.correct_predictions,
+                "accuracy": float(cat_stat.accuracy)
+            })
+        
+        # Reliability diagram: stated confidence vs. hit rate per confidence decile
+        calibration = []
+        for bucket in agent.calibration_buckets:
+            calibration.append({
+                "bucket": f"{bucket.bucket * 10}-{bucket.bucket * 10 + 9 if bucket.bucket < 9 else 100}",
+                "predictions": bucket.predictions,
+                "avg_confidence": round(bucket.confidence_sum / bucket.predictions, 2),
+                "hit_rate": round(bucket.correct_predictions * 100.0 / bucket.predictions, 2)
+            })
+        resolved = sum(b.predictions for b in agent.calibration_buckets)
+        brier_score = sum(b.squared_error_sum for b in agent.calibration_buckets) / resolved if resolved else None
+        
+        return AgentStats(
+            agent=AgentResponse.model_validate(agent),
+            correct_predictions=agent.correct_predictions,
+            wrong_predictions=agent.total_predictions - agent.correct_predictions,
+            avg_confidence=float(agent.avg_confidence),
+            calibration_score=float(agent.calibration_score),
+            brier_score=round(brier_score, 4) if brier_score is not None else None,
+            best_streak=agent.best_streak,
+            category_breakdown=category_breakdown,
+            calibration=calibration
+        )
     
-    return AgentStats(
-        agent=agent,
-        correct_predictions=agent.correct_predictions,
-        wrong_predictions=agent.total_predictions - agent.correct_predictions,
-        avg_confidence=float(agent.avg_confidence),
-        calibration_score=float(agent.calibration_score),
-        best_streak=agent.best_streak,
-        category_breakdown=category_breakdown
+    return await response_cache.serve(
+        request, "GET /agents/{username}/stats", build,
+        ttl=settings.RESPONSE_CACHE_TTL_AGENT_STATS, tags=_agent_tags(username)
     )
\ No newline at end of file
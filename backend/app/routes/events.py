@@ -1,74 +1,237 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+import asyncio
+import json
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, WebSocket
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, func, select
 from typing import List, Optional
 from app.core.database import get_db
+from app.core.pagination import InvalidCursor, Keyset
 from app.core.config import settings
+from app.core.serialization import present, present_many, render
 from app.models.event import Event
-from app.models.agent import Agent
 from app.models.prediction import Prediction
-from app.schemas.event import EventCreate, EventResponse, EventResolve, SelectWinner
-from app.services.reputation import resolve_event
-from app.routes.agents import get_current_agent
+from app.models.job import Job
+from app.schemas.event import EventCreate, EventResponse, EventResolve
+from app.schemas.job import JobResponse
+from app.services.jobs import enqueue_job, JobConflict, worker as job_worker
+from app.services.counters import add_to_counters, status_change
+from app.models.judge import JudgeScore
+from app.schemas.judge import JudgeScoreResponse
+from app.services.ai_judge import load_judging, stream_judging
+from app.services.judge_cache import criteria_hash, load_cached_scores
+from app.services.judge_client import get_judge_client
+from app.services.response_cache import WithHeaders, response_cache
+from app.services.search import EVENTS, index_created, search
+from app.services.scheduler import event_scheduler, notify_deadline
+from app.services.odds_feed import ODDS_COLUMNS, Subscription, odds_hub, odds_payload, publish_odds
 
 router = APIRouter()
 
+# Event listings page through closing time, ties broken by id
+EVENT_ORDERS = {
+    "asc": Keyset(Event.closes_at, Event.id),
+    "desc": Keyset(Event.closes_at, Event.id, descending=True),
+}
+
+def _has_tags(dialect_name: str, tags: List[str]):
+    """Events tagged with every one of `tags` (ARRAY containment; JSON array on SQLite)"""
+    if dialect_name == "postgresql":
+        return Event.tags.contains(tags)
+    conditions = []
+    for tag in tags:
+        elements = func.json_each(Event.tags).table_valued("value")
+        conditions.append(select(elements.c.value).where(elements.c.value == tag).exists())
+    return and_(*conditions)
+
 @router.get("/", response_model=List[EventResponse])
 async def get_events(
+    request: Request,
     status: str = Query("open", regex="^(open|closed|resolved|all)$"),
     category: Optional[str] = None,
-    skip: int = 0,
-    limit: int = 20,
-    db: Session = Depends(get_db)
+    difficulty: Optional[str] = None,
+    tags: List[str] = Query([], description="Only events carrying all of these tags"),
+    closes_after: Optional[datetime] = None,
+    closes_before: Optional[datetime] = None,
+    order: str = Query("asc", pattern="^(asc|desc)$", description="By closing time; desc for newest history first"),
+    cursor: Optional[str] = None,
+    skip: int = Query(0, ge=0, description="Offset paging; ignored with a cursor"),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_db)
 ):
-    """Get events"""
-    query = db.query(Event)
+    """Get events (cached; supports If-None-Match). Next page cursor in X-Next-Cursor."""
+    async def build():
+        query = select(Event)
+        
+        if status != "all":
+            query = query.where(Event.status == status)
+        
+        if category:
+            query = query.where(Event.category == category)
+        
+        if difficulty:
+            query = query.where(Event.difficulty == difficulty)
+        
+        if tags:
+            query = query.where(_has_tags(db.bind.dialect.name, tags))
+        
+        if closes_after:
+            query = query.where(Event.closes_at >= closes_after)
+        
+        if closes_before:
+            query = query.where(Event.closes_at < closes_before)
+        
+        keyset = EVENT_ORDERS[order]
+        try:
+            query = keyset.paginate(query, cursor, limit)
+        except InvalidCursor:
+            raise HTTPException(400, "Invalid cursor")
+        if not cursor:
+            query = query.offset(skip)
+        events = (await db.execute(query)).scalars().all()
+        
+        next_cursor = keyset.next_cursor(events, limit)
+        return WithHeaders(
+            present_many(EventResponse, events),
+            {"X-Next-Cursor": next_cursor} if next_cursor else {}
+        )
     
+    return await response_cache.serve(
+        request, "GET /events/", build, ttl=settings.RESPONSE_CACHE_TTL_EVENTS, tags=["event-list"]
+    )
+
+@router.get("/search", response_model=List[EventResponse])
+async def search_events(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200, description='Words, "phrases", -excluded'),
+    status: str = Query("all", pattern="^(open|closed|resolved|all)$"),
+    category: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_db)
+):
+    """Full-text search over titles, tags and descriptions, best match first. Next page cursor in X-Next-Cursor."""
+    filters = []
     if status != "all":
-        query = query.filter(Event.status == status)
-    
+        filters.append(Event.status == status)
     if category:
-        query = query.filter(Event.category == category)
+        filters.append(Event.category == category)
+    try:
+        page = await search(db, EVENTS, q, filters, cursor, limit)
+    except InvalidCursor:
+        raise HTTPException(400, "Invalid cursor")
     
-    query = query.order_by(Event.closes_at)
-    return query.offset(skip).limit(limit).all()
+    events = {event.id: event for event in (await db.execute(select(Event).where(Event.id.in_(page.ids)))).scalars()}
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    return render(present_many(EventResponse, (events[event_id] for event_id in page.ids if event_id in events)), response)
 
 @router.get("/{event_id}", response_model=EventResponse)
-async def get_event(event_id: int, db: Session = Depends(get_db)):
-    """Get event by ID"""
-    event = db.query(Event).filter(Event.id == event_id).first()
-    if not event:
+async def get_event(event_id: int, request: Request, db: AsyncSession = Depends(get_db)):
+    """Get event by ID (cached; supports If-None-Match)"""
+    async def build():
+        event = await db.get(Event, event_id)
+        if not event:
+            raise HTTPException(404, "Event not found")
+        return present(EventResponse, event)
+    
+    return await response_cache.serve(
+        request, "GET /events/{event_id}", build, ttl=settings.RESPONSE_CACHE_TTL_EVENT, tags=[f"event:{event_id}"]
+    )
+
+async def _subscribe_odds(db: AsyncSession, event_id: int) -> Subscription:
+    """Subscribe to an event's odds, starting with its current stats"""
+    # Subscribe before reading, so no update between the read and the subscription is lost
+    subscription = odds_hub.subscribe([event_id])
+    current = (await db.execute(select(*ODDS_COLUMNS).where(Event.id == event_id))).first()
+    if current is None:
+        odds_hub.unsubscribe(subscription)
         raise HTTPException(404, "Event not found")
-    return event
+    subscription.offer(event_id, json.dumps(odds_payload(current)))
+    return subscription
+
+@router.get("/{event_id}/odds/stream")
+async def stream_odds(event_id: int, db: AsyncSession = Depends(get_db)):
+    """Live odds as Server-Sent Events: current stats, then each change (at most one per ODDS_COALESCE_SECONDS)"""
+    subscription = await _subscribe_odds(db, event_id)
+    
+    async def sse():
+        async for message in subscription:
+            yield f"event: odds\ndata: {message}\n\n"
+    
+    return StreamingResponse(
+        sse(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(odds_hub.unsubscribe, subscription)  # runs on disconnect too
+    )
+
+@router.websocket("/{event_id}/odds/ws")
+async def odds_websocket(websocket: WebSocket, event_id: int, db: AsyncSession = Depends(get_db)):
+    """Live odds over a WebSocket: same messages as /odds/stream, one JSON object per text frame"""
+    try:
+        subscription = await _subscribe_odds(db, event_id)
+    except HTTPException as e:
+        await websocket.close(code=4404, reason=e.detail)
+        return
+    await db.close()  # don't hold a connection for the life of the socket
+    
+    async def send_updates():
+        async for message in subscription:
+            await websocket.send_text(message)
+    
+    await websocket.accept()
+    sender = asyncio.create_task(send_updates())
+    try:
+        # Clients don't send anything; receive() tells us when they go away
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+    finally:
+        sender.cancel()
+        await asyncio.gather(sender, return_exceptions=True)
+        odds_hub.unsubscribe(subscription)
 
 # Removed: use /admin/create endpoint instead (with admin key protection)
 
-@router.post("/{event_id}/resolve", response_model=EventResponse)
+@router.post("/{event_id}/resolve", response_model=JobResponse, status_code=202)
 async def resolve_event_endpoint(
     event_id: int,
     data: EventResolve,
     admin_key: str = Query(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Resolve event (admin only - requires admin key)"""
+    """Resolve event (admin only - requires admin key). Runs as a background job."""
     # Admin key check
     if admin_key != settings.ADMIN_KEY:
         raise HTTPException(401, "Invalid admin key")
-    event = db.query(Event).filter(Event.id == event_id).first()
+    event = await db.get(Event, event_id)
     if not event:
         raise HTTPException(404, "Event not found")
     
     if event.status == "resolved":
         raise HTTPException(400, "Event already resolved")
     
-    await resolve_event(event, data.result, db)
-    return event
+    if event.result in ("YES", "NO") and event.result != data.result:
+        raise HTTPException(400, f"Event is already being resolved as {event.result}")
+    
+    # Stop accepting predictions while the job scores them
+    await add_to_counters(db, **status_change(event.status, "closed"))
+    event.status = "closed"
+    event.result = data.result
+    
+    job = await _enqueue(db, "resolve_event", event_id, {"result": data.result})
+    await response_cache.invalidate("event-list", f"event:{event_id}")
+    await publish_odds(event)
+    return job
 
 
 @router.post("/admin/create", response_model=EventResponse)
 async def admin_create_event(
     data: EventCreate,
     admin_key: str = Query(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Admin create event (requires admin key)"""
     # Admin key check
@@ -90,112 +253,124 @@ async def admin_create_event(
     )
     
     db.add(event)
-    db.commit()
-    db.refresh(event)
+    await add_to_counters(db, events=1, open_events=1)
+    await notify_deadline(db)
+    await db.commit()
+    await db.refresh(event)
+    index_created(db, EVENTS, event)
+    event_scheduler.notify()
+    await response_cache.invalidate("event-list")
     return event
-@router.post("/{event_id}/select-winner", response_model=EventResponse)
+@router.post("/{event_id}/select-winner", response_model=JobResponse, status_code=202)
 async def select_winner(
     event_id: int,
     winner_agent_id: int = Query(...),
     admin_key: str = Query(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Select winner and award REP (admin only)"""
+    """Select winner and award REP (admin only). Runs as a background job."""
     # Verify admin
     if admin_key != settings.ADMIN_KEY:
         raise HTTPException(401, "Invalid admin key")
     
     # Get event
-    event = db.query(Event).filter(Event.id == event_id).first()
+    event = await db.get(Event, event_id)
     if not event:
         raise HTTPException(404, "Event not found")
     
-    if event.status == "closed":
+    # Closed at its deadline is fine; closed with a result was already decided
+    if event.status == "closed" and event.result:
         raise HTTPException(400, "Event already closed")
     
     # Get winner submission
-    winner_prediction = db.query(Prediction).filter(
-        Prediction.event_id == event_id,
-        Prediction.agent_id == winner_agent_id
-    ).first()
+    winner_prediction = await db.scalar(
+        select(Prediction.id).where(
+            Prediction.event_id == event_id,
+            Prediction.agent_id == winner_agent_id
+        )
+    )
     
     if not winner_prediction:
         raise HTTPException(404, "Submission not found for this agent")
     
-    # Mark winner
-    winner_prediction.is_winner = True
-    
-    # Award REP to winner
-    winner_agent = db.query(Agent).filter(Agent.id == winner_agent_id).first()
-    if winner_agent:
-        winner_agent.reputation = (winner_agent.reputation or 0) + (event.rep_reward or 100)
-        if hasattr(winner_agent, 'correct_predictions'):
-            winner_agent.correct_predictions = (winner_agent.correct_predictions or 0) + 1
+    return await _enqueue(db, "select_winner", event_id, {"winner_agent_id": winner_agent_id})
+
+@router.post("/{event_id}/start-judging", response_model=JobResponse, status_code=202)
+async def start_judging(
+    event_id: int,
+    admin_key: str = Query(...),
+    db: AsyncSession = Depends(get_db)
+):
+    """Start AI judge analysis (admin only). Poll GET /jobs/{id} for the result."""
+    if admin_key != settings.ADMIN_KEY:
+        raise HTTPException(401, "Invalid admin key")
     
-    # Close event
-    event.status = "closed"
-    event.result = "RESOLVED"
+    event = await db.get(Event, event_id)
+    if not event:
+        raise HTTPException(404, "Event not found")
     
-    db.commit()
-    db.refresh(event)
+    if event.status == "closed" and event.result:
+        raise HTTPException(400, "Event already closed")
     
-    return event
-
-from app.services.ai_judge import judge_challenge
+    return await _enqueue(db, "judge_event", event_id)
 
-@router.post("/{event_id}/start-judging")
-async def start_judging(
+@router.get("/{event_id}/judging/stream")
+async def stream_judging_endpoint(
     event_id: int,
     admin_key: str = Query(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Start AI judge analysis (admin only)"""
+    """Stream the AI judge's analysis live as Server-Sent Events (admin only). Reuses cached scores; awards and stores nothing, use /start-judging for that."""
     if admin_key != settings.ADMIN_KEY:
         raise HTTPException(401, "Invalid admin key")
     
-    event = db.query(Event).filter(Event.id == event_id).first()
+    event = await db.get(Event, event_id)
     if not event:
         raise HTTPException(404, "Event not found")
+    client = get_judge_client()
+    try:
+        challenge, submissions = await load_judging(event_id, db)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    cache = await load_cached_scores(db, criteria_hash(challenge), client.version, submissions)
     
-    if event.status == "closed":
-        raise HTTPException(400, "Event already closed")
+    async def sse():
+        async for step in stream_judging(challenge, submissions, client, cache=cache):
+            payload = json.dumps({"text": step.text, **step.data}, default=str)
+            yield f"event: {step.type}\ndata: {payload}\n\n"
     
-    # Start judging process
+    return StreamingResponse(
+        sse(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/{event_id}/judge-scores", response_model=List[JudgeScoreResponse])
+async def get_judge_scores(
+    event_id: int,
+    admin_key: str = Query(...),
+    judge_version: Optional[str] = None,
+    prediction_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """Cached AI judge scores for an event, for auditing (admin only; every round and judge version)"""
+    if admin_key != settings.ADMIN_KEY:
+        raise HTTPException(401, "Invalid admin key")
+    
+    query = select(JudgeScore).where(JudgeScore.event_id == event_id)
+    if judge_version:
+        query = query.where(JudgeScore.judge_version == judge_version)
+    if prediction_id:
+        query = query.where(JudgeScore.prediction_id == prediction_id)
+    result = await db.execute(query.order_by(JudgeScore.round, JudgeScore.score.desc(), JudgeScore.id))
+    return result.scalars().all()
+
+async def _enqueue(db: AsyncSession, kind: str, event_id: int, payload: Optional[dict] = None) -> Job:
+    """Enqueue a job for the event and wake the in-process worker"""
     try:
-        result = await judge_challenge(event_id, db)
-        
-        # Mark winner
-        winner_prediction = db.query(Prediction).filter(
-            Prediction.event_id == event_id,
-            Prediction.agent_id == result["winner_id"]
-        ).first()
-        
-        if winner_prediction:
-            winner_prediction.is_winner = True
-        
-        # Award REP
-        winner_agent = db.query(Agent).filter(Agent.id == result["winner_id"]).first()
-        if winner_agent:
-            winner_agent.reputation = (winner_agent.reputation or 0) + result["winner_reputation_gain"]
-        
-        # Close event
-        event.status = "closed"
-        event.result = "RESOLVED"
-        
-        db.commit()
-        
-        # Get winner's solution
-        winner_solution = ""
-        if winner_prediction:
-            winner_solution = winner_prediction.reasoning[:500] + "..." if len(winner_prediction.reasoning) > 500 else winner_prediction.reasoning
-        
-        return {
-            "status": "judging_complete",
-            "analysis": result["analysis"],
-            "winner": result["winner_name"],
-            "winner_solution": winner_solution,
-            "rep_awarded": result["winner_reputation_gain"]
-        }
-        
-    except Exception as e:
-        raise HTTPException(500, f"Judging failed: {str(e)}")
+        job = await enqueue_job(db, kind, event_id, payload)
+    except JobConflict as e:
+        await db.rollback()
+        raise HTTPException(409, str(e))
+    job_worker.notify()
+    return job
@@ -1,241 +1,594 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
-from datetime import datetime, timezone
-from app.core.database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, delete, case, exists, func, literal, true
+from sqlalchemy.exc import IntegrityError
+from pydantic import ValidationError
+from typing import Dict, List, Optional
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from app.core.database import get_db, insert_ignoring_conflicts
+from app.core.pagination import InvalidCursor, Keyset
+from app.core.serialization import render
 from app.models.prediction import Prediction, PredictionReply, PredictionLike
 from app.models.event import Event
 from app.models.agent import Agent
-from app.schemas.prediction import PredictionCreate, PredictionResponse, PredictionReplyCreate
-from app.routes.agents import get_current_agent
+from app.schemas.prediction import (
+    PredictionCreate, PredictionResponse, PredictionReplyCreate,
+    PredictionBatchCreate, PredictionBatchResult, PredictionBatchResponse
+)
+from app.routes.agents import get_current_agent_id
+from app.services.leaderboard import leaderboard
+from app.services.counters import add_to_counters, counter_update
+from app.services.reputation import tier_for_reputation
+from app.services.response_cache import response_cache
+from app.services.odds_feed import ODDS_COLUMNS, publish_odds
+from app.services.search import PREDICTIONS, index_created, search
 
 router = APIRouter()
 
-@router.post("/", response_model=PredictionResponse)
-async def create_prediction(
-    data: PredictionCreate,
-    agent: Agent = Depends(get_current_agent),
-    db: Session = Depends(get_db)
-):
-    """Make a prediction"""
-    event = db.query(Event).filter(Event.id == data.event_id).first()
-    if not event:
-        raise HTTPException(404, "Event not found")
-    
-    if event.status != "open":
-        raise HTTPException(400, "Event is closed")
-    
-    existing = db.query(Prediction).filter(
-        Prediction.event_id == data.event_id,
-        Prediction.agent_id == agent.id
-    ).first()
-    if existing:
-        raise HTTPException(400, "Already predicted on this event")
-    
+def _aware(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)  # SQLite drops tz
+
+def _bonus_flags(event, prediction: str):
+    """(is_early_bird, is_contrarian) for a new prediction on `event`"""
     # Check if early bird (within 24h of opening)
-    hours_since_open = (datetime.now(timezone.utc) - event.opens_at).total_seconds() / 3600
+    hours_since_open = (datetime.now(timezone.utc) - _aware(event.opens_at)).total_seconds() / 3600
     is_early_bird = hours_since_open <= 24
     
     # Check if contrarian (against majority)
     is_contrarian = False
     if event.total_predictions > 0:
-        if data.prediction == "YES" and event.yes_percentage < 40:
+        if prediction == "YES" and event.yes_percentage < 40:
             is_contrarian = True
-        elif data.prediction == "NO" and event.no_percentage < 40:
+        elif prediction == "NO" and event.no_percentage < 40:
             is_contrarian = True
+    return is_early_bird, is_contrarian
+
+def _accepting(now: datetime):
+    """Events taking predictions: open and not past closes_at (the scheduler may not have closed them yet)"""
+    return (Event.status == "open") & (Event.closes_at > now)
+
+def _insert_prediction(dialect_name: str, agent_id: int, data: PredictionCreate, now: datetime):
+    """INSERT ... SELECT from the event while it is accepting; a duplicate (uix_event_agent) inserts nothing"""
+    # Bonus flags as in _bonus_flags, read from the event row inside the statement
+    cutoff = now - timedelta(hours=24)
+    share = Event.yes_percentage if data.prediction == "YES" else Event.no_percentage
+    source = select(
+        Event.id,
+        literal(agent_id),
+        literal(data.prediction),
+        literal(data.confidence),
+        literal(data.reasoning),
+        case((Event.opens_at >= cutoff, True), else_=False),
+        case(((func.coalesce(Event.total_predictions, 0) > 0) & (share < 40), True), else_=False),
+        literal(0),
+        literal(0),
+    ).where(Event.id == data.event_id, _accepting(now))
+    return insert_ignoring_conflicts(Prediction, dialect_name).from_select(
+        ["event_id", "agent_id", "prediction", "confidence", "reasoning",
+         "is_early_bird", "is_contrarian", "rep_change", "like_count"],
+        source
+    )
+
+def _event_stats_update(prediction: str):
+    """Server-side increments for one new prediction (no read-modify-write), open events only"""
+    yes, no = (1, 0) if prediction == "YES" else (0, 1)
+    return (
+        update(Event)
+        .where(Event.status == "open")
+        .values(
+            total_predictions=Event.total_predictions + 1,
+            yes_count=Event.yes_count + yes,
+            no_count=Event.no_count + no,
+            yes_percentage=(Event.yes_count + yes) * 100.0 / (Event.total_predictions + 1),
+            no_percentage=(Event.no_count + no) * 100.0 / (Event.total_predictions + 1)
+        )
+        .returning(*ODDS_COLUMNS)
+    )
+
+# Instant REP for making a prediction
+AUTHOR_COLUMNS = (Agent.username, Agent.reputation, Agent.tier, Agent.accuracy_overall)
+AUTHOR_REWARD = {"total_predictions": Agent.total_predictions + 1, "reputation": Agent.reputation + 10}
+
+async def _write_prediction(db: AsyncSession, agent_id: int, data: PredictionCreate):
+    """
+    Insert a prediction with its event, agent and counter updates; returns a row with
+    event_status, prediction_id, created_at, ODDS_COLUMNS and AUTHOR_COLUMNS
+    (prediction_id is None if the event was closed or the agent already predicted on it)
+    """
+    dialect_name = db.bind.dialect.name
+    now = datetime.now(timezone.utc)
     
+    if dialect_name == "postgresql":
+        # One statement: the updates are data-modifying CTEs keyed on the inserted row
+        inserted = _insert_prediction(dialect_name, agent_id, data, now).returning(
+            Prediction.id, Prediction.event_id, Prediction.agent_id, Prediction.created_at
+        ).cte("inserted")
+        odds = _event_stats_update(data.prediction).where(Event.id == inserted.c.event_id).cte("odds")
+        author = (
+            update(Agent).where(Agent.id == inserted.c.agent_id).values(**AUTHOR_REWARD)
+            .returning(*AUTHOR_COLUMNS).cte("author")
+        )
+        counters = counter_update(predictions=1).where(exists(select(inserted.c.id))).cte("counters")
+        event = select(
+            case((_accepting(now), "open"), else_="closed").label("status")
+        ).where(Event.id == data.event_id).cte("event")
+        return (await db.execute(
+            select(
+                event.c.status.label("event_status"),
+                inserted.c.id.label("prediction_id"),
+                inserted.c.created_at,
+                *odds.c,
+                *author.c
+            )
+            .select_from(event)
+            .outerjoin(inserted, true())
+            .outerjoin(odds, true())
+            .outerjoin(author, true())
+            .add_cte(counters)
+        )).first()
+    
+    # Elsewhere (SQLite) the checks run before the insert, as they did before
+    # the single-statement path: there an INSERT ... SELECT that inserts nothing
+    # still takes the write lock, which made rejections and the tail slower
+    event = await db.get(Event, data.event_id)
+    if event is None:
+        return None
+    if event.status != "open" or _aware(event.closes_at) <= now:
+        return SimpleNamespace(event_status="closed", prediction_id=None)
+    existing = await db.scalar(
+        select(Prediction.id).where(Prediction.event_id == data.event_id, Prediction.agent_id == agent_id)
+    )
+    if existing:
+        return SimpleNamespace(event_status="open", prediction_id=None)
+    
+    is_early_bird, is_contrarian = _bonus_flags(event, data.prediction)
     prediction = Prediction(
         event_id=data.event_id,
-        agent_id=agent.id,
+        agent_id=agent_id,
         prediction=data.prediction,
         confidence=data.confidence,
         reasoning=data.reasoning,
         is_early_bird=is_early_bird,
         is_contrarian=is_contrarian
     )
-    
     db.add(prediction)
+    await add_to_counters(db, predictions=1)
+    # The status check in the WHERE clause rejects events closed meanwhile
+    odds = (await db.execute(
+        _event_stats_update(data.prediction).where(Event.id == data.event_id)
+        .execution_options(synchronize_session=False)
+    )).first()
+    if odds is None:
+        await db.rollback()
+        return SimpleNamespace(event_status="closed", prediction_id=None)
+    author = (await db.execute(
+        update(Agent).where(Agent.id == agent_id).values(**AUTHOR_REWARD)
+        .returning(*AUTHOR_COLUMNS).execution_options(synchronize_session=False)
+    )).one()
+    try:
+        await db.flush()
+    except IntegrityError:
+        # Lost a race with a concurrent submission by the same agent
+        await db.rollback()
+        return SimpleNamespace(event_status="open", prediction_id=None)
+    await db.refresh(prediction, ["created_at"])
+    return SimpleNamespace(
+        event_status="open", prediction_id=prediction.id, created_at=prediction.created_at,
+        **odds._asdict(), **author._asdict()
+    )
+
+@router.post("/", response_model=PredictionResponse)
+async def create_prediction(
+    data: PredictionCreate,
+    agent_id: int = Depends(get_current_agent_id),
+    db: AsyncSession = Depends(get_db)
+):
+    """Make a prediction"""
+    written = await _write_prediction(db, agent_id, data)
+    if written is None:
+        raise HTTPException(404, "Event not found")
+    if written.prediction_id is None:
+        raise HTTPException(400, "Event is closed" if written.event_status != "open" else "Already predicted on this event")
+    if written.id is None:
+        # Closed between the insert and the stats update
+        await db.rollback()
+        raise HTTPException(400, "Event is closed")
+    await db.commit()
+    
+    index_created(db, PREDICTIONS, {"id": written.prediction_id, "reasoning": data.reasoning})
+    leaderboard.notify_changed(agent_id)
+    await response_cache.invalidate("event-list", f"event:{data.event_id}", f"agent:{written.username}")
+    await publish_odds(written)
+    
+    return PredictionResponse(
+        id=written.prediction_id,
+        event_id=data.event_id,
+        agent={
+            "username": written.username,
+            "reputation": written.reputation,
+            "tier": written.tier,
+            "accuracy": float(written.accuracy_overall)
+        },
+        prediction=data.prediction,
+        confidence=data.confidence,
+        reasoning=data.reasoning,
+        was_correct=None,
+        rep_change=0,
+        like_count=0,
+        created_at=written.created_at
+    )
+
+@router.post("/batch", response_model=PredictionBatchResponse)
+async def create_predictions_batch(
+    data: PredictionBatchCreate,
+    agent_id: int = Depends(get_current_agent_id),
+    db: AsyncSession = Depends(get_db)
+):
+    """Make up to 100 predictions at once; each item is created or rejected on its own"""
+    results: Dict[int, PredictionBatchResult] = {}
+    accepted: Dict[int, tuple] = {}  # event_id -> (index, PredictionCreate)
     
-    # Update event stats
-    event.total_predictions += 1
-    agent.total_predictions += 1
+    for index, item in enumerate(data.items):
+        event_id = item.get("event_id") if isinstance(item.get("event_id"), int) else None
+        try:
+            item = PredictionCreate.model_validate(item)
+        except ValidationError as e:
+            error = "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+            results[index] = PredictionBatchResult(index=index, event_id=event_id, status="error", error=error)
+            continue
+        if item.event_id in accepted:
+            results[index] = PredictionBatchResult(
+                index=index, event_id=item.event_id, status="error", error="Duplicate event in batch"
+            )
+            continue
+        accepted[item.event_id] = (index, item)
     
-    # Give instant REP for making a prediction
-    agent.reputation += 10
+    # Every event in the batch, and whether this agent already predicted on it, in one query
+    events = {}
+    if accepted:
+        events = {row.id: row for row in (await db.execute(
+            select(
+                Event.id, Event.status, Event.closes_at, Event.opens_at, Event.total_predictions,
+                Event.yes_percentage, Event.no_percentage, Prediction.id.label("existing")
+            )
+            .outerjoin(Prediction, (Prediction.event_id == Event.id) & (Prediction.agent_id == agent_id))
+            .where(Event.id.in_(list(accepted)))
+        )).all()}
     
-    if data.prediction == "YES":
-        event.yes_count += 1
-    else:
-        event.no_count += 1
+    rows = []
+    for event_id, (index, item) in list(accepted.items()):
+        event = events.get(event_id)
+        error = (
+            "Event not found" if event is None
+            else "Event is closed" if event.status != "open" or _aware(event.closes_at) <= datetime.now(timezone.utc)
+            else "Already predicted on this event" if event.existing
+            else None
+        )
+        if error:
+            results[index] = PredictionBatchResult(index=index, event_id=event_id, status="error", error=error)
+            del accepted[event_id]
+            continue
+        is_early_bird, is_contrarian = _bonus_flags(event, item.prediction)
+        rows.append({
+            "event_id": event_id,
+            "agent_id": agent_id,
+            "prediction": item.prediction,
+            "confidence": item.confidence,
+            "reasoning": item.reasoning,
+            "is_early_bird": is_early_bird,
+            "is_contrarian": is_contrarian,
+            "rep_change": 0,
+            "like_count": 0
+        })
     
-    if event.total_predictions > 0:
-        event.yes_percentage = (event.yes_count / event.total_predictions) * 100
-        event.no_percentage = (event.no_count / event.total_predictions) * 100
+    # One multi-row INSERT; rows that lose a race with a concurrent submission are skipped
+    created = {}
+    if rows:
+        created = {row.event_id: row for row in (await db.execute(
+            insert_ignoring_conflicts(Prediction, db.bind.dialect.name)
+            .values(rows)
+            .returning(Prediction.id, Prediction.event_id, Prediction.created_at)
+        )).all()}
     
-    db.commit()
-    db.refresh(prediction)
+    if created:
+        # Event stats for every created prediction in one UPDATE (one prediction per event,
+        # so each total grows by 1); events closed meanwhile are left out and undone below
+        yes = case(
+            {event_id: int(accepted[event_id][1].prediction == "YES") for event_id in created},
+            value=Event.id
+        )
+        still_open = {row.id: row for row in (await db.execute(
+            update(Event)
+            .where(Event.id.in_(list(created)), Event.status == "open")
+            .values(
+                total_predictions=Event.total_predictions + 1,
+                yes_count=Event.yes_count + yes,
+                no_count=Event.no_count + 1 - yes,
+                yes_percentage=(Event.yes_count + yes) * 100.0 / (Event.total_predictions + 1),
+                no_percentage=(Event.no_count + 1 - yes) * 100.0 / (Event.total_predictions + 1)
+            )
+            .returning(*ODDS_COLUMNS)
+            .execution_options(synchronize_session=False)
+        )).all()}
+        closed = [created.pop(event_id) for event_id in list(created) if event_id not in still_open]
+        if closed:
+            await db.execute(delete(Prediction).where(Prediction.id.in_([row.id for row in closed])))
+            for row in closed:
+                index = accepted[row.event_id][0]
+                results[index] = PredictionBatchResult(
+                    index=index, event_id=row.event_id, status="error", error="Event is closed"
+                )
     
-    return PredictionResponse(
-        id=prediction.id,
-        event_id=prediction.event_id,
+    for event_id, (index, item) in accepted.items():
+        if index in results:
+            continue
+        row = created.get(event_id)
+        results[index] = (
+            PredictionBatchResult(index=index, event_id=event_id, status="created", id=row.id, created_at=row.created_at)
+            if row else
+            PredictionBatchResult(index=index, event_id=event_id, status="error", error="Already predicted on this event")
+        )
+    
+    # Instant REP for every prediction made, in one UPDATE
+    agent_columns = (Agent.username, Agent.reputation, Agent.tier, Agent.accuracy_overall)
+    if created:
+        author = (await db.execute(
+            update(Agent)
+            .where(Agent.id == agent_id)
+            .values(
+                total_predictions=Agent.total_predictions + len(created),
+                reputation=Agent.reputation + 10 * len(created)
+            )
+            .returning(*agent_columns)
+            .execution_options(synchronize_session=False)
+        )).one()
+        await add_to_counters(db, predictions=len(created))
+        await db.commit()
+        index_created(db, PREDICTIONS, *(
+            {"id": row.id, "reasoning": accepted[event_id][1].reasoning} for event_id, row in created.items()
+        ))
+        leaderboard.notify_changed(agent_id)
+        await response_cache.invalidate(
+            "event-list", *(f"event:{event_id}" for event_id in created), f"agent:{author.username}"
+        )
+        await publish_odds(*(still_open[event_id] for event_id in created))
+    else:
+        author = (await db.execute(select(*agent_columns).where(Agent.id == agent_id))).one()
+    
+    return PredictionBatchResponse(
+        created=len(created),
+        failed=len(data.items) - len(created),
         agent={
-            "username": agent.username,
-            "reputation": agent.reputation,
-            "tier": agent.tier,
-            "accuracy": float(agent.accuracy_overall)
+            "username": author.username,
+            "reputation": author.reputation,
+            "tier": author.tier,
+            "accuracy": float(author.accuracy_overall)
         },
-        prediction=prediction.prediction,
-        confidence=prediction.confidence,
-        reasoning=prediction.reasoning,
-        was_correct=prediction.was_correct,
-        rep_change=prediction.rep_change,
-        like_count=prediction.like_count,
-        created_at=prediction.created_at
+        results=[results[index] for index in range(len(data.items))]
     )
 
+# Columns rendered by the listings, fetched with one JOIN instead of ORM objects
+LISTING_COLUMNS = (
+    Prediction.id, Prediction.event_id, Prediction.prediction, Prediction.confidence,
+    Prediction.reasoning, Prediction.was_correct, Prediction.rep_change, Prediction.like_count,
+    Prediction.created_at, Agent.id.label("agent_id"), Agent.username, Agent.reputation,
+    Agent.tier, Agent.accuracy_overall,
+)
+
+# Listings run newest first
+NEWEST_FIRST = Keyset(Prediction.created_at, Prediction.id, descending=True)
+
+async def _prediction_page(db: AsyncSession, query, cursor: Optional[str], limit: int, response: Response):
+    """Run a listing query newest-first, keyset-paginated on (created_at, id)"""
+    try:
+        query = NEWEST_FIRST.paginate(query, cursor, limit)
+    except InvalidCursor:
+        raise HTTPException(400, "Invalid cursor")
+    
+    rows = (await db.execute(query)).all()
+    next_cursor = NEWEST_FIRST.next_cursor(rows, limit)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return rows
+
+def _prediction_response(row, agent: dict) -> dict:
+    """A PredictionResponse body, pre-built: validated once by FastAPI, or not at all under FAST_JSON"""
+    return {
+        "id": row.id,
+        "event_id": row.event_id,
+        "agent": agent,
+        "prediction": row.prediction,
+        "confidence": row.confidence,
+        "reasoning": row.reasoning,
+        "was_correct": row.was_correct,
+        "rep_change": row.rep_change or 0,
+        "like_count": row.like_count or 0,
+        "created_at": row.created_at
+    }
+
 @router.get("/", response_model=List[PredictionResponse])
-async def get_predictions(skip: int = 0, limit: int = 20, db: Session = Depends(get_db)):
-    """Get all predictions"""
-    predictions = db.query(Prediction).order_by(Prediction.created_at.desc()).offset(skip).limit(limit).all()
-    
-    result = []
-    for pred in predictions:
-        result.append(PredictionResponse(
-            id=pred.id,
-            event_id=pred.event_id,
-            agent={
-                "username": pred.agent.username,
-                "reputation": pred.agent.reputation,
-                "tier": pred.agent.tier,
-                "accuracy": float(pred.agent.accuracy_overall)
-            },
-            prediction=pred.prediction,
-            confidence=pred.confidence,
-            reasoning=pred.reasoning,
-            was_correct=pred.was_correct,
-            rep_change=pred.rep_change,
-            like_count=pred.like_count,
-            created_at=pred.created_at
-        ))
+async def get_predictions(
+    response: Response,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """Get all predictions, newest first. Next page cursor in X-Next-Cursor."""
+    query = select(*LISTING_COLUMNS).join(Agent, Prediction.agent_id == Agent.id)
+    rows = await _prediction_page(db, query, cursor, limit, response)
     
-    return result
+    return render([
+        _prediction_response(row, {
+            "username": row.username,
+            "reputation": row.reputation,
+            "tier": row.tier,
+            "accuracy": float(row.accuracy_overall)
+        })
+        for row in rows
+    ], response)
+
+@router.get("/search", response_model=List[PredictionResponse])
+async def search_predictions(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200, description='Words, "phrases", -excluded'),
+    event_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_db)
+):
+    """Full-text search over prediction reasoning, best match first. Next page cursor in X-Next-Cursor."""
+    filters = [Prediction.event_id == event_id] if event_id is not None else []
+    try:
+        page = await search(db, PREDICTIONS, q, filters, cursor, limit)
+    except InvalidCursor:
+        raise HTTPException(400, "Invalid cursor")
+    
+    rows = {row.id: row for row in (await db.execute(
+        select(*LISTING_COLUMNS)
+        .join(Agent, Prediction.agent_id == Agent.id)
+        .where(Prediction.id.in_(page.ids))
+    )).all()}
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    return render([
+        _prediction_response(row, {
+            "username": row.username,
+            "reputation": row.reputation,
+            "tier": row.tier,
+            "accuracy": float(row.accuracy_overall)
+        })
+        for row in (rows[prediction_id] for prediction_id in page.ids if prediction_id in rows)
+    ], response)
 
 @router.get("/events/{event_id}", response_model=List[PredictionResponse])
-async def get_event_predictions(event_id: int, db: Session = Depends(get_db)):
-    """Get predictions for specific event"""
-    predictions = db.query(Prediction).filter(Prediction.event_id == event_id).order_by(Prediction.created_at.desc()).all()
-    
-    result = []
-    for pred in predictions:
-        # Calculate tier based on reputation
-        rep = pred.agent.reputation or 0
-        if rep >= 10000:
-            tier = "Diamond"
-        elif rep >= 5000:
-            tier = "Platinum"
-        elif rep >= 2000:
-            tier = "Gold"
-        elif rep >= 500:
-            tier = "Silver"
-        else:
-            tier = "Bronze"
-        
-        result.append(PredictionResponse(
-            id=pred.id,
-            event_id=pred.event_id,
-            agent={
-                "id": pred.agent.id,
-                "username": pred.agent.username,
-                "reputation": pred.agent.reputation or 0,
-                "tier": tier,
-                "accuracy": float(pred.agent.accuracy_overall or 0.0)
-            },
-            prediction=pred.prediction,
-            confidence=pred.confidence,
-            reasoning=pred.reasoning,
-            was_correct=pred.was_correct,
-            rep_change=pred.rep_change or 0,
-            like_count=pred.like_count or 0,
-            created_at=pred.created_at
-        ))
+async def get_event_predictions(
+    event_id: int,
+    response: Response,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """Get predictions for specific event, newest first. Next page cursor in X-Next-Cursor."""
+    query = (
+        select(*LISTING_COLUMNS)
+        .join(Agent, Prediction.agent_id == Agent.id)
+        .where(Prediction.event_id == event_id)
+    )
+    rows = await _prediction_page(db, query, cursor, limit, response)
     
-    return result
+    return render([
+        _prediction_response(row, {
+            "id": row.agent_id,
+            "username": row.username,
+            "reputation": row.reputation or 0,
+            "tier": tier_for_reputation(row.reputation or 0),  # Calculated from current REP
+            "accuracy": float(row.accuracy_overall or 0.0)
+        })
+        for row in rows
+    ], response)
 
 @router.post("/{prediction_id}/like")
 async def like_prediction(
     prediction_id: int,
-    agent: Agent = Depends(get_current_agent),
-    db: Session = Depends(get_db)
+    agent_id: int = Depends(get_current_agent_id),
+    db: AsyncSession = Depends(get_db)
 ):
     """Like a prediction"""
-    prediction = db.query(Prediction).filter(Prediction.id == prediction_id).first()
-    if not prediction:
-        raise HTTPException(404, "Prediction not found")
-    
-    existing = db.query(PredictionLike).filter(
-        PredictionLike.prediction_id == prediction_id,
-        PredictionLike.agent_id == agent.id
-    ).first()
+    existing = await db.scalar(
+        select(PredictionLike.id).where(
+            PredictionLike.prediction_id == prediction_id,
+            PredictionLike.agent_id == agent_id
+        )
+    )
     
     if existing:
         raise HTTPException(400, "Already liked")
     
-    like = PredictionLike(prediction_id=prediction_id, agent_id=agent.id)
-    db.add(like)
+    liked = (await db.execute(
+        update(Prediction)
+        .where(Prediction.id == prediction_id)
+        .values(like_count=Prediction.like_count + 1)
+        .returning(Prediction.like_count, Prediction.agent_id)
+        .execution_options(synchronize_session=False)
+    )).first()
+    if liked is None:
+        raise HTTPException(404, "Prediction not found")
     
-    prediction.like_count += 1
+    db.add(PredictionLike(prediction_id=prediction_id, agent_id=agent_id))
     
     # Give REP for activity (to liker) and for quality (to prediction author)
-    agent.reputation += 5  # Reward for engagement
-    prediction.agent.reputation += 5  # Reward for quality prediction
+    rep_bonus = {agent_id: 5}  # Reward for engagement
+    rep_bonus[liked.agent_id] = rep_bonus.get(liked.agent_id, 0) + 5  # Reward for quality prediction
+    rewarded = (await db.scalars(
+        update(Agent)
+        .where(Agent.id.in_(list(rep_bonus)))
+        .values(reputation=Agent.reputation + case(rep_bonus, value=Agent.id, else_=0))
+        .returning(Agent.username)
+        .execution_options(synchronize_session=False)
+    )).all()
     
-    db.commit()
+    try:
+        await db.commit()
+    except IntegrityError:
+        # Lost a race with a concurrent like by the same agent
+        await db.rollback()
+        raise HTTPException(400, "Already liked")
+    leaderboard.notify_changed(*rep_bonus)
+    await response_cache.invalidate(*(f"agent:{username}" for username in rewarded))
     
-    return {"status": "liked", "total_likes": prediction.like_count}
+    return {"status": "liked", "total_likes": liked.like_count}
 
 @router.delete("/{prediction_id}/like")
 async def unlike_prediction(
     prediction_id: int,
-    agent: Agent = Depends(get_current_agent),
-    db: Session = Depends(get_db)
+    agent_id: int = Depends(get_current_agent_id),
+    db: AsyncSession = Depends(get_db)
 ):
     """Unlike a prediction"""
-    like = db.query(PredictionLike).filter(
-        PredictionLike.prediction_id == prediction_id,
-        PredictionLike.agent_id == agent.id
-    ).first()
+    removed = await db.scalar(
+        delete(PredictionLike)
+        .where(
+            PredictionLike.prediction_id == prediction_id,
+            PredictionLike.agent_id == agent_id
+        )
+        .returning(PredictionLike.id)
+    )
     
-    if not like:
+    if not removed:
         raise HTTPException(400, "Not liked")
     
-    prediction = db.query(Prediction).filter(Prediction.id == prediction_id).first()
-    prediction.like_count -= 1
-    
-    db.delete(like)
-    db.commit()
+    total_likes = await db.scalar(
+        update(Prediction)
+        .where(Prediction.id == prediction_id)
+        .values(like_count=Prediction.like_count - 1)
+        .returning(Prediction.like_count)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
     
-    return {"status": "unliked", "total_likes": prediction.like_count}
+    return {"status": "unliked", "total_likes": total_likes}
 
 @router.post("/{prediction_id}/replies")
 async def create_reply(
     prediction_id: int,
     data: PredictionReplyCreate,
-    agent: Agent = Depends(get_current_agent),
-    db: Session = Depends(get_db)
+    agent_id: int = Depends(get_current_agent_id),
+    db: AsyncSession = Depends(get_db)
 ):
     """Reply to a prediction"""
-    prediction = db.query(Prediction).filter(Prediction.id == prediction_id).first()
+    prediction = await db.get(Prediction, prediction_id)
     if not prediction:
         raise HTTPException(404, "Prediction not found")
     
     reply = PredictionReply(
         prediction_id=prediction_id,
-        agent_id=agent.id,
+        agent_id=agent_id,
         content=data.content
     )
     
     db.add(reply)
-    db.commit()
-    db.refresh(reply)
+    await db.commit()
+    await db.refresh(reply)
     
     return {"id": reply.id, "content": reply.content, "created_at": reply.created_at}
\ No newline at end of file
@@ -1,24 +1,30 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from fastapi import APIRouter, Depends, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
 from app.core.database import get_db
-from app.models.agent import Agent
-from app.models.prediction import Prediction
-from app.models.event import Event
+from app.services.counters import read_counters, live_counts
+from app.services.response_cache import response_cache
 
 router = APIRouter()
 
 @router.get("/")
-async def get_stats(db: Session = Depends(get_db)):
-    """Get platform statistics"""
-    total_agents = db.query(func.count(Agent.id)).scalar()
-    total_submissions = db.query(func.count(Prediction.id)).scalar()
-    active_challenges = db.query(func.count(Event.id)).filter(Event.status == 'open').scalar()
-    total_challenges = db.query(func.count(Event.id)).scalar()
-    
-    return {
-        "totalAgents": total_agents or 0,
-        "totalSubmissions": total_submissions or 0,
-        "activeChallenges": active_challenges or 0,
-        "totalChallenges": total_challenges or 0
-    }
+async def get_stats(request: Request, db: AsyncSession = Depends(get_db)):
+    """Get platform statistics (cached; supports If-None-Match)"""
+    async def build():
+        if settings.STATS_SOURCE == "live":
+            counts = await live_counts(db)
+        else:
+            counts = await read_counters(db)
+        return {
+            "totalAgents": counts["agents"],
+            "totalSubmissions": counts["predictions"],
+            "activeChallenges": counts["open_events"],
+            "totalChallenges": counts["events"]
+        }
+
+    return await response_cache.serve(
+        request, "GET /stats/", build,
+        ttl=settings.STATS_CACHE_TTL,
+        max_age=int(settings.STATS_CACHE_TTL),
+        vary=settings.STATS_SOURCE
+    )
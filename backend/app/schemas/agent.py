@@ -34,8 +34,10 @@ class AgentStats(BaseModel):
     wrong_predictions: int
     avg_confidence: float
     calibration_score: float
+    brier_score: Optional[float] = None
     best_streak: int
     category_breakdown: list[dict]
+    calibration: list[dict] = []
     
 class AgentRegisterResponse(BaseModel):
     agent_id: int
@@ -0,0 +1,30 @@
+from pydantic import BaseModel, computed_field
+from typing import Optional, Any
+from datetime import datetime
+
+class JobResponse(BaseModel):
+    id: int
+    kind: str
+    event_id: Optional[int] = None
+    status: str
+    progress_done: int = 0
+    progress_total: Optional[int] = None
+    attempts: int = 0
+    error: Optional[str] = None
+    result: Optional[Any] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+    @computed_field
+    @property
+    def progress(self) -> float:
+        """Completion percentage (0-100)"""
+        if self.status == "succeeded":
+            return 100.0
+        if not self.progress_total:
+            return 0.0
+        return round(self.progress_done / self.progress_total * 100, 2)
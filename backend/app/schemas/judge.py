@@ -0,0 +1,20 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+
+class JudgeScoreResponse(BaseModel):
+    id: int
+    event_id: int
+    prediction_id: Optional[int] = None
+    agent_id: Optional[int] = None
+    round: int
+    score: float
+    review: Optional[str] = None
+    judge_version: str
+    criteria_hash: str
+    content_hash: str
+    context_hash: str
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
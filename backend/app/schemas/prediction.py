@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Optional, List, Dict, Any
 from datetime import datetime
 
 class PredictionCreate(BaseModel):
@@ -8,6 +8,25 @@ class PredictionCreate(BaseModel):
     confidence: int = Field(..., ge=0, le=100)
     reasoning: str = Field(..., min_length=100)
 
+class PredictionBatchCreate(BaseModel):
+    # Items are validated one by one (as PredictionCreate) so one bad item
+    # doesn't reject the whole batch
+    items: List[Dict[str, Any]] = Field(..., min_length=1, max_length=100)
+
+class PredictionBatchResult(BaseModel):
+    index: int
+    event_id: Optional[int] = None
+    status: str  # created, error
+    id: Optional[int] = None
+    created_at: Optional[datetime] = None
+    error: Optional[str] = None
+
+class PredictionBatchResponse(BaseModel):
+    created: int
+    failed: int
+    agent: dict
+    results: List[PredictionBatchResult]
+
 class PredictionReplyCreate(BaseModel):
     content: str = Field(..., min_length=10)
 
@@ -0,0 +1,167 @@
+"""
+Per-agent prediction statistics
+Resolution passes each scored chunk of predictions to apply_prediction_stats
+in the same transaction, so every prediction is counted exactly once. It
+maintains:
+  - category_stats: predictions, correct answers and accuracy per agent and
+    event category
+  - calibration_buckets: per agent and confidence decile, the count, correct
+    count, confidence sum and squared error sum of resolved predictions
+  - agents.avg_confidence / calibration_score, recomputed from the buckets
+    of the agents in the chunk
+
+A prediction made with confidence c claims a c% chance of being right. The
+Brier score is the mean of (c/100 - outcome)^2. The calibration score is
+100 * (1 - reliability). Reliability is the count-weighted mean of
+(mean confidence - hit rate)^2 over the buckets, so 100 is perfectly
+calibrated.
+
+backfill() rebuilds everything from the full history with the same
+set-based statements: python -m app.services.agent_stats
+"""
+import argparse
+import asyncio
+from typing import Dict, List
+from sqlalchemy import case, create_engine, delete, func, literal, select, true, update
+from sqlalchemy.orm import Session, sessionmaker
+from app.core.database import dialect_insert
+from app.models.agent import Agent
+from app.models.event import Event
+from app.models.prediction import Prediction, CategoryStats, CalibrationBucket
+from app.services.response_cache import response_cache
+
+BUCKETS = 10
+
+
+def confidence_bucket(confidence: int) -> int:
+    """Calibration bucket (decile) for a confidence of 0-100"""
+    return min(confidence // (100 // BUCKETS), BUCKETS - 1)
+
+
+def _bucket_expression(confidence):
+    """SQL equivalent of confidence_bucket"""
+    return case((confidence >= 100, BUCKETS - 1), else_=confidence // (100 // BUCKETS))
+
+
+def _outcome():
+    return case((Prediction.was_correct.is_(True), 1), else_=0)
+
+
+def _add_category_stats(db: Session, *where):
+    """Add resolved predictions matching `where` to category_stats (upsert per agent and category)"""
+    rows = (
+        select(
+            Prediction.agent_id,
+            Event.category,
+            func.count().label("total"),
+            func.sum(_outcome()).label("correct"),
+            (func.sum(_outcome()) * literal(100.0) / func.count()).label("accuracy"),
+        )
+        .join(Event, Event.id == Prediction.event_id)
+        .where(Prediction.was_correct.isnot(None), *where)
+        .group_by(Prediction.agent_id, Event.category)
+    )
+    insert = dialect_insert(CategoryStats, db.get_bind().dialect.name).from_select(
+        ["agent_id", "category", "total_predictions", "correct_predictions", "accuracy"], rows
+    )
+    total = CategoryStats.total_predictions + insert.excluded.total_predictions
+    correct = CategoryStats.correct_predictions + insert.excluded.correct_predictions
+    db.execute(insert.on_conflict_do_update(
+        index_elements=["agent_id", "category"],
+        set_={"total_predictions": total, "correct_predictions": correct, "accuracy": correct * literal(100.0) / total}
+    ))
+
+
+def _add_calibration(db: Session, *where):
+    """Add resolved predictions matching `where` to calibration_buckets (upsert per agent and bucket)"""
+    bucket = _bucket_expression(Prediction.confidence)
+    error = Prediction.confidence * literal(0.01) - _outcome()
+    rows = (
+        select(
+            Prediction.agent_id,
+            bucket.label("bucket"),
+            func.count().label("predictions"),
+            func.sum(_outcome()).label("correct"),
+            func.sum(Prediction.confidence).label("confidence_sum"),
+            func.sum(error * error).label("squared_error_sum"),
+        )
+        .where(Prediction.was_correct.isnot(None), *where)
+        .group_by(Prediction.agent_id, bucket)
+    )
+    insert = dialect_insert(CalibrationBucket, db.get_bind().dialect.name).from_select(
+        ["agent_id", "bucket", "predictions", "correct_predictions", "confidence_sum", "squared_error_sum"], rows
+    )
+    db.execute(insert.on_conflict_do_update(
+        index_elements=["agent_id", "bucket"],
+        set_={
+            column: getattr(CalibrationBucket, column) + getattr(insert.excluded, column)
+            for column in ("predictions", "correct_predictions", "confidence_sum", "squared_error_sum")
+        }
+    ))
+
+
+def _refresh_agents(db: Session, agents):
+    """Recompute avg_confidence and calibration_score from the buckets of the agents matching `agents`"""
+    buckets = CalibrationBucket
+    gap = buckets.confidence_sum * literal(0.01) - buckets.correct_predictions  # n * (mean confidence - hit rate)
+    per_agent = select().where(buckets.agent_id == Agent.id)
+    avg_confidence = per_agent.add_columns(
+        func.sum(buckets.confidence_sum) * literal(1.0) / func.sum(buckets.predictions)
+    ).scalar_subquery()
+    reliability = per_agent.add_columns(
+        func.sum(gap * gap / buckets.predictions) / func.sum(buckets.predictions)
+    ).scalar_subquery()
+    db.execute(
+        update(Agent)
+        .where(agents)
+        .values(
+            avg_confidence=func.coalesce(avg_confidence, 0),
+            calibration_score=func.coalesce(100 * (1 - reliability), 0)
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def apply_prediction_stats(db: Session, prediction_ids: List[int]):
+    """Add newly scored predictions to their agents' stats (no commit)"""
+    if not prediction_ids:
+        return
+    scored = Prediction.id.in_(prediction_ids)
+    _add_category_stats(db, scored)
+    _add_calibration(db, scored)
+    _refresh_agents(db, Agent.id.in_(select(Prediction.agent_id).where(scored)))
+
+
+def backfill(db: Session) -> Dict[str, int]:
+    """Rebuild every agent's category and calibration stats from all resolved predictions (commits)"""
+    db.execute(delete(CategoryStats))
+    db.execute(delete(CalibrationBucket))
+    _add_category_stats(db)
+    _add_calibration(db)
+    _refresh_agents(db, true())
+    db.commit()
+    return {
+        "predictions": db.scalar(select(func.count()).where(Prediction.was_correct.isnot(None))) or 0,
+        "category_stats": db.scalar(select(func.count(CategoryStats.id))) or 0,
+        "calibration_buckets": db.scalar(select(func.count(CalibrationBucket.id))) or 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild per-agent category and calibration stats from all resolved predictions")
+    parser.add_argument("--database-url", default=None, help="defaults to the app's DATABASE_URL")
+    args = parser.parse_args()
+
+    if args.database_url:
+        engine = create_engine(args.database_url)
+    else:
+        from app.core.database import engine
+    with sessionmaker(bind=engine)() as db:
+        result = backfill(db)
+    asyncio.run(response_cache.invalidate("agents"))  # reaches other workers with a shared cache
+    print(f"rebuilt from {result['predictions']} resolved predictions: "
+          f"{result['category_stats']} category stats, {result['calibration_buckets']} calibration buckets")
+
+
+if __name__ == "__main__":
+    main()
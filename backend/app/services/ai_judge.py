@@ -1,181 +1,337 @@
 """
 AI Judge service for ClawHub
-Analyzes submissions and selects winner with public reasoning
+Analyzes submissions and selects winner with public reasoning.
+
+stream_judging() is the pipeline: submissions are split into batches of
+JUDGE_BATCH_SIZE, reviewed by up to JUDGE_CONCURRENCY concurrent model
+calls, and the batch winners go through tournament rounds until a single
+batch decides the winner. It is an async generator of JudgeEvents that
+forwards model output as it is produced. The SSE endpoint streams it
+as-is; judge_challenge() (the judge_event job) consumes it and keeps the
+transcript plus the winner.
 """
-import os
-from typing import List, Dict, Any
-from sqlalchemy.orm import Session
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.event import Event
 from app.models.prediction import Prediction
 from app.models.agent import Agent
+from app.core.config import settings
+from app.services.judge_client import (
+    Challenge, Submission, JudgeClient, RULE, get_judge_client, parse_sections, parse_score, SCORE_PATTERN
+)
+from app.services.judge_cache import (
+    CacheKey, CachedScore, ScoreRecord, criteria_hash, content_hash, context_hash, load_cached_scores, save_scores
+)
 
-# Will use OpenAI/Anthropic API
-JUDGE_PROMPT = """You are an expert judge for ClawHub - a platform where AI agents compete by solving challenges.
-
-Your role: Analyze submissions fairly and select the winner based on the challenge criteria.
-
-Challenge Details:
-Title: {title}
-Description: {description}
-Criteria: {criteria}
-Category: {category}
-
-Submissions to evaluate:
-{submissions}
+logger = logging.getLogger(__name__)
 
-Instructions:
-1. Analyze each submission individually
-2. For each one, provide:
-   - Quick assessment (1-2 sentences)
-   - Strengths and weaknesses
-   - Score out of 10
-3. After analyzing all, declare the winner with clear reasoning
-4. Be fair, objective, and explain your thinking
 
-Format your response as streaming thoughts, like you're thinking out loud.
-Use emojis for readability (✓ ⚠ 💡 🏆 etc).
+@dataclass
+class JudgeEvent:
+    """One step of a judging run; `text` is this step's part of the transcript"""
+    type: str  # start, round, batch, delta, score, decision, done
+    text: str = ""
+    data: Dict[str, Any] = field(default_factory=dict)
+    record: Optional[ScoreRecord] = None  # on "score" steps the model just produced
 
-Begin your analysis:"""
 
-
-async def judge_challenge(event_id: int, db: Session) -> Dict[str, Any]:
-    """
-    Run AI judge on a challenge
-    Returns: streaming analysis + final winner
-    """
-    
-    # Get event
-    event = db.query(Event).filter(Event.id == event_id).first()
+async def load_judging(event_id: int, db: AsyncSession) -> Tuple[Challenge, List[Submission]]:
+    """Everything the judge needs, read up front (the stream itself never touches the DB)"""
+    event = await db.get(Event, event_id)
     if not event:
         raise ValueError("Event not found")
-    
-    # Get all submissions
-    submissions = db.query(Prediction).filter(
-        Prediction.event_id == event_id
-    ).all()
-    
-    if len(submissions) == 0:
+
+    # Submissions with their authors in one query
+    rows = (await db.execute(
+        select(Prediction.id, Prediction.agent_id, Prediction.created_at, Prediction.reasoning, Agent.username, Agent.reputation)
+        .outerjoin(Agent, Agent.id == Prediction.agent_id)
+        .where(Prediction.event_id == event_id)
+        .order_by(Prediction.id)
+    )).all()
+
+    if len(rows) == 0:
         raise ValueError("No submissions to judge")
-    
-    # Format submissions for judge
-    submissions_text = ""
-    for i, sub in enumerate(submissions, 1):
-        agent = db.query(Agent).filter(Agent.id == sub.agent_id).first()
-        agent_name = agent.username if agent else f"Agent{sub.agent_id}"
-        
-        submissions_text += f"""
-Submission #{i} - {agent_name}
-Agent Reputation: {agent.reputation if agent else 0} REP
-Submitted: {sub.created_at}
-
-Solution:
-{sub.reasoning[:1000]}...
-
----
-"""
-    
-    # Build prompt
-    prompt = JUDGE_PROMPT.format(
+
+    challenge = Challenge(
+        event_id=event.id,
         title=event.title,
-        description=event.description[:500],
+        description=event.description,
         criteria=event.resolution_criteria,
         category=event.category,
-        submissions=submissions_text
+        rep_reward=event.rep_reward or 100
     )
-    
-    # Call AI (placeholder - will implement with real API)
-    # For now, return mock analysis
-    analysis = f"""🔍 Starting analysis of {len(submissions)} submissions for: {event.title}
+    submissions = [
+        Submission(
+            index=i,
+            agent_id=row.agent_id,
+            agent_name=row.username or f"Agent{row.agent_id}",
+            reputation=row.reputation or 0,
+            created_at=row.created_at,
+            solution=row.reasoning,
+            prediction_id=row.id
+        )
+        for i, row in enumerate(rows, 1)
+    ]
+    return challenge, submissions
+
+
+class _BatchDone:
+    """Queue marker: one batch finished (error set if it failed)"""
+
+    def __init__(self, error: Optional[BaseException] = None):
+        self.error = error
+
+
+def _batches(submissions: List[Submission], size: int) -> List[List[Submission]]:
+    return [submissions[i:i + size] for i in range(0, len(submissions), size)]
+
+
+def _ranked(batch: List[Submission], scores: Dict[int, float]) -> List[Submission]:
+    """Highest score first, earliest submission on ties"""
+    return sorted(batch, key=lambda sub: (-scores.get(sub.index, 0.0), sub.index))
+
+
+async def _run_round(
+    client: JudgeClient,
+    challenge: Challenge,
+    batches: List[List[Submission]],
+    round_no: int,
+    final: bool,
+    concurrency: int,
+    cache: Dict[CacheKey, CachedScore]
+) -> AsyncIterator[JudgeEvent]:
+    """
+    Review every batch of a round, at most `concurrency` at a time, yielding
+    output as it arrives. Cached submissions are replayed, not sent to the model.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_batch(batch_no: int, batch: List[Submission]):
+        try:
+            async with semaphore:
+                where = {"round": round_no, "batch": batch_no}
+                header = ""
+                if len(batches) > 1:
+                    header = f"\n📦 Batch {batch_no}/{len(batches)}: submissions #{batch[0].index}-#{batch[-1].index}\n"
+                context = context_hash(batch) if round_no > 1 else ""
+                keys = {sub.index: (content_hash(sub), context) for sub in batch}
+                hits = {sub.index: cache[keys[sub.index]] for sub in batch if keys[sub.index] in cache}
+                await queue.put(JudgeEvent("batch", header, {
+                    **where, "submissions": [sub.index for sub in batch], "cached": len(hits)
+                }))
+
+                scores = {index: hit.score for index, hit in hits.items()}
+                for index, hit in hits.items():
+                    await queue.put(JudgeEvent("delta", hit.review, {**where, "cached": True}))
+
+                records = {}
+                to_review = [sub for sub in batch if sub.index not in hits]
+                if to_review:
+                    review = []
+                    async for chunk in client.review(challenge, to_review, final=final):
+                        review.append(chunk)
+                        await queue.put(JudgeEvent("delta", chunk, where))
+
+                    sections = parse_sections("".join(review))
+                    for sub in to_review:
+                        section = sections.get(sub.index, "")
+                        scores[sub.index] = parse_score(section)
+                        if SCORE_PATTERN.search(section):  # don't cache a missing score
+                            records[sub.index] = ScoreRecord(
+                                prediction_id=sub.prediction_id,
+                                agent_id=sub.agent_id,
+                                content_hash=keys[sub.index][0],
+                                context_hash=context,
+                                round=round_no,
+                                score=scores[sub.index],
+                                review=section
+                            )
 
-📋 Challenge Category: {event.category}
-⚖️ Judging based on: {event.resolution_criteria[:100]}...
+                for sub in batch:
+                    await queue.put(JudgeEvent("score", "", {
+                        **where, "index": sub.index, "agent_id": sub.agent_id,
+                        "score": scores[sub.index], "cached": sub.index in hits
+                    }, record=records.get(sub.index)))
+            await queue.put(_BatchDone())
+        except Exception as e:
+            await queue.put(_BatchDone(e))
+
+    tasks = [asyncio.create_task(run_batch(n, batch)) for n, batch in enumerate(batches, 1)]
+    try:
+        pending = len(tasks)
+        while pending:
+            item = await queue.get()
+            if isinstance(item, _BatchDone):
+                pending -= 1
+                if item.error is not None:
+                    raise item.error
+                continue
+            yield item
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def stream_judging(
+    challenge: Challenge,
+    submissions: List[Submission],
+    client: Optional[JudgeClient] = None,
+    batch_size: Optional[int] = None,
+    concurrency: Optional[int] = None,
+    finalists_per_batch: Optional[int] = None,
+    cache: Optional[Dict[CacheKey, CachedScore]] = None
+) -> AsyncIterator[JudgeEvent]:
+    """
+    Review submissions in batches (concurrently, bounded), then run
+    tournament rounds over the batch winners until one batch remains.
+    Yields model output as it arrives, then the decision. Scores found in
+    `cache` (see load_cached_scores) are reused instead of re-scored.
+    """
+    client = client or get_judge_client()
+    batch_size = max(2, batch_size or settings.JUDGE_BATCH_SIZE)
+    concurrency = max(1, concurrency or settings.JUDGE_CONCURRENCY)
+    # Fewer finalists than batch size, so every round shrinks the field
+    finalists_per_batch = min(max(1, finalists_per_batch or settings.JUDGE_FINALISTS_PER_BATCH), batch_size - 1)
+    started = time.perf_counter()
+    first_token_at = None
+
+    yield JudgeEvent("start", f"""🔍 Starting analysis of {len(submissions)} submissions for: {challenge.title}
+
+📋 Challenge Category: {challenge.category}
+⚖️ Judging based on: {challenge.criteria[:100]}...
 
 Let me review each submission carefully...
 
-"""
-    
-    # Analyze each submission
-    for i, sub in enumerate(submissions, 1):
-        agent = db.query(Agent).filter(Agent.id == sub.agent_id).first()
-        agent_name = agent.username if agent else f"Agent{sub.agent_id}"
-        
-        analysis += f"""
-━━━━━━━━━━━━━━━━━━━━━━━━━━
-Submission #{i}: @{agent_name}
-━━━━━━━━━━━━━━━━━━━━━━━━━━
-
-Reviewing solution...
-"""
-        
-        # Mock scoring (replace with actual AI analysis)
-        score = 7 + (i % 3)  # Mock: varies by submission
-        
-        if score >= 9:
-            analysis += f"✓ Excellent approach\n"
-            analysis += f"✓ Meets all requirements\n"
-            analysis += f"💡 Shows creativity\n"
-        elif score >= 7:
-            analysis += f"✓ Solid solution\n"
-            analysis += f"⚠ Could be optimized\n"
-        else:
-            analysis += f"✓ Working solution\n"
-            analysis += f"⚠ Basic approach\n"
-        
-        analysis += f"\nScore: {score}/10\n"
-    
-    # Select winner (highest score)
-    best_idx = 0
-    best_score = 7
-    
-    for i in range(len(submissions)):
-        score = 7 + (i % 3)
-        if score > best_score:
-            best_score = score
-            best_idx = i
-    
-    winner = submissions[best_idx]
-    winner_agent = db.query(Agent).filter(Agent.id == winner.agent_id).first()
-    winner_name = winner_agent.username if winner_agent else f"Agent{winner.agent_id}"
-    
-    analysis += f"""
-
-━━━━━━━━━━━━━━━━━━━━━━━━━━
+""", {"round": 0, "event_id": challenge.event_id, "submissions": len(submissions), "judge": client.name})
+
+    contenders = submissions
+    round_no = 0
+    model_calls = 0
+    cached_scores = 0
+    while True:
+        round_no += 1
+        batches = _batches(contenders, batch_size)
+        final = round_no > 1 and len(batches) == 1
+        if round_no > 1:
+            title = "🏁 FINAL ROUND" if final else f"🏁 ROUND {round_no}"
+            yield JudgeEvent("round", f"\n\n{RULE}\n{title}: {len(contenders)} batch winners\n{RULE}\n", {
+                "round": round_no, "batch": 0, "submissions": [sub.index for sub in contenders]
+            })
+
+        scores: Dict[int, float] = {}
+        async for step in _run_round(client, challenge, batches, round_no, final, concurrency, cache or {}):
+            if step.type == "delta" and first_token_at is None:
+                first_token_at = time.perf_counter()
+            if step.type == "batch" and step.data["cached"] < len(step.data["submissions"]):
+                model_calls += 1
+            if step.type == "score":
+                scores[step.data["index"]] = step.data["score"]
+                cached_scores += step.data["cached"]
+            yield step
+
+        if len(batches) == 1:
+            break
+        contenders = [sub for batch in batches for sub in _ranked(batch, scores)[:finalists_per_batch]]
+
+    winner = _ranked(contenders, scores)[0]
+
+    yield JudgeEvent("decision", f"""
+
+{RULE}
 🏆 FINAL DECISION
-━━━━━━━━━━━━━━━━━━━━━━━━━━
+{RULE}
 
 After careful analysis, the winner is:
 
-🏆 @{winner_name}
+🏆 @{winner.agent_name}
 
 Reasoning:
 ✓ Best execution of the challenge
 ✓ Meets all criteria effectively
 ✓ Demonstrates strong problem-solving
 
-Runner-ups showed good effort, but this submission 
+Runner-ups showed good effort, but this submission
 stands out for [specific reasons].
 
-REP awarded: {event.rep_reward or 100} → @{winner_name}
+REP awarded: {challenge.rep_reward} → @{winner.agent_name}
 
 Judging complete. ✅
-"""
-    
-    return {
-        "analysis": analysis,
+""", {
+        "round": round_no + 1,
         "winner_id": winner.agent_id,
-        "winner_name": winner_name,
-        "winner_reputation_gain": event.rep_reward or 100
+        "winner_name": winner.agent_name,
+        "winner_score": scores.get(winner.index, 0.0),
+        "winner_reputation_gain": challenge.rep_reward
+    })
+
+    elapsed = time.perf_counter() - started
+    ttft = (first_token_at - started) if first_token_at is not None else None
+    logger.info(
+        "judged event %s: %d submissions, %d rounds, %d model calls, %d cached scores, first model output after %s ms, %.1f ms total",
+        challenge.event_id, len(submissions), round_no, model_calls, cached_scores,
+        round(ttft * 1000, 1) if ttft is not None else "-", elapsed * 1000
+    )
+    yield JudgeEvent("done", "", {
+        "round": round_no + 1,
+        "rounds": round_no,
+        "model_calls": model_calls,
+        "cached_scores": cached_scores,
+        "first_token_ms": round(ttft * 1000, 3) if ttft is not None else None,
+        "elapsed_ms": round(elapsed * 1000, 3)
+    })
+
+
+async def judge_challenge(event_id: int, db: AsyncSession, client: Optional[JudgeClient] = None) -> Dict[str, Any]:
+    """
+    Run AI judge on a challenge, reusing and persisting per-submission scores
+    New scores are written in the caller's transaction (no commit), so the
+    judge_event job stores them together with the award, or not at all.
+    Returns: full analysis transcript + final winner
+    """
+    client = client or get_judge_client()
+    challenge, submissions = await load_judging(event_id, db)
+    criteria = criteria_hash(challenge)
+    cache = await load_cached_scores(db, criteria, client.version, submissions)
+
+    # Batches run concurrently and interleave; the transcript is kept in
+    # (round, batch) order
+    sections: Dict[Tuple[int, int], List[str]] = {}
+    decision = {}
+    unsaved: List[ScoreRecord] = []
+    saved_keys = set(cache)
+    async for step in stream_judging(challenge, submissions, client, cache=cache):
+        sections.setdefault((step.data["round"], step.data.get("batch", 0)), []).append(step.text)
+        if step.type == "decision":
+            decision = step.data
+        if step.record is not None:
+            key = (step.record.content_hash, step.record.context_hash)
+            if key not in saved_keys:  # identical solutions share one entry
+                saved_keys.add(key)
+                unsaved.append(step.record)
+    await save_scores(db, event_id, criteria, client.version, unsaved)
+
+    return {
+        "analysis": "".join("".join(sections[key]) for key in sorted(sections)),
+        "winner_id": decision["winner_id"],
+        "winner_name": decision["winner_name"],
+        "winner_reputation_gain": decision["winner_reputation_gain"]
     }
 
 
-async def judge_challenge_stream(event_id: int, db: Session):
+async def judge_challenge_stream(event_id: int, db: AsyncSession, client: Optional[JudgeClient] = None):
     """
-    Generator that yields judging analysis line by line
-    For streaming to frontend
+    Generator that yields judging analysis text as it is produced
+    For streaming to frontend (reads cached scores, does not store new ones)
     """
-    result = await judge_challenge(event_id, db)
-    
-    # Stream analysis line by line
-    for line in result["analysis"].split("\n"):
-        yield line + "\n"
-        # In production, add small delays for dramatic effect
+    client = client or get_judge_client()
+    challenge, submissions = await load_judging(event_id, db)
+    cache = await load_cached_scores(db, criteria_hash(challenge), client.version, submissions)
+    async for step in stream_judging(challenge, submissions, client, cache=cache):
+        if step.text:
+            yield step.text
@@ -0,0 +1,68 @@
+"""
+API-key authentication cache
+Maps api_key -> agent identity so authenticated routes that only need the
+agent id skip the `agents` lookup. Keys are stored as SHA-256 digests, never
+in plain text. Entries live in a local LRU/TTL cache and, when
+SHARED_CACHE_URL is set, in a shared cache visible to every worker.
+"""
+import hashlib
+from dataclasses import dataclass, asdict
+from typing import Optional
+from app.core.cache import TTLCache, SharedCache, shared_cache_from_url
+from app.core.config import settings
+
+
+@dataclass(frozen=True)
+class AgentIdentity:
+    id: int
+    username: str
+    verified: bool = False
+
+
+class ApiKeyCache:
+    def __init__(self, max_entries: int, ttl: float, shared: Optional[SharedCache] = None, enabled: bool = True):
+        self.local = TTLCache(max_entries=max_entries, ttl=ttl)
+        self.shared = shared
+        self.ttl = ttl
+        self.enabled = enabled
+
+    @staticmethod
+    def _key(api_key: str) -> str:
+        return "auth:" + hashlib.sha256(api_key.encode()).hexdigest()
+
+    async def get(self, api_key: str) -> Optional[AgentIdentity]:
+        if not self.enabled:
+            return None
+        key = self._key(api_key)
+        identity = self.local.get(key)
+        if identity is None and self.shared is not None:
+            data = await self.shared.get(key)
+            if data is not None:
+                identity = AgentIdentity(**data)
+                self.local.set(key, identity)
+        return identity
+
+    async def set(self, api_key: str, identity: AgentIdentity):
+        if not self.enabled:
+            return
+        key = self._key(api_key)
+        self.local.set(key, identity)
+        if self.shared is not None:
+            await self.shared.set(key, asdict(identity), self.ttl)
+
+    async def invalidate(self, api_key: Optional[str]):
+        """Drop a key after a write that changes the agent it maps to"""
+        if not api_key:
+            return
+        key = self._key(api_key)
+        self.local.delete(key)
+        if self.shared is not None:
+            await self.shared.delete(key)
+
+
+api_key_cache = ApiKeyCache(
+    max_entries=settings.AUTH_CACHE_MAX_ENTRIES,
+    ttl=settings.AUTH_CACHE_TTL,
+    shared=shared_cache_from_url(settings.SHARED_CACHE_URL),
+    enabled=settings.AUTH_CACHE_ENABLED
+)
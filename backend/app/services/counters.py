@@ -0,0 +1,96 @@
+"""
+Incrementally maintained platform counters
+Write paths add a counter_update() statement to their own transaction, so
+the totals commit (or roll back) together with the rows they count. Each
+counter is spread over SHARDS rows and writers pick one at random, so
+concurrent transactions rarely wait on the same row lock; reads sum the
+shards in one query.
+"""
+import random
+from typing import Dict, Optional
+from sqlalchemy import select, func, update, delete, case
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.agent import Agent
+from app.models.event import Event
+from app.models.prediction import Prediction
+from app.models.stats import PlatformCounter
+
+COUNTERS = ("agents", "predictions", "events", "open_events")
+SHARDS = 8
+
+
+def counter_update(**deltas: int):
+    """UPDATE adding `deltas` to the named counters (one random shard); execute it in the writing transaction"""
+    deltas = {name: delta for name, delta in deltas.items() if delta}
+    unknown = set(deltas) - set(COUNTERS)
+    if unknown:
+        raise ValueError(f"Unknown counters: {sorted(unknown)}")
+    if not deltas:
+        return None
+    shard = random.randrange(SHARDS)
+    return (
+        update(PlatformCounter)
+        .where(PlatformCounter.name.in_(list(deltas)), PlatformCounter.shard == shard)
+        .values(value=PlatformCounter.value + case(deltas, value=PlatformCounter.name, else_=0))
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def add_to_counters(db: AsyncSession, **deltas: int):
+    """Apply counter deltas inside the caller's transaction (no commit)"""
+    statement = counter_update(**deltas)
+    if statement is not None:
+        await db.execute(statement)
+
+
+def status_change(old_status: Optional[str], new_status: str) -> Dict[str, int]:
+    """Counter deltas for an event moving between statuses"""
+    return {"open_events": (new_status == "open") - (old_status == "open")}
+
+
+def live_counts_query():
+    """All four totals counted from the source tables in a single round trip"""
+    return select(
+        select(func.count(Agent.id)).scalar_subquery().label("agents"),
+        select(func.count(Prediction.id)).scalar_subquery().label("predictions"),
+        select(func.count(Event.id)).scalar_subquery().label("events"),
+        select(func.count(Event.id)).where(Event.status == "open").scalar_subquery().label("open_events"),
+    )
+
+
+async def live_counts(db: AsyncSession) -> Dict[str, int]:
+    row = (await db.execute(live_counts_query())).mappings().one()
+    return {name: row[name] or 0 for name in COUNTERS}
+
+
+async def read_counters(db: AsyncSession) -> Dict[str, int]:
+    """Current totals from the counters table (one query); seeds it on first use"""
+    rows = await db.execute(
+        select(PlatformCounter.name, func.sum(PlatformCounter.value), func.count())
+        .group_by(PlatformCounter.name)
+    )
+    totals = {}
+    for name, value, shards in rows:
+        if shards == SHARDS:
+            totals[name] = int(value or 0)
+    if set(COUNTERS) - set(totals):
+        try:
+            return await recount(db)
+        except IntegrityError:
+            # Another worker seeded the table concurrently
+            await db.rollback()
+            return await live_counts(db)
+    return totals
+
+
+async def recount(db: AsyncSession) -> Dict[str, int]:
+    """Rebuild the counters from COUNT(*) over the source tables (seeding / drift repair)"""
+    counts = await live_counts(db)
+    await db.execute(delete(PlatformCounter))
+    db.add_all(
+        PlatformCounter(name=name, shard=shard, value=counts[name] if shard == 0 else 0)
+        for name in COUNTERS for shard in range(SHARDS)
+    )
+    await db.commit()
+    return counts
@@ -0,0 +1,390 @@
+"""
+Durable background jobs for ClawHub
+Resolution and judging are enqueued as rows in the `jobs` table and executed
+by an in-process worker, so admin endpoints return immediately.
+
+Idempotency: a job's side effects are committed either together with its
+completion (select_winner, judge_event) or per chunk with data-level guards
+(resolve_event only scores predictions that are still unscored), and the
+winner award is a conditional UPDATE that pays out at most once per event,
+so a retried job never awards REP twice.
+
+Leases: while a handler runs, a heartbeat extends the job's lease every
+JOB_LEASE_SECONDS / 3. Completion, failure and progress writes only apply
+while this worker still holds the job, so a worker whose lease expired (and
+whose job another worker claimed) cannot overwrite the new owner's outcome.
+"""
+import asyncio
+import logging
+import os
+import socket
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional
+from sqlalchemy import func, select, update, or_, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.agent import Agent
+from app.models.event import Event
+from app.models.job import Job
+from app.models.prediction import Prediction
+from app.services.ai_judge import judge_challenge
+from app.services.leaderboard import leaderboard
+from app.services.counters import add_to_counters, status_change
+from app.services.response_cache import response_cache
+from app.services.odds_feed import publish_event_odds
+from app.services.reputation import apply_resolution, pending_predictions_count
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ("queued", "running")
+
+JobHandler = Callable[[Job, AsyncSession], Awaitable[Optional[Dict[str, Any]]]]
+HANDLERS: Dict[str, JobHandler] = {}
+
+
+class JobConflict(Exception):
+    """Another kind of job is already active for the event"""
+
+
+class LeaseLost(Exception):
+    """The job's lease expired and another worker claimed it"""
+
+
+def job_handler(kind: str):
+    """Register an async handler for a job kind"""
+    def register(fn: JobHandler) -> JobHandler:
+        HANDLERS[kind] = fn
+        return fn
+    return register
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _lease() -> datetime:
+    return _now() + timedelta(seconds=settings.JOB_LEASE_SECONDS)
+
+
+async def enqueue_job(db: AsyncSession, kind: str, event_id: Optional[int] = None, payload: Optional[dict] = None) -> Job:
+    """
+    Create a queued job and commit it.
+    An active job of the same kind for the same event is returned instead of
+    creating a duplicate; an active job of a different kind raises JobConflict.
+    """
+    if kind not in HANDLERS:
+        raise ValueError(f"Unknown job kind: {kind}")
+
+    if event_id is not None:
+        active = await db.scalar(
+            select(Job)
+            .where(Job.event_id == event_id, Job.status.in_(ACTIVE_STATUSES))
+            .order_by(Job.id)
+            .limit(1)
+        )
+        if active:
+            if active.kind != kind:
+                raise JobConflict(f"Event already has an active {active.kind} job (#{active.id})")
+            return active
+
+    job = Job(kind=kind, event_id=event_id, payload=payload or {}, status="queued")
+    db.add(job)
+    await db.commit()
+    await db.refresh(job)
+    return job
+
+
+def _claimable():
+    return or_(
+        Job.status == "queued",
+        and_(Job.status == "running", Job.locked_until < _now())
+    )
+
+
+async def claim_next_job(db: AsyncSession, worker_id: str) -> Optional[Job]:
+    """
+    Claim the oldest runnable job (queued, or running with an expired lease).
+    The claim is a conditional UPDATE, so concurrent workers on any backend
+    cannot both win the same job.
+    """
+    while True:
+        job_id = await db.scalar(
+            select(Job.id).where(_claimable()).order_by(Job.id).limit(1)
+        )
+        if job_id is None:
+            return None
+
+        claimed = (await db.execute(
+            update(Job)
+            .where(Job.id == job_id, _claimable())
+            .values(
+                status="running",
+                locked_by=worker_id,
+                locked_until=_lease(),
+                attempts=Job.attempts + 1
+            )
+            .execution_options(synchronize_session=False)
+        )).rowcount
+        await db.commit()
+        if claimed:
+            return await db.get(Job, job_id, populate_existing=True)
+
+
+def _owned(job_id: int, worker_id: str):
+    return and_(Job.id == job_id, Job.locked_by == worker_id, Job.status == "running")
+
+
+async def _update_owned(db: AsyncSession, job_id: int, worker_id: str, **values) -> bool:
+    """UPDATE the job only while `worker_id` holds it (no commit); False if it no longer does"""
+    return bool((await db.execute(
+        update(Job)
+        .where(_owned(job_id, worker_id))
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )).rowcount)
+
+
+async def renew_lease(db: AsyncSession, job_id: int, worker_id: str, **values):
+    """Extend the lease (and set `values`, e.g. progress) in the current transaction; raises LeaseLost"""
+    if not await _update_owned(db, job_id, worker_id, locked_until=_lease(), **values):
+        raise LeaseLost(f"Job {job_id} is no longer held by {worker_id}")
+
+
+async def _heartbeat(session_factory, job_id: int, worker_id: str):
+    """Keep extending the lease while the handler runs (its own session, so it commits independently)"""
+    while True:
+        await asyncio.sleep(settings.JOB_LEASE_SECONDS / 3)
+        try:
+            async with session_factory() as db:
+                await renew_lease(db, job_id, worker_id)
+                await db.commit()
+        except LeaseLost:
+            return
+        except Exception:
+            logger.exception("Could not renew the lease of job %s", job_id)
+
+
+async def run_job(job: Job, db: AsyncSession, session_factory=AsyncSessionLocal):
+    """Run a claimed job to completion, recording success or failure"""
+    job_id, kind, event_id = job.id, job.kind, job.event_id
+    worker_id, attempts = job.locked_by, job.attempts
+    handler = HANDLERS.get(kind)
+    heartbeat = asyncio.create_task(_heartbeat(session_factory, job_id, worker_id))
+    try:
+        if handler is None:
+            raise ValueError(f"Unknown job kind: {job.kind}")
+        if attempts > settings.JOB_MAX_ATTEMPTS:
+            raise RuntimeError(f"Gave up after {attempts - 1} attempts")
+        if job.started_at is None:
+            job.started_at = _now()
+            await db.commit()
+
+        result = await handler(job, db)
+
+        # Completion is committed together with the handler's final writes,
+        # and only if this worker still holds the job
+        if not await _update_owned(
+            db, job_id, worker_id,
+            status="succeeded", result=result, error=None, locked_by=None, locked_until=None, finished_at=_now()
+        ):
+            raise LeaseLost(f"Job {job_id} is no longer held by {worker_id}")
+        await db.commit()
+    except LeaseLost:
+        await db.rollback()
+        logger.warning("Job %s (%s) was claimed by another worker after its lease expired; discarding this run", job_id, kind)
+    except Exception as e:
+        await db.rollback()
+        logger.exception("Job %s (%s) failed", job_id, kind)
+        gave_up = attempts >= settings.JOB_MAX_ATTEMPTS or handler is None
+        await _update_owned(
+            db, job_id, worker_id,
+            status="failed" if gave_up else "queued", error=str(e), locked_by=None, locked_until=None,
+            **({"finished_at": _now()} if gave_up else {})
+        )
+        await db.commit()
+    else:
+        # Committed: refresh what every job kind changes (its event, agents' REP).
+        # Outside the try, so a failure here can't requeue a finished job
+        if event_id:
+            await response_cache.invalidate("agents", "event-list", f"event:{event_id}")
+            await publish_event_odds(db, event_id)
+    finally:
+        heartbeat.cancel()
+        try:
+            await heartbeat
+        except asyncio.CancelledError:
+            pass
+
+
+# ============================================
+# Handlers
+# ============================================
+
+async def _get_event(db: AsyncSession, event_id: int) -> Event:
+    event = await db.get(Event, event_id)
+    if not event:
+        raise ValueError("Event not found")
+    return event
+
+
+@job_handler("resolve_event")
+async def _resolve_event(job: Job, db: AsyncSession) -> Dict[str, Any]:
+    """Score predictions chunk by chunk, committing progress with each chunk"""
+    result, worker_id = job.payload["result"], job.locked_by
+    event = await _get_event(db, job.event_id)
+
+    if job.progress_total is None:
+        job.progress_total = await db.run_sync(pending_predictions_count, event.id)
+        await db.commit()
+
+    while True:
+        scored = await db.run_sync(apply_resolution, event.id, result, settings.JOB_CHUNK_SIZE)
+        if not scored:
+            break
+        job.progress_done += scored
+        # Each chunk commits only while this worker holds the job
+        await renew_lease(db, job.id, worker_id)
+        await db.commit()
+        leaderboard.notify_changed()
+        await response_cache.invalidate("agents")
+        await asyncio.sleep(0)  # let the request handlers run between chunks
+
+    await add_to_counters(db, **status_change(event.status, "resolved"))
+    event.status = "resolved"
+    event.result = result
+    return {"event_id": event.id, "result": result, "resolved_predictions": job.progress_done}
+
+
+async def _award_winner(db: AsyncSession, event: Event, winner_agent_id: int, rep: int, count_as_correct: bool = False) -> bool:
+    """
+    Close the event as RESOLVED and award REP to the winner (no commit).
+    The close is a conditional UPDATE, so the award happens at most once
+    per event however often the job runs; False if it already happened.
+    """
+    previous_status = event.status
+    closed = (await db.execute(
+        update(Event)
+        .where(
+            Event.id == event.id,
+            Event.status == previous_status,
+            ~and_(Event.status == "closed", func.coalesce(Event.result, "") == "RESOLVED")
+        )
+        .values(status="closed", result="RESOLVED")
+        .returning(Event.id)
+        .execution_options(synchronize_session=False)
+    )).first()
+    if closed is None:
+        await db.refresh(event)
+        if event.status == "closed" and event.result == "RESOLVED":
+            return False
+        raise RuntimeError(f"Event {event.id} changed status while awarding the winner")
+
+    values = {"reputation": func.coalesce(Agent.reputation, 0) + rep}
+    if count_as_correct:
+        values["correct_predictions"] = func.coalesce(Agent.correct_predictions, 0) + 1
+    await db.execute(
+        update(Agent).where(Agent.id == winner_agent_id).values(**values).execution_options(synchronize_session=False)
+    )
+    leaderboard.notify_changed(winner_agent_id)
+    await add_to_counters(db, **status_change(previous_status, "closed"))
+    return True
+
+
+@job_handler("select_winner")
+async def _select_winner(job: Job, db: AsyncSession) -> Dict[str, Any]:
+    event = await _get_event(db, job.event_id)
+    winner_agent_id = job.payload["winner_agent_id"]
+    rep = event.rep_reward or 100
+
+    awarded = await _award_winner(db, event, winner_agent_id, rep, count_as_correct=True)
+    job.progress_total = job.progress_done = 1
+    return {"event_id": event.id, "winner_agent_id": winner_agent_id, "rep_awarded": rep if awarded else 0}
+
+
+@job_handler("judge_event")
+async def _judge_event(job: Job, db: AsyncSession) -> Dict[str, Any]:
+    event = await _get_event(db, job.event_id)
+    result = await judge_challenge(event.id, db)
+
+    awarded = await _award_winner(db, event, result["winner_id"], result["winner_reputation_gain"])
+    job.progress_total = job.progress_done = 1
+
+    # Get winner's solution
+    winner_prediction = await db.scalar(
+        select(Prediction).where(Prediction.event_id == event.id, Prediction.agent_id == result["winner_id"])
+    )
+    winner_solution = ""
+    if winner_prediction:
+        winner_solution = winner_prediction.reasoning[:500] + "..." if len(winner_prediction.reasoning) > 500 else winner_prediction.reasoning
+
+    return {
+        "status": "judging_complete",
+        "analysis": result["analysis"],
+        "winner": result["winner_name"],
+        "winner_solution": winner_solution,
+        "rep_awarded": result["winner_reputation_gain"] if awarded else 0
+    }
+
+
+# ============================================
+# Worker
+# ============================================
+
+class JobWorker:
+    """In-process worker that polls the jobs table from an asyncio task"""
+
+    def __init__(self, session_factory=AsyncSessionLocal, poll_interval: Optional[float] = None):
+        self.session_factory = session_factory
+        self.poll_interval = settings.JOB_POLL_INTERVAL if poll_interval is None else poll_interval
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{id(self):x}"
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    async def run_once(self) -> bool:
+        """Claim and run one job. Returns False when nothing was runnable."""
+        async with self.session_factory() as db:
+            job = await claim_next_job(db, self.worker_id)
+            if job is None:
+                return False
+            await run_job(job, db, self.session_factory)
+            return True
+
+    async def run_until_idle(self):
+        """Drain every runnable job (used by tests and one-off scripts)"""
+        while await self.run_once():
+            pass
+
+    def notify(self):
+        """Wake the polling loop early, e.g. right after an enqueue"""
+        self._wakeup.set()
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.run_until_idle()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Job worker iteration failed")
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+worker = JobWorker()
@@ -0,0 +1,106 @@
+"""
+Persistent AI judge score cache
+Scores are keyed by (criteria hash, submission content hash, judge version,
+round context), so re-running the judge only sends new or changed
+submissions to the model. Round-1 scores have an empty context; scores from
+later tournament rounds are relative to the other finalists, so their
+context is a hash of the competing set.
+"""
+import hashlib
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import insert_ignoring_conflicts
+from app.models.judge import JudgeScore
+from app.services.judge_client import Challenge, Submission
+
+CacheKey = Tuple[str, str]  # (content_hash, context_hash)
+
+
+def _sha256(*parts: str) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update((part or "").encode())
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+def criteria_hash(challenge: Challenge) -> str:
+    """Hash of everything about the event that goes into the prompt"""
+    return _sha256(challenge.title, challenge.description[:500], challenge.criteria, challenge.category)
+
+
+def content_hash(submission: Submission) -> str:
+    return _sha256(submission.solution)
+
+
+def context_hash(submissions: Iterable[Submission]) -> str:
+    """Identity of a competing set (order-independent)"""
+    return _sha256(*sorted(content_hash(sub) for sub in submissions))
+
+
+@dataclass(frozen=True)
+class CachedScore:
+    score: float
+    review: str
+
+
+@dataclass(frozen=True)
+class ScoreRecord:
+    """A freshly computed score, to be persisted by the caller"""
+    prediction_id: int
+    agent_id: int
+    content_hash: str
+    context_hash: str
+    round: int
+    score: float
+    review: str
+
+
+async def load_cached_scores(
+    db: AsyncSession,
+    criteria: str,
+    judge_version: str,
+    submissions: List[Submission]
+) -> Dict[CacheKey, CachedScore]:
+    """Every cached score for these submissions under this criteria / judge version"""
+    hashes = list({content_hash(sub) for sub in submissions})
+    cached: Dict[CacheKey, CachedScore] = {}
+    for start in range(0, len(hashes), 1000):
+        rows = await db.execute(
+            select(JudgeScore.content_hash, JudgeScore.context_hash, JudgeScore.score, JudgeScore.review)
+            .where(
+                JudgeScore.criteria_hash == criteria,
+                JudgeScore.judge_version == judge_version,
+                JudgeScore.content_hash.in_(hashes[start:start + 1000])
+            )
+        )
+        for row in rows:
+            cached[(row.content_hash, row.context_hash)] = CachedScore(row.score, row.review or "")
+    return cached
+
+
+async def save_scores(db: AsyncSession, event_id: int, criteria: str, judge_version: str, records: Iterable[ScoreRecord]):
+    """
+    Insert new scores (no commit). Keys another run already stored are
+    skipped (ON CONFLICT DO NOTHING), so duplicate or concurrent judge runs
+    don't fail on uix_judge_score_key.
+    """
+    rows = [
+        {
+            "event_id": event_id,
+            "prediction_id": record.prediction_id,
+            "agent_id": record.agent_id,
+            "criteria_hash": criteria,
+            "content_hash": record.content_hash,
+            "judge_version": judge_version,
+            "context_hash": record.context_hash,
+            "round": record.round,
+            "score": record.score,
+            "review": record.review
+        }
+        for record in records
+    ]
+    if rows:
+        await db.execute(insert_ignoring_conflicts(JudgeScore, db.bind.dialect.name), rows)
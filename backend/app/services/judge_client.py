@@ -0,0 +1,223 @@
+"""
+Model clients for the AI judge
+A JudgeClient reviews a batch of submissions and streams the review text as
+it is generated: one "Submission #N" section per submission, each ending
+with a "Score: N/10" line. FakeJudgeClient is a deterministic local backend
+(no network) for development and benchmarks; OpenAIJudgeClient talks to any
+OpenAI-compatible chat completions API.
+"""
+import asyncio
+import hashlib
+import json
+import re
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional
+import httpx
+from app.core.config import settings
+
+REVIEW_PROMPT = """You are an expert judge for ClawHub - a platform where AI agents compete by solving challenges.
+
+Challenge Details:
+Title: {title}
+Description: {description}
+Criteria: {criteria}
+Category: {category}
+{round_note}
+Submissions to evaluate:
+{submissions}
+
+Review each submission against the criteria, in order. Start each review
+with its "Submission #N: @name" header, then a quick assessment (1-2
+sentences), strengths and weaknesses, one per line. Use emojis for
+readability (✓ ⚠ 💡). End each review with a line of the form "Score: N/10"."""
+
+FINAL_ROUND_NOTE = """
+Final round: each of these submissions won its batch. Compare them directly
+against each other, so the scores are on one scale.
+"""
+
+SUBMISSION_TEMPLATE = """
+Submission #{index} - {agent_name}
+Agent Reputation: {reputation} REP
+Submitted: {created_at}
+
+Solution:
+{solution}
+
+---
+"""
+
+# Part of every judge version: editing the prompts invalidates cached scores
+PROMPT_VERSION = hashlib.sha256((REVIEW_PROMPT + FINAL_ROUND_NOTE + SUBMISSION_TEMPLATE).encode()).hexdigest()[:12]
+
+RULE = "━━━━━━━━━━━━━━━━━━━━━━━━━━"
+HEADER_PATTERN = re.compile(r"^[^\w\n]*Submission #(\d+)", re.MULTILINE)
+SCORE_PATTERN = re.compile(r"Score:\s*(\d+(?:\.\d+)?)\s*/\s*10")
+
+
+@dataclass(frozen=True)
+class Challenge:
+    event_id: int
+    title: str
+    description: str
+    criteria: str
+    category: str
+    rep_reward: int
+
+
+@dataclass(frozen=True)
+class Submission:
+    index: int  # 1-based position in the judging order
+    agent_id: int
+    agent_name: str
+    reputation: int
+    created_at: Optional[datetime]
+    solution: str
+    prediction_id: Optional[int] = None
+
+
+def review_prompt(challenge: Challenge, submissions: List[Submission], final: bool = False) -> str:
+    """Prompt for one batch; each solution is truncated so a batch fits the context"""
+    return REVIEW_PROMPT.format(
+        title=challenge.title,
+        description=challenge.description[:500],
+        criteria=challenge.criteria,
+        category=challenge.category,
+        round_note=FINAL_ROUND_NOTE if final else "",
+        submissions="".join(
+            SUBMISSION_TEMPLATE.format(
+                index=sub.index,
+                agent_name=sub.agent_name,
+                reputation=sub.reputation,
+                created_at=sub.created_at,
+                solution=sub.solution[:1000]
+            )
+            for sub in submissions
+        )
+    )
+
+
+def parse_score(review: str) -> float:
+    """Last "Score: N/10" in a review (0 if the model left it out)"""
+    matches = SCORE_PATTERN.findall(review)
+    return float(matches[-1]) if matches else 0.0
+
+
+def parse_sections(review: str) -> Dict[int, str]:
+    """Split a batch review into per-submission sections, keyed by index"""
+    matches = list(HEADER_PATTERN.finditer(review))
+    starts = []
+    for match in matches:
+        # Include a rule line directly above the header
+        start = match.start()
+        previous = review.rfind("\n", 0, max(start - 1, 0)) + 1
+        if review[previous:start].strip() == RULE:
+            start = previous
+        starts.append(start)
+    sections: Dict[int, str] = {}
+    for i, match in enumerate(matches):
+        end = starts[i + 1] if i + 1 < len(matches) else len(review)
+        sections.setdefault(int(match.group(1)), review[starts[i]:end])
+    return sections
+
+
+def parse_scores(review: str) -> Dict[int, float]:
+    """Score per submission index from a batch review ("Submission #N" sections)"""
+    return {
+        index: parse_score(section)
+        for index, section in parse_sections(review).items()
+        if SCORE_PATTERN.search(section)
+    }
+
+
+class JudgeClient(ABC):
+    """Model backend for the judge"""
+    name = "base"
+
+    @property
+    def version(self) -> str:
+        """Identifies who produced a score (part of the score cache key)"""
+        return f"{self.name}:{PROMPT_VERSION}"
+
+    @abstractmethod
+    def review(self, challenge: Challenge, submissions: List[Submission], final: bool = False) -> AsyncIterator[str]:
+        """Stream the review of one batch of submissions as text chunks"""
+
+
+class FakeJudgeClient(JudgeClient):
+    """Deterministic local judge; `delay` seconds per line simulates model latency"""
+    name = "fake"
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = 0
+
+    async def review(self, challenge: Challenge, submissions: List[Submission], final: bool = False) -> AsyncIterator[str]:
+        self.calls += 1
+        for sub in submissions:
+            score = 7 + (sub.index % 3)  # Mock: varies by submission
+            if score >= 9:
+                lines = ["✓ Excellent approach", "✓ Meets all requirements", "💡 Shows creativity"]
+            elif score >= 7:
+                lines = ["✓ Solid solution", "⚠ Could be optimized"]
+            else:
+                lines = ["✓ Working solution", "⚠ Basic approach"]
+            header = f"\n{RULE}\nSubmission #{sub.index}: @{sub.agent_name}\n{RULE}\n"
+            for line in [header, "Reviewing solution...", *lines, f"\nScore: {score}/10"]:
+                if self.delay:
+                    await asyncio.sleep(self.delay)
+                yield line + "\n"
+
+
+class OpenAIJudgeClient(JudgeClient):
+    """Streams reviews from an OpenAI-compatible /chat/completions endpoint"""
+    name = "openai"
+
+    def __init__(self, api_url: str, api_key: Optional[str], model: str, timeout: float = 60.0):
+        self.model = model
+        self._client = httpx.AsyncClient(
+            base_url=api_url.rstrip("/"),
+            headers={"Authorization": f"Bearer {api_key}"} if api_key else {},
+            timeout=timeout
+        )
+
+    async def review(self, challenge: Challenge, submissions: List[Submission], final: bool = False) -> AsyncIterator[str]:
+        body = {
+            "model": self.model,
+            "stream": True,
+            "messages": [{"role": "user", "content": review_prompt(challenge, submissions, final)}],
+        }
+        async with self._client.stream("POST", "/chat/completions", json=body) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                choices = json.loads(data).get("choices") or [{}]
+                text = (choices[0].get("delta") or {}).get("content")
+                if text:
+                    yield text
+
+    @property
+    def version(self) -> str:
+        return f"{self.name}:{self.model}:{PROMPT_VERSION}"
+
+
+_client: Optional[JudgeClient] = None
+
+
+def get_judge_client() -> JudgeClient:
+    """The judge backend selected by JUDGE_BACKEND (created once per process)"""
+    global _client
+    if _client is None:
+        if settings.JUDGE_BACKEND == "openai":
+            _client = OpenAIJudgeClient(
+                settings.JUDGE_API_URL, settings.JUDGE_API_KEY, settings.JUDGE_MODEL, settings.JUDGE_TIMEOUT
+            )
+        else:
+            _client = FakeJudgeClient(delay=settings.JUDGE_FAKE_DELAY)
+    return _client
@@ -0,0 +1,280 @@
+"""
+Materialized leaderboard for ClawHub
+Keeps every board (overall REP, accuracy, per tier, per category) as a
+sorted in-memory rank index, so rank lookups are a bisect (O(log n)) and
+pages are keyset slices instead of ORDER BY ... OFFSET over `agents`.
+
+Freshness:
+- write paths in this process call notify_changed(agent_ids) and those
+  agents are reloaded on the next read;
+- changes made by other workers are picked up by polling agents whose
+  updated_at moved past the last seen watermark (LEADERBOARD_SYNC_SECONDS);
+- everything is rebuilt from scratch every LEADERBOARD_REBUILD_SECONDS.
+"""
+import asyncio
+import time
+from bisect import bisect_left, bisect_right, insort
+from datetime import timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.pagination import encode_cursor, decode_cursor
+from app.models.agent import Agent
+from app.models.prediction import CategoryStats
+
+# Agent columns held in memory: everything AgentResponse renders
+SNAPSHOT_COLUMNS = (
+    Agent.id, Agent.username, Agent.twitter, Agent.bio, Agent.reputation, Agent.tier,
+    Agent.accuracy_overall, Agent.total_predictions, Agent.correct_predictions,
+    Agent.current_streak, Agent.twitter_verified, Agent.created_at, Agent.updated_at,
+)
+
+# Reloading more agents than this at once falls back to a full rebuild
+MAX_INCREMENTAL_AGENTS = 5000
+
+
+class RankIndex:
+    """Agents sorted by (score desc, id asc); ranks are 1-based"""
+
+    def __init__(self):
+        self._keys: List[Tuple[float, int]] = []
+        self._key_of: Dict[int, Tuple[float, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    @classmethod
+    def build(cls, scores: Iterable[Tuple[int, float]]) -> "RankIndex":
+        """Bulk-load (agent_id, score) pairs with one sort"""
+        index = cls()
+        index._key_of = {agent_id: (-float(score or 0), agent_id) for agent_id, score in scores}
+        index._keys = sorted(index._key_of.values())
+        return index
+
+    def upsert(self, agent_id: int, score: float):
+        key = (-float(score or 0), agent_id)
+        old = self._key_of.get(agent_id)
+        if old == key:
+            return
+        if old is not None:
+            del self._keys[bisect_left(self._keys, old)]
+        insort(self._keys, key)
+        self._key_of[agent_id] = key
+
+    def remove(self, agent_id: int):
+        old = self._key_of.pop(agent_id, None)
+        if old is not None:
+            del self._keys[bisect_left(self._keys, old)]
+
+    def rank(self, agent_id: int) -> Optional[int]:
+        key = self._key_of.get(agent_id)
+        if key is None:
+            return None
+        return bisect_left(self._keys, key) + 1
+
+    def score(self, agent_id: int) -> Optional[float]:
+        key = self._key_of.get(agent_id)
+        return -key[0] if key is not None else None
+
+    def page(self, after: Optional[Tuple[float, int]] = None, offset: int = 0, limit: int = 100) -> List[Tuple[float, int]]:
+        """(score, agent_id) pairs after the keyset position `after`"""
+        start = bisect_right(self._keys, (-after[0], after[1])) if after else 0
+        start += max(offset, 0)
+        return [(-neg_score, agent_id) for neg_score, agent_id in self._keys[start:start + limit]]
+
+
+class Leaderboard:
+    def __init__(self):
+        self.agents: Dict[int, dict] = {}
+        self.boards: Dict[str, RankIndex] = {}
+        self._tier_of: Dict[int, str] = {}
+        self._categories_of: Dict[int, set] = {}
+        self._watermark = None
+        self._loaded = False
+        self._last_sync = 0.0
+        self._last_rebuild = 0.0
+        self._dirty_ids: set = set()
+        self._dirty_all = False
+        self._lock = asyncio.Lock()
+
+    # ---------- write-path notifications ----------
+
+    def notify_changed(self, *agent_ids: int):
+        """Mark agents as changed; with no ids, force a sync on the next read"""
+        if agent_ids:
+            self._dirty_ids.update(agent_ids)
+        else:
+            self._dirty_all = True
+
+    # ---------- reads ----------
+
+    @staticmethod
+    def board_name(sort_by: str = "reputation", tier: Optional[str] = None, category: Optional[str] = None) -> str:
+        if category:
+            return f"category:{category}"
+        if tier:
+            return f"tier:{tier}"
+        return "accuracy" if sort_by == "accuracy" else "reputation"
+
+    def page(self, board: str, cursor: Optional[str] = None, skip: int = 0, limit: int = 100) -> Tuple[List[dict], Optional[str]]:
+        """One page of agent rows plus the cursor for the next page"""
+        index = self.boards.get(board)
+        if index is None:
+            return [], None
+        after = tuple(decode_cursor(cursor, (float, int))) if cursor else None
+        entries = index.page(after=after, offset=skip, limit=limit)
+        rows = [self.agents[agent_id] for _, agent_id in entries]
+        next_cursor = None
+        if len(entries) == limit:
+            next_cursor = encode_cursor(*entries[-1])
+        return rows, next_cursor
+
+    def rank(self, board: str, agent_id: int) -> Optional[dict]:
+        index = self.boards.get(board)
+        if index is None or index.rank(agent_id) is None:
+            return None
+        return {"board": board, "rank": index.rank(agent_id), "score": index.score(agent_id), "total": len(index)}
+
+    async def ensure_fresh(self, db: AsyncSession):
+        """Bring the in-memory boards up to date before serving a read"""
+        now = time.monotonic()
+        if (self._loaded and not self._dirty_all and not self._dirty_ids
+                and now - self._last_sync < settings.LEADERBOARD_SYNC_SECONDS):
+            return
+        async with self._lock:
+            now = time.monotonic()
+            if not self._loaded or now - self._last_rebuild >= settings.LEADERBOARD_REBUILD_SECONDS:
+                await self.rebuild(db)
+                return
+            if self._dirty_all or now - self._last_sync >= settings.LEADERBOARD_SYNC_SECONDS:
+                await self._sync_changed(db)
+            if self._dirty_ids:
+                ids, self._dirty_ids = self._dirty_ids, set()
+                await self._reload(db, ids)
+
+    # ---------- maintenance ----------
+
+    async def rebuild(self, db: AsyncSession):
+        """Reload every agent and category stat"""
+        # Fetch first, then swap without yielding, so readers never see a
+        # half-built board
+        agent_rows = (await db.execute(select(*SNAPSHOT_COLUMNS))).mappings().all()
+        category_rows = (await db.execute(
+            select(CategoryStats.agent_id, CategoryStats.category, CategoryStats.accuracy)
+        )).all()
+
+        self.agents.clear()
+        self.boards.clear()
+        self._tier_of.clear()
+        self._categories_of.clear()
+        self._dirty_ids.clear()
+        self._dirty_all = False
+        self._apply_agents(agent_rows, index=False)
+
+        by_board: Dict[str, list] = {"reputation": [], "accuracy": []}
+        for agent_id, agent in self.agents.items():
+            by_board["reputation"].append((agent_id, agent["reputation"]))
+            by_board["accuracy"].append((agent_id, agent["accuracy_overall"]))
+            by_board.setdefault(f"tier:{self._tier_of[agent_id]}", []).append((agent_id, agent["reputation"]))
+        for agent_id, category, accuracy in category_rows:
+            if agent_id in self.agents:
+                self._categories_of.setdefault(agent_id, set()).add(category)
+                by_board.setdefault(f"category:{category}", []).append((agent_id, float(accuracy or 0)))
+        for name, scores in by_board.items():
+            self.boards[name] = RankIndex.build(scores)
+
+        self._loaded = True
+        self._last_rebuild = self._last_sync = time.monotonic()
+
+    async def _sync_changed(self, db: AsyncSession):
+        """Reload agents whose updated_at moved since the last sync"""
+        self._dirty_all = False
+        self._last_sync = time.monotonic()
+        query = select(Agent.id)
+        if self._watermark is not None:
+            # Overlap: timestamps are taken at transaction start, so rows can
+            # commit with an updated_at slightly behind the watermark
+            overlap = timedelta(seconds=settings.LEADERBOARD_SYNC_OVERLAP_SECONDS)
+            query = query.where(Agent.updated_at >= self._watermark - overlap)
+        changed = (await db.execute(query.limit(MAX_INCREMENTAL_AGENTS + 1))).scalars().all()
+        if len(changed) > MAX_INCREMENTAL_AGENTS:
+            await self.rebuild(db)
+            return
+        await self._reload(db, changed)
+
+    async def _reload(self, db: AsyncSession, agent_ids: Iterable[int]):
+        ids = list(agent_ids)
+        if not ids:
+            return
+        if len(ids) > MAX_INCREMENTAL_AGENTS:
+            await self.rebuild(db)
+            return
+
+        agent_rows = (await db.execute(
+            select(*SNAPSHOT_COLUMNS).where(Agent.id.in_(ids))
+        )).mappings().all()
+        category_rows = (await db.execute(
+            select(CategoryStats.agent_id, CategoryStats.category, CategoryStats.accuracy)
+            .where(CategoryStats.agent_id.in_(ids))
+        )).all()
+
+        found = self._apply_agents(agent_rows)
+        for agent_id in set(ids) - found:
+            self._remove(agent_id)
+        for agent_id in found:
+            for category in self._categories_of.pop(agent_id, set()):
+                self.boards[f"category:{category}"].remove(agent_id)
+        for agent_id, category, accuracy in category_rows:
+            self._set_category(agent_id, category, accuracy)
+
+    def _board(self, name: str) -> RankIndex:
+        index = self.boards.get(name)
+        if index is None:
+            index = self.boards[name] = RankIndex()
+        return index
+
+    def _apply_agents(self, rows, index: bool = True) -> set:
+        found = set()
+        for row in rows:
+            agent = dict(row)
+            agent_id = agent["id"]
+            updated_at = agent.pop("updated_at")
+            if updated_at is not None and (self._watermark is None or updated_at > self._watermark):
+                self._watermark = updated_at
+            agent["reputation"] = agent["reputation"] or 0
+            agent["accuracy_overall"] = float(agent["accuracy_overall"] or 0)
+            agent["accuracy"] = agent["accuracy_overall"]
+            agent["verified"] = bool(agent.pop("twitter_verified"))
+            agent["twitter_handle"] = agent["twitter"]
+            self.agents[agent_id] = agent
+            found.add(agent_id)
+            tier = agent["tier"] or "Bronze"
+            if not index:
+                self._tier_of[agent_id] = tier
+                continue
+
+            self._board("reputation").upsert(agent_id, agent["reputation"])
+            self._board("accuracy").upsert(agent_id, agent["accuracy_overall"])
+            old_tier = self._tier_of.get(agent_id)
+            if old_tier and old_tier != tier:
+                self.boards[f"tier:{old_tier}"].remove(agent_id)
+            self._tier_of[agent_id] = tier
+            self._board(f"tier:{tier}").upsert(agent_id, agent["reputation"])
+        return found
+
+    def _set_category(self, agent_id: int, category: str, accuracy):
+        if agent_id not in self.agents:
+            return
+        self._categories_of.setdefault(agent_id, set()).add(category)
+        self._board(f"category:{category}").upsert(agent_id, float(accuracy or 0))
+
+    def _remove(self, agent_id: int):
+        self.agents.pop(agent_id, None)
+        for index in self.boards.values():
+            index.remove(agent_id)
+        self._tier_of.pop(agent_id, None)
+        self._categories_of.pop(agent_id, None)
+
+
+leaderboard = Leaderboard()
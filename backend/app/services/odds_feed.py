@@ -0,0 +1,253 @@
+"""
+Live event odds feed
+Write paths publish an event's stats (publish_odds) once they have committed.
+A broker carries the updates to the OddsHub in every worker. LocalBroker
+works within one process. RedisBroker uses Redis pub/sub to reach every
+uvicorn worker.
+
+The hub coalesces updates per event. It sends at most one update every
+ODDS_COALESCE_SECONDS, and the latest stats win. Each update is JSON-encoded
+once and handed to every subscriber of that event. Updates are full stats
+rather than deltas, so dropping intermediate ones is always safe. A
+subscriber that falls behind holds only the newest update per event.
+"""
+import asyncio
+import json
+import logging
+import time
+from abc import ABC, abstractmethod
+from decimal import Decimal
+from typing import AsyncIterator, Callable, Dict, Iterable, Optional, Set
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.models.event import Event
+
+logger = logging.getLogger(__name__)
+
+# Columns an odds update is built from; write paths RETURNING these can publish without a read
+ODDS_COLUMNS = (
+    Event.id, Event.status, Event.result, Event.total_predictions,
+    Event.yes_count, Event.no_count, Event.yes_percentage, Event.no_percentage,
+)
+
+
+def odds_payload(row) -> dict:
+    """Odds update for an Event (or a row of ODDS_COLUMNS)"""
+    return {
+        "event_id": row.id,
+        "status": row.status,
+        "result": row.result,
+        "total_predictions": row.total_predictions or 0,
+        "yes_count": row.yes_count or 0,
+        "no_count": row.no_count or 0,
+        "yes_percentage": float(row.yes_percentage or Decimal(0)),
+        "no_percentage": float(row.no_percentage or Decimal(0)),
+    }
+
+
+class Broker(ABC):
+    """Carries published updates to the hub of every worker"""
+
+    @abstractmethod
+    async def start(self, deliver: Callable[[dict], None]):
+        ...
+
+    @abstractmethod
+    async def publish(self, message: dict):
+        ...
+
+    async def stop(self):
+        pass
+
+
+class LocalBroker(Broker):
+    """Delivers straight to this process's hub"""
+
+    def __init__(self):
+        self._deliver: Optional[Callable[[dict], None]] = None
+
+    async def start(self, deliver: Callable[[dict], None]):
+        self._deliver = deliver
+
+    async def publish(self, message: dict):
+        if self._deliver is not None:
+            self._deliver(message)
+
+    async def stop(self):
+        self._deliver = None
+
+
+class RedisBroker(Broker):
+    """Redis pub/sub between workers (requires the optional `redis` package)"""
+    channel = "clawhub:odds"
+
+    def __init__(self, url: str):
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("ODDS_BROKER_URL=redis://... requires `pip install redis`") from e
+        self._client = redis.from_url(url)
+        self._pubsub = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self, deliver: Callable[[dict], None]):
+        self._pubsub = self._client.pubsub()
+        await self._pubsub.subscribe(self.channel)
+        self._task = asyncio.create_task(self._listen(deliver))
+
+    async def _listen(self, deliver: Callable[[dict], None]):
+        async for message in self._pubsub.listen():
+            if message["type"] == "message":
+                try:
+                    deliver(json.loads(message["data"]))
+                except Exception:
+                    logger.exception("Bad odds update from broker")
+
+    async def publish(self, message: dict):
+        await self._client.publish(self.channel, json.dumps(message))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._pubsub is not None:
+            await self._pubsub.unsubscribe(self.channel)
+            await self._pubsub.aclose()
+            self._pubsub = None
+
+
+def broker_from_url(url: Optional[str]) -> Broker:
+    """Build the broker named by ODDS_BROKER_URL (unset: this process only)"""
+    if not url:
+        return LocalBroker()
+    if url.startswith("redis://") or url.startswith("rediss://"):
+        return RedisBroker(url)
+    raise ValueError(f"Unsupported ODDS_BROKER_URL: {url}")
+
+
+class Subscription:
+    """One client's feed; iterate it for encoded updates"""
+
+    def __init__(self, event_ids: Set[int]):
+        self.event_ids = event_ids
+        self.superseded = 0  # updates replaced by a newer one before the client read them
+        self._pending: Dict[int, str] = {}
+        self._ready = asyncio.Event()
+
+    def push(self, event_id: int, message: str):
+        if event_id in self._pending:
+            self.superseded += 1
+        self._pending[event_id] = message
+        self._ready.set()
+
+    def offer(self, event_id: int, message: str):
+        """Queue an initial snapshot unless a (possibly newer) update is already waiting"""
+        if event_id not in self._pending:
+            self._pending[event_id] = message
+            self._ready.set()
+
+    async def __aiter__(self) -> AsyncIterator[str]:
+        while True:
+            await self._ready.wait()
+            self._ready.clear()
+            pending, self._pending = self._pending, {}
+            for message in pending.values():
+                yield message
+
+
+class OddsHub:
+    def __init__(self, broker: Broker, interval: float):
+        self.broker = broker
+        self.interval = interval
+        self._subscribers: Dict[int, Set[Subscription]] = {}
+        self._latest: Dict[int, dict] = {}  # newest update not sent yet, per event
+        self._last_sent: Dict[int, float] = {}
+        self._scheduled: Set[int] = set()
+        self.received = 0
+        self.sent = 0
+        self.deliveries = 0
+
+    async def start(self):
+        await self.broker.start(self._receive)
+
+    async def stop(self):
+        await self.broker.stop()
+
+    async def publish(self, message: dict):
+        await self.broker.publish(message)
+
+    def subscribe(self, event_ids: Iterable[int]) -> Subscription:
+        """Start receiving updates for `event_ids`; always pair with unsubscribe()"""
+        subscription = Subscription(set(event_ids))
+        for event_id in subscription.event_ids:
+            self._subscribers.setdefault(event_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        for event_id in subscription.event_ids:
+            subscribers = self._subscribers.get(event_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[event_id]
+                    self._last_sent.pop(event_id, None)
+
+    def _receive(self, message: dict):
+        """Broker callback: send now, or schedule a trailing send if one went out within the interval"""
+        self.received += 1
+        event_id = message["event_id"]
+        if event_id not in self._subscribers:
+            return
+        self._latest[event_id] = message
+        if event_id in self._scheduled:
+            return
+        delay = self._last_sent.get(event_id, float("-inf")) + self.interval - time.monotonic()
+        if delay <= 0:
+            self._flush(event_id)
+        else:
+            self._scheduled.add(event_id)
+            asyncio.get_running_loop().call_later(delay, self._flush, event_id)
+
+    def _flush(self, event_id: int):
+        self._scheduled.discard(event_id)
+        message = self._latest.pop(event_id, None)
+        subscribers = self._subscribers.get(event_id)
+        if message is None or not subscribers:
+            return
+        self._last_sent[event_id] = time.monotonic()
+        encoded = json.dumps(message)
+        for subscription in subscribers:
+            subscription.push(event_id, encoded)
+        self.sent += 1
+        self.deliveries += len(subscribers)
+
+    def stats(self) -> dict:
+        return {
+            "broker": type(self.broker).__name__,
+            "events": len(self._subscribers),
+            "subscriptions": sum(len(s) for s in self._subscribers.values()),
+            "received": self.received,
+            "sent": self.sent,
+            "deliveries": self.deliveries,
+        }
+
+
+odds_hub = OddsHub(broker_from_url(settings.ODDS_BROKER_URL), interval=settings.ODDS_COALESCE_SECONDS)
+
+
+async def publish_odds(*rows):
+    """Publish committed stats of Events (or rows of ODDS_COLUMNS); never fails the write"""
+    for row in rows:
+        try:
+            await odds_hub.publish(odds_payload(row))
+        except Exception:
+            logger.exception("Failed to publish odds for event %s", row.id)
+
+
+async def publish_event_odds(db: AsyncSession, *event_ids: int):
+    """Load and publish the stats of events changed by a committed write"""
+    if event_ids:
+        rows = (await db.execute(select(*ODDS_COLUMNS).where(Event.id.in_(list(event_ids))))).all()
+        await publish_odds(*rows)
@@ -0,0 +1,236 @@
+"""
+Reputation backtesting
+Replays every resolved prediction under a candidate scoring rule and tier
+table, then reports how reputations, tiers and leaderboard ranks would move.
+
+The history is loaded once into columnar NumPy arrays. It can be cached in
+an .npz snapshot with --snapshot. A scoring rule is any function with the
+signature of reputation.calculate_rep_change, and the live rule is the
+default. The rule is evaluated once for every combination of its inputs
+into a lookup table (reputation.rep_change_table, which the live
+resolution SQL is generated from too), so scoring millions of predictions
+is one gather and one bincount. REP that does not come from prediction scores (verification
+bonuses, winner awards) is kept:
+
+    new REP = current REP - stored rep_change + simulated rep_change
+
+Usage (from backend/; requires numpy, see requirements-optional.txt):
+    python -m app.services.rep_backtest --scoring mypkg.rules:flat_rule
+    python -m app.services.rep_backtest --tiers 8000:Diamond,4000:Platinum,1500:Gold,400:Silver,0:Bronze --output moves.csv
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import importlib
+import itertools
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import case, create_engine, func, select
+from sqlalchemy.orm import Session, sessionmaker
+from app.models.agent import Agent
+from app.models.prediction import Prediction
+from app.services.reputation import TIERS, ScoringRule, calculate_rep_change, rep_change_table
+
+try:
+    import numpy as np
+except ImportError:  # optional; the entry points raise through _require_numpy
+    np = None
+
+# Per resolved prediction; flags are 0/1
+PREDICTION_COLUMNS = ("agent_id", "is_yes", "correct", "early", "contrarian", "confidence", "rep_change")
+
+LOAD_BATCH = 100000
+
+
+def _require_numpy():
+    if np is None:
+        raise RuntimeError("app.services.rep_backtest requires `pip install numpy`")
+
+
+def _flag(column):
+    return case((column.is_(True), 1), else_=0)
+
+
+def load_history(db: Session) -> Dict[str, np.ndarray]:
+    """Resolved predictions (PREDICTION_COLUMNS) and agents (agent_ids, usernames, reputation) as arrays"""
+    _require_numpy()
+    query = select(
+        Prediction.agent_id,
+        case((Prediction.prediction == "YES", 1), else_=0),
+        _flag(Prediction.was_correct),
+        _flag(Prediction.is_early_bird),
+        _flag(Prediction.is_contrarian),
+        func.coalesce(Prediction.confidence, 0),
+        func.coalesce(Prediction.rep_change, 0),
+    ).where(Prediction.was_correct.isnot(None)).execution_options(yield_per=LOAD_BATCH)
+    chunks = [np.array(rows, dtype=np.int64) for rows in db.execute(query).partitions()]
+    predictions = np.concatenate(chunks) if chunks else np.empty((0, len(PREDICTION_COLUMNS)), dtype=np.int64)
+    history = {name: np.ascontiguousarray(predictions[:, i]) for i, name in enumerate(PREDICTION_COLUMNS)}
+
+    agents = db.execute(select(Agent.id, Agent.username, func.coalesce(Agent.reputation, 0)).order_by(Agent.id)).all()
+    history["agent_ids"] = np.array([a[0] for a in agents], dtype=np.int64)
+    history["usernames"] = np.array([a[1] for a in agents], dtype=str)
+    history["reputation"] = np.array([a[2] for a in agents], dtype=np.int64)
+    return history
+
+
+def scoring_table(scoring: ScoringRule = calculate_rep_change) -> np.ndarray:
+    """
+    The rule's REP change for every input, indexed [is_yes, correct, early,
+    contrarian, confidence]; the live SQL scores from the same rep_change_table
+    """
+    _require_numpy()
+    rules = rep_change_table(scoring)
+    table = np.empty((2, 2, 2, 2, 101), dtype=np.int64)
+    for is_yes, correct, early, contrarian in itertools.product((0, 1), repeat=4):
+        prediction = "YES" if is_yes else "NO"
+        result = prediction if correct else ("NO" if is_yes else "YES")
+        table[is_yes, correct, early, contrarian] = rules[(prediction, result, bool(early), bool(contrarian))]
+    return table
+
+
+def score(history: Dict[str, np.ndarray], table: np.ndarray) -> np.ndarray:
+    """REP change of every resolved prediction under a scoring table"""
+    return table[
+        history["is_yes"], history["correct"], history["early"], history["contrarian"],
+        np.clip(history["confidence"], 0, 100)
+    ]
+
+
+def tiers_for(reputation: np.ndarray, tiers: List[Tuple[int, str]] = TIERS) -> np.ndarray:
+    """Vectorized tier_for_reputation for a (threshold, name) table, highest first"""
+    thresholds = np.array([threshold for threshold, _ in reversed(tiers)])
+    names = np.array([name for _, name in reversed(tiers)])
+    # Below the lowest threshold still maps to the lowest tier, as in tier_for_reputation
+    return names[np.clip(np.searchsorted(thresholds, reputation, side="right") - 1, 0, None)]
+
+
+def ranks_for(reputation: np.ndarray, agent_ids: np.ndarray) -> np.ndarray:
+    """1-based overall leaderboard ranks (REP desc, id asc)"""
+    order = np.lexsort((agent_ids, -reputation))
+    ranks = np.empty(len(order), dtype=np.int64)
+    ranks[order] = np.arange(1, len(order) + 1)
+    return ranks
+
+
+def replay(history: Dict[str, np.ndarray], scoring: ScoringRule = calculate_rep_change,
+           tiers: List[Tuple[int, str]] = TIERS) -> Dict[str, np.ndarray]:
+    """Per agent: current and simulated REP, tier and rank"""
+    agent_ids = history["agent_ids"]
+    agent_index = np.searchsorted(agent_ids, history["agent_id"])
+    delta = np.bincount(
+        agent_index, weights=score(history, scoring_table(scoring)) - history["rep_change"], minlength=len(agent_ids)
+    )
+    reputation = history["reputation"]
+    new_reputation = reputation + np.rint(delta).astype(np.int64)
+    rank = ranks_for(reputation, agent_ids)
+    new_rank = ranks_for(new_reputation, agent_ids)
+    return {
+        "agent_id": agent_ids,
+        "username": history["usernames"],
+        "reputation": reputation,
+        "new_reputation": new_reputation,
+        "tier": tiers_for(reputation),
+        "new_tier": tiers_for(new_reputation, tiers),
+        "rank": rank,
+        "new_rank": new_rank,
+        "rank_delta": rank - new_rank,  # positive: moved up
+    }
+
+
+def load_scoring(path: str) -> ScoringRule:
+    """Resolve a `package.module:function` scoring rule"""
+    module, _, name = path.partition(":")
+    if not name:
+        raise SystemExit(f"--scoring must look like package.module:function, got {path!r}")
+    return getattr(importlib.import_module(module), name)
+
+
+def parse_tiers(spec: str) -> List[Tuple[int, str]]:
+    """'10000:Diamond,5000:Platinum,...' -> [(10000, 'Diamond'), ...], highest first"""
+    tiers = []
+    for part in spec.split(","):
+        threshold, _, name = part.partition(":")
+        tiers.append((int(threshold), name.strip()))
+    return sorted(tiers, reverse=True)
+
+
+def _load(database_url: Optional[str], snapshot: Optional[str], refresh: bool) -> Dict[str, np.ndarray]:
+    _require_numpy()
+    if snapshot and os.path.exists(snapshot) and not refresh:
+        with np.load(snapshot) as data:
+            return {name: data[name] for name in data.files}
+    if database_url:
+        engine = create_engine(database_url)
+    else:
+        from app.core.database import engine
+    with sessionmaker(bind=engine)() as db:
+        history = load_history(db)
+    if snapshot:
+        np.savez(snapshot, **history)
+    return history
+
+
+def _report(result: Dict[str, np.ndarray], history: Dict[str, np.ndarray], top: int):
+    stale = np.count_nonzero(score(history, scoring_table()) != history["rep_change"])
+    if stale:
+        print(f"note: {stale} stored rep_change values differ from the live rules (scored under older rules?)")
+
+    change = result["new_reputation"] - result["reputation"]
+    moved = result["rank_delta"] != 0
+    print(f"REP change: mean {change.mean() if len(change) else 0:+.1f}, min {change.min(initial=0):+d}, max {change.max(initial=0):+d}")
+    print(f"agents changing rank: {np.count_nonzero(moved)}, mean |rank delta| {np.abs(result['rank_delta']).mean() if len(change) else 0:.1f}")
+
+    transitions = {}
+    for old, new in zip(result["tier"], result["new_tier"]):
+        if old != new:
+            transitions[(old, new)] = transitions.get((old, new), 0) + 1
+    for (old, new), count in sorted(transitions.items(), key=lambda item: -item[1]):
+        print(f"  {old:>9} -> {new:<9} {count}")
+
+    order = np.argsort(-result["rank_delta"], kind="stable")
+    for title, indices in (("biggest climbers", order[:top]), ("biggest fallers", order[::-1][:top])):
+        indices = [i for i in indices if result["rank_delta"][i]]
+        if indices:
+            print(title + ":")
+        for i in indices:
+            print(f"  {result['username'][i]:<24} #{result['rank'][i]:<7} -> #{result['new_rank'][i]:<7} "
+                  f"{result['reputation'][i]:>7} -> {result['new_reputation'][i]:<7} {result['new_tier'][i]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay resolved predictions under a candidate scoring rule and tier table")
+    parser.add_argument("--database-url", default=None, help="defaults to the app's DATABASE_URL")
+    parser.add_argument("--scoring", default=None, help="package.module:function with calculate_rep_change's signature (default: the live rule)")
+    parser.add_argument("--tiers", default=None, help="threshold:name,... (default: the live TIERS)")
+    parser.add_argument("--snapshot", default=None, help=".npz file caching the loaded history (created if missing)")
+    parser.add_argument("--refresh", action="store_true", help="reload the snapshot from the database")
+    parser.add_argument("--output", default=None, help="write every agent's before/after to this CSV file")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    history = _load(args.database_url, args.snapshot, args.refresh)
+    loaded = time.perf_counter()
+    result = replay(
+        history,
+        load_scoring(args.scoring) if args.scoring else calculate_rep_change,
+        parse_tiers(args.tiers) if args.tiers else TIERS
+    )
+    replayed = time.perf_counter()
+
+    print(f"{len(history['agent_id'])} resolved predictions, {len(history['agent_ids'])} agents "
+          f"(load {loaded - started:.2f}s, replay {replayed - loaded:.2f}s)")
+    _report(result, history, args.top)
+    if args.output:
+        with open(args.output, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(result.keys())
+            writer.writerows(zip(*(column.tolist() for column in result.values())))
+        print(f"wrote {len(result['agent_id'])} agents to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,20 @@
 from sqlalchemy.orm import Session
-from app.models.event import Event
+from sqlalchemy import select, update, case, and_, func, literal
 from app.models.prediction import Prediction
 from app.models.agent import Agent
+from app.services.agent_stats import apply_prediction_stats
 from datetime import datetime
+from itertools import product
+from typing import Callable, Dict, List, Tuple
+
+# (minimum REP, tier name), highest first
+TIERS = [
+    (10000, "Diamond"),
+    (5000, "Platinum"),
+    (2000, "Gold"),
+    (500, "Silver"),
+    (0, "Bronze"),
+]
 
 def calculate_rep_change(prediction: str, result: str, confidence: int, is_early_bird: bool, is_contrarian: bool) -> int:
     """Calculate REP change based on prediction outcome"""
@@ -25,55 +37,142 @@ def calculate_rep_change(prediction: str, result: str, confidence: int, is_early
     
     return points
 
-async def resolve_event(event: Event, result: str, db: Session):
-    """Resolve event and update all agent reputations"""
-    
-    # Update event
-    event.status = "resolved"
-    event.result = result
-    
-    # Get all predictions
-    predictions = db.query(Prediction).filter(Prediction.event_id == event.id).all()
-    
-    for pred in predictions:
-        # Calculate REP change
-        rep_change = calculate_rep_change(
-            pred.prediction,
-            result,
-            pred.confidence,
-            pred.is_early_bird,
-            pred.is_contrarian
-        )
-        
-        # Update prediction
-        pred.was_correct = (pred.prediction == result)
-        pred.rep_change = rep_change
-        
-        # Update agent
-        agent = db.query(Agent).filter(Agent.id == pred.agent_id).first()
-        agent.reputation += rep_change
-        
-        # Update accuracy
-        if pred.was_correct:
-            agent.correct_predictions += 1
-            agent.current_streak += 1
-            if agent.current_streak > agent.best_streak:
-                agent.best_streak = agent.current_streak
-        else:
-            agent.current_streak = 0
-        
-        agent.accuracy_overall = (agent.correct_predictions / agent.total_predictions) * 100 if agent.total_predictions > 0 else 0
-        
-        # Update tier
-        if agent.reputation >= 10000:
-            agent.tier = "Diamond"
-        elif agent.reputation >= 5000:
-            agent.tier = "Platinum"
-        elif agent.reputation >= 2000:
-            agent.tier = "Gold"
-        elif agent.reputation >= 500:
-            agent.tier = "Silver"
+def tier_for_reputation(reputation: int) -> str:
+    """Map a REP total to its tier name"""
+    for threshold, tier in TIERS:
+        if (reputation or 0) >= threshold:
+            return tier
+    return TIERS[-1][1]
+
+def tier_expression(reputation):
+    """SQL CASE equivalent of tier_for_reputation for a REP column/expression"""
+    return case(
+        *[(reputation >= threshold, tier) for threshold, tier in TIERS[:-1]],
+        else_=TIERS[-1][1]
+    )
+
+def _zero_if_null(column):
+    """Treat NULL counters as zero inside SQL arithmetic"""
+    return func.coalesce(column, 0)
+
+# (prediction, result, confidence, is_early_bird, is_contrarian) -> REP change
+ScoringRule = Callable[[str, str, int, bool, bool], int]
+
+def rep_change_table(scoring: ScoringRule = calculate_rep_change) -> Dict[Tuple[str, str, bool, bool], List[int]]:
+    """
+    The rule evaluated for every input it can see:
+    (prediction, result, is_early_bird, is_contrarian) -> REP change at
+    confidence 0..100. The live SQL (rep_change_expression) and the
+    backtest (rep_backtest.scoring_table) both score from this table.
+    """
+    return {
+        (prediction, result, early, contrarian): [
+            scoring(prediction, result, confidence, early, contrarian) for confidence in range(101)
+        ]
+        for prediction, result, early, contrarian in product(("YES", "NO"), ("YES", "NO"), (True, False), (True, False))
+    }
+
+def _by_confidence(points: List[int]):
+    """REP change by Prediction.confidence, one branch per run of equal values; out-of-range confidence clamps to 0..100"""
+    runs = []  # (last confidence of the run, points)
+    for confidence, value in enumerate(points):
+        if runs and runs[-1][1] == value:
+            runs[-1] = (confidence, value)
         else:
-            agent.tier = "Bronze"
-    
-    db.commit()
\ No newline at end of file
+            runs.append((confidence, value))
+    if len(runs) == 1:
+        return runs[0][1]
+    return case(*[(Prediction.confidence <= last, value) for last, value in runs[:-1]], else_=runs[-1][1])
+
+def rep_change_expression(result: str, scoring: ScoringRule = calculate_rep_change):
+    """
+    SQL CASE equivalent of `scoring` for predictions on an event resolved
+    with `result`, generated from rep_change_table. Every input the rule
+    sees is covered, confidence included, so a rule the backtest scores
+    scores the same way here.
+    """
+    table = rep_change_table(scoring)
+    branches = []
+    for prediction, early, contrarian in product((result, "NO" if result == "YES" else "YES"), (True, False), (True, False)):
+        branches.append((
+            and_(
+                Prediction.prediction == prediction,
+                Prediction.is_early_bird.is_(early) if early else Prediction.is_early_bird.isnot(True),
+                Prediction.is_contrarian.is_(contrarian) if contrarian else Prediction.is_contrarian.isnot(True),
+            ),
+            _by_confidence(table[(prediction, result, early, contrarian)])
+        ))
+    # The last branch (wrong, no bonuses) is the fallback; constant branches equal to it are redundant
+    fallback = branches.pop()[1]
+    while branches and isinstance(fallback, int) and isinstance(branches[-1][1], int) and branches[-1][1] == fallback:
+        branches.pop()
+    return case(*branches, else_=fallback)
+
+def pending_predictions_count(db: Session, event_id: int) -> int:
+    """Number of predictions on the event that have not been scored yet"""
+    return db.query(func.count(Prediction.id)).filter(
+        Prediction.event_id == event_id,
+        Prediction.was_correct.is_(None)
+    ).scalar() or 0
+
+def apply_resolution(db: Session, event_id: int, result: str, limit: int = 1000) -> int:
+    """
+    Score up to `limit` unscored predictions on the event and apply them to
+    their agents. Does not commit; returns the number of predictions scored.
+
+    Only predictions with was_correct IS NULL are touched, and the agent
+    update is driven by the rows this call actually marked (RETURNING), so a
+    chunk replayed after a crash or by a second worker never awards REP twice.
+    """
+    chunk = db.execute(
+        select(Prediction.id)
+        .where(Prediction.event_id == event_id, Prediction.was_correct.is_(None))
+        .order_by(Prediction.id)
+        .limit(limit)
+    ).scalars().all()
+    if not chunk:
+        return 0
+
+    # Score the chunk's predictions in one statement
+    scored = db.execute(
+        update(Prediction)
+        .where(Prediction.id.in_(chunk), Prediction.was_correct.is_(None))
+        .values(
+            was_correct=(Prediction.prediction == result),
+            rep_change=rep_change_expression(result)
+        )
+        .returning(Prediction.id)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+    if not scored:
+        return 0
+
+    # Apply the scored predictions to their agents (UPDATE ... FROM predictions).
+    # Every SET expression sees the pre-update agent row, so derived columns
+    # are computed from the new values explicitly.
+    correct = Prediction.was_correct.is_(True)
+    new_reputation = _zero_if_null(Agent.reputation) + Prediction.rep_change
+    new_correct = _zero_if_null(Agent.correct_predictions) + case((correct, 1), else_=0)
+    new_streak = case((correct, _zero_if_null(Agent.current_streak) + 1), else_=0)
+    db.execute(
+        update(Agent)
+        .where(Agent.id == Prediction.agent_id, Prediction.id.in_(scored))
+        .values(
+            reputation=new_reputation,
+            correct_predictions=new_correct,
+            current_streak=new_streak,
+            best_streak=case(
+                (new_streak > _zero_if_null(Agent.best_streak), new_streak),
+                else_=_zero_if_null(Agent.best_streak)
+            ),
+            accuracy_overall=case(
+                (Agent.total_predictions > 0, new_correct * literal(100.0) / Agent.total_predictions),
+                else_=0
+            ),
+            tier=tier_expression(new_reputation)
+        )
+        .execution_options(synchronize_session=False)
+    )
+    # Category accuracy and calibration, from the same scored rows
+    apply_prediction_stats(db, scored)
+    return len(scored)
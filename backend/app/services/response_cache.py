@@ -0,0 +1,170 @@
+"""
+Response cache for hot read endpoints
+Routes hand serve() a builder for their JSON body. The encoded body and its
+ETag are cached per URL for a per-route TTL, and a matching If-None-Match
+gets a 304. Entries are tagged ("event:12", "agent:alice"); write paths call
+invalidate(*tags) after they commit.
+
+Invalidation works through tag versions: every tag has a random version in
+the cache, an entry's key includes the versions of its tags, and
+invalidating a tag replaces its version. That orphans every entry under the
+tag at once without listing keys, so it works unchanged on a shared cache.
+The versions are read before the builder runs, so a response built from
+data that a concurrent write just changed lands under the old version and
+is never served.
+"""
+import hashlib
+import json
+import secrets
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Sequence
+from urllib.parse import urlencode
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from app.core.cache import MemoryCache, SharedCache, shared_cache_from_url
+from app.core.config import settings
+from app.core.serialization import dumps
+
+TAG_VERSION_TTL = 86400.0  # an expired version just means one miss per entry
+
+
+def etag_for(body: str) -> str:
+    return '"' + hashlib.sha1(body.encode()).hexdigest()[:20] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header lists `etag` (or is *)"""
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+
+def encode_body(data: Any) -> str:
+    """JSON text as FastAPI's JSONResponse would render it (orjson under FAST_JSON)"""
+    if settings.FAST_JSON:
+        return dumps(data).decode()
+    return json.dumps(jsonable_encoder(data), ensure_ascii=False, allow_nan=False, separators=(",", ":"))
+
+
+@dataclass
+class WithHeaders:
+    """A builder result whose response headers (e.g. X-Next-Cursor) are cached with the body"""
+    body: Any
+    headers: Dict[str, str]
+
+
+@dataclass
+class RouteCacheStats:
+    hits: int = 0
+    misses: int = 0
+    not_modified: int = 0
+
+    def as_dict(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+class ResponseCache:
+    def __init__(self, backend: SharedCache, enabled: bool = True):
+        self.backend = backend
+        self.enabled = enabled
+        self.routes: Dict[str, RouteCacheStats] = {}
+
+    async def _versions(self, tags: Sequence[str]) -> str:
+        versions = []
+        for tag in tags:
+            version = await self.backend.get("tag:" + tag)
+            if version is None:
+                version = secrets.token_hex(4)
+                await self.backend.set("tag:" + tag, version, TAG_VERSION_TTL)
+            versions.append(version)
+        return ".".join(versions)
+
+    async def invalidate(self, *tags: str):
+        """Drop every cached response carrying any of `tags` (call after the write commits)"""
+        if not self.enabled:
+            return
+        for tag in dict.fromkeys(tags):
+            await self.backend.set("tag:" + tag, secrets.token_hex(4), TAG_VERSION_TTL)
+
+    async def serve(
+        self,
+        request: Request,
+        route: str,
+        build: Callable[[], Awaitable[Any]],
+        ttl: float,
+        tags: Sequence[str] = (),
+        max_age: Optional[int] = None,
+        vary: str = ""
+    ) -> Response:
+        """
+        Cached JSON response for `request`. `build` produces the body on a
+        miss, or a WithHeaders (exceptions such as a 404 pass through
+        uncached). max_age=None makes clients revalidate every time
+        (Cache-Control: no-cache). `vary` adds server-side state that
+        changes the body to the key.
+        """
+        stats = self.routes.setdefault(route, RouteCacheStats())
+        entry = None
+        if self.enabled:
+            query = urlencode(sorted(request.query_params.multi_items()))
+            key = f"resp:{request.url.path}?{query}|{vary}|{await self._versions(tags)}"
+            entry = await self.backend.get(key)
+
+        if entry is None:
+            stats.misses += 1
+            built = await build()
+            extra = {}
+            if isinstance(built, WithHeaders):
+                built, extra = built.body, built.headers
+            body = encode_body(built)
+            entry = {"etag": etag_for(body), "body": body, "headers": extra}
+            if self.enabled:
+                await self.backend.set(key, entry, ttl)
+            cache_status = "MISS"
+        else:
+            stats.hits += 1
+            cache_status = "HIT"
+
+        headers = {
+            "ETag": entry["etag"],
+            "Cache-Control": "no-cache" if max_age is None else f"public, max-age={max_age}",
+            "X-Cache": cache_status,
+            **entry.get("headers", {}),
+        }
+        if etag_matches(request.headers.get("if-none-match"), entry["etag"]):
+            stats.not_modified += 1
+            return Response(status_code=304, headers=headers)
+        return Response(content=entry["body"], media_type="application/json", headers=headers)
+
+    def stats(self) -> dict:
+        """Hit / miss rates overall and per route"""
+        total = RouteCacheStats(
+            hits=sum(s.hits for s in self.routes.values()),
+            misses=sum(s.misses for s in self.routes.values()),
+            not_modified=sum(s.not_modified for s in self.routes.values()),
+        )
+        return {
+            "enabled": self.enabled,
+            "backend": type(self.backend).__name__,
+            **total.as_dict(),
+            "routes": {route: s.as_dict() for route, s in sorted(self.routes.items())},
+        }
+
+
+def _backend() -> SharedCache:
+    if settings.RESPONSE_CACHE_BACKEND == "shared":
+        shared = shared_cache_from_url(settings.SHARED_CACHE_URL)
+        if shared is None:
+            raise ValueError("RESPONSE_CACHE_BACKEND=shared requires SHARED_CACHE_URL (local:// for a stand-in)")
+        return shared
+    return MemoryCache(max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES)
+
+
+response_cache = ResponseCache(_backend(), enabled=settings.RESPONSE_CACHE_ENABLED)
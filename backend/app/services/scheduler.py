@@ -0,0 +1,193 @@
+"""
+Event lifecycle scheduler
+Closes open events once their closes_at passes, so late predictions are
+refused and open listings drop them. Runs as an asyncio task in the app
+lifespan (SCHEDULER_ENABLED), or standalone:
+
+    python -m app.services.scheduler
+
+A standalone scheduler reaches the API workers' response caches and odds
+feeds only through RESPONSE_CACHE_BACKEND=shared and ODDS_BROKER_URL;
+otherwise they catch up at TTL expiry.
+
+Due events are closed in batches of SCHEDULER_BATCH_SIZE, oldest deadline
+first, through ix_events_status_closes_at_id. Then the scheduler sleeps until
+the next deadline (at most SCHEDULER_MAX_SLEEP_SECONDS). New events wake it
+early: admin_create_event calls notify() locally and, on Postgres,
+notify_deadline() sends a NOTIFY on commit.
+
+Leader election (Postgres): only the worker holding the session-level
+advisory lock SCHEDULER_LOCK_KEY closes events. The leader holds the lock on
+a dedicated connection, which also LISTENs for the deadline notifications.
+If that connection dies, the lock is released and another worker takes over
+within SCHEDULER_LEADER_RETRY_SECONDS. SQLite has no advisory locks, so each
+process leads; run one process there.
+"""
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import List, Optional
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, async_engine
+from app.models.event import Event
+from app.services.counters import add_to_counters
+from app.services.odds_feed import ODDS_COLUMNS, publish_odds
+from app.services.response_cache import response_cache
+
+logger = logging.getLogger(__name__)
+
+SCHEDULER_LOCK_KEY = 0x636C6177686F7572  # pg advisory lock key, arbitrary but fixed
+DEADLINE_CHANNEL = "clawhub_event_deadlines"
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _aware(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)  # SQLite drops tz
+
+
+async def close_due_events(db: AsyncSession, now: datetime, limit: int) -> List:
+    """Close up to `limit` open events whose closes_at has passed and commit; returns their ODDS_COLUMNS rows"""
+    due = (
+        select(Event.id)
+        .where(Event.status == "open", Event.closes_at <= now)
+        .order_by(Event.closes_at, Event.id)
+        .limit(limit)
+    )
+    closed = (await db.execute(
+        update(Event)
+        .where(Event.id.in_(due.scalar_subquery()), Event.status == "open")
+        .values(status="closed")
+        .returning(*ODDS_COLUMNS)
+        .execution_options(synchronize_session=False)
+    )).all()
+    if closed:
+        await add_to_counters(db, open_events=-len(closed))
+    await db.commit()
+    if closed:
+        await response_cache.invalidate("event-list", *(f"event:{row.id}" for row in closed))
+        await publish_odds(*closed)
+    return closed
+
+
+async def next_deadline(db: AsyncSession) -> Optional[datetime]:
+    """Earliest closes_at among open events"""
+    deadline = await db.scalar(select(func.min(Event.closes_at)).where(Event.status == "open"))
+    return _aware(deadline) if deadline is not None else None
+
+
+async def notify_deadline(db: AsyncSession):
+    """Wake the scheduler leader in any worker when the caller's transaction commits (Postgres only)"""
+    if db.bind.dialect.name == "postgresql":
+        await db.execute(select(func.pg_notify(DEADLINE_CHANNEL, "")))
+
+
+class EventScheduler:
+    def __init__(self, session_factory=AsyncSessionLocal, engine=async_engine):
+        self.session_factory = session_factory
+        self.engine = engine
+        self.is_leader = False
+        self.closed = 0
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def notify(self):
+        """Re-read the next deadline now, e.g. after creating an event"""
+        self._wakeup.set()
+
+    async def run_once(self) -> Optional[datetime]:
+        """Close every due event; returns the next deadline"""
+        async with self.session_factory() as db:
+            while True:
+                closed = await close_due_events(db, _now(), settings.SCHEDULER_BATCH_SIZE)
+                self.closed += len(closed)
+                if closed:
+                    logger.info("Closed %d events past their deadline", len(closed))
+                if len(closed) < settings.SCHEDULER_BATCH_SIZE:
+                    break
+                await asyncio.sleep(0)  # let the request handlers run between batches
+            return await next_deadline(db)
+
+    async def _schedule(self, leader_connection: Optional[AsyncConnection] = None):
+        """Close events at their deadlines for as long as leadership lasts"""
+        while True:
+            self._wakeup.clear()
+            deadline = await self.run_once()
+            if leader_connection is not None:
+                await leader_connection.execute(select(1))  # raises once the lock's connection is gone
+            timeout = settings.SCHEDULER_MAX_SLEEP_SECONDS
+            if deadline is not None:
+                timeout = min(timeout, max((deadline - _now()).total_seconds(), 0))
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _lead(self):
+        """Take leadership if it is free and schedule until it is lost"""
+        if self.engine.dialect.name != "postgresql":
+            self.is_leader = True
+            await self._schedule()
+            return
+        async with self.engine.connect() as connection:
+            # Autocommit: the lock is held by the session, not by an open transaction
+            connection = await connection.execution_options(isolation_level="AUTOCOMMIT")
+            if not await connection.scalar(select(func.pg_try_advisory_lock(SCHEDULER_LOCK_KEY))):
+                return
+            try:
+                raw = (await connection.get_raw_connection()).driver_connection
+                await raw.add_listener(DEADLINE_CHANNEL, lambda *args: self.notify())
+                self.is_leader = True
+                logger.info("Event scheduler is the leader")
+                await self._schedule(connection)
+            finally:
+                self.is_leader = False
+                # Closing the connection releases the lock and the listener, even mid-failure
+                await connection.invalidate()
+
+    async def _loop(self):
+        while True:
+            try:
+                await self._lead()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Event scheduler iteration failed")
+            await asyncio.sleep(settings.SCHEDULER_LEADER_RETRY_SECONDS)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {"running": self._task is not None, "leader": self.is_leader, "closed": self.closed}
+
+
+event_scheduler = EventScheduler()
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    async def run():
+        event_scheduler.start()
+        await event_scheduler._task
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
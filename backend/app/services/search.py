@@ -0,0 +1,260 @@
+"""
+Full-text search over events and prediction reasoning
+On Postgres, search runs on the stored tsvector columns from migration 0004
+and their GIN indexes. Queries use websearch_to_tsquery syntax: "quoted
+phrases", `or`, and -word to exclude. Results are ranked by ts_rank_cd, with
+event titles and tags weighted above descriptions. Postgres keeps the
+columns current on every write.
+
+Other databases (SQLite for local runs and tests) use an in-process inverted
+index with BM25 ranking and the same field weights. Every word is required,
+-word excludes, and `or` is ignored. Words are lowercased and plurals are
+folded, with no further stemming, so ranks and some matches differ from
+Postgres. The index loads on the first search. Create paths in this process
+add new rows as they commit (index_created). Each search also picks up rows
+above the highest indexed id, which covers other processes: SQLite commits
+one writer at a time, so new ids always land above that watermark. Events
+and predictions are never edited or deleted through the API, so nothing
+else needs reindexing.
+
+Both backends page on (rank, id), best match first, with the usual opaque
+cursor.
+"""
+import asyncio
+import math
+import re
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+from sqlalchemy import Float, func, literal_column, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.pagination import Keyset, decode_cursor, encode_cursor
+from app.models.event import Event
+from app.models.prediction import Prediction
+
+# Postgres-only schema objects from migration 0004, not declared on the models
+SEARCH_OBJECTS = {"search_vector", "ix_events_search_vector", "ix_predictions_search_vector"}
+
+# ts_rank_cd's default weight for each label
+WEIGHTS = {"A": 1.0, "B": 0.4, "C": 0.2, "D": 0.1}
+
+TS_CONFIG = literal_column("'english'")
+
+# Fallback index: rows per catch-up query, candidates per SQL filter query
+LOAD_BATCH = 5000
+FILTER_CHUNK = 500
+
+
+@dataclass(frozen=True)
+class Corpus:
+    """A searchable table: its model and (field, weight label) pairs, as in migration 0004"""
+    model: Any
+    fields: Tuple[Tuple[str, str], ...]
+
+    @property
+    def vector(self):
+        return literal_column(f"{self.model.__tablename__}.search_vector")
+
+
+EVENTS = Corpus(Event, (("title", "A"), ("tags", "A"), ("description", "B")))
+PREDICTIONS = Corpus(Prediction, (("reasoning", "D"),))
+
+
+@dataclass
+class SearchPage:
+    ids: List[int]  # best match first
+    next_cursor: Optional[str]
+
+
+# ---------- text processing (fallback) ----------
+
+WORD = re.compile(r"[^\W_]+")
+STOPWORDS = frozenset(
+    "a an and are as at be been but by can do for from has have he if in into is it its "
+    "no not of on or she so such than that the their then there these they this to was "
+    "were which will with would you".split()
+)
+
+
+def _fold(word: str) -> str:
+    """Plural to singular, roughly (events -> event, rallies -> rally)"""
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    return [_fold(word) for word in WORD.findall(text.lower()) if word not in STOPWORDS and len(word) > 1]
+
+
+def parse_query(q: str) -> Tuple[List[str], List[str]]:
+    """(required terms, excluded terms); quoted phrases count as their words"""
+    required, excluded = [], []
+    for negated, phrase, word in re.findall(r'(-?)(?:"([^"]*)"|(\S+))', q):
+        (excluded if negated else required).extend(tokenize(phrase or word))
+    return required, excluded
+
+
+def _field(document: Any, name: str) -> Any:
+    return document[name] if isinstance(document, Mapping) else getattr(document, name)
+
+
+# ---------- fallback index ----------
+
+class InvertedIndex:
+    """BM25 over one corpus, held in memory"""
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self, corpus: Corpus):
+        self.corpus = corpus
+        self.postings: Dict[str, Dict[int, float]] = defaultdict(dict)  # term -> {id: weighted term frequency}
+        self.terms_of: Dict[int, set] = {}
+        self.length: Dict[int, int] = {}
+        self.total_length = 0
+        self.max_id = 0  # every row up to here is indexed
+        self.loaded = False
+        self._lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return len(self.length)
+
+    def add(self, doc_id: int, document: Any):
+        """Index (or reindex) a row; `document` maps field names to text (tags: a list)"""
+        self.remove(doc_id)
+        counts: Dict[str, float] = defaultdict(float)
+        length = 0
+        for name, label in self.corpus.fields:
+            value = _field(document, name)
+            text = " ".join(value) if isinstance(value, (list, tuple)) else (value or "")
+            for term in tokenize(text):
+                counts[term] += WEIGHTS[label]
+                length += 1
+        for term, frequency in counts.items():
+            self.postings[term][doc_id] = frequency
+        self.terms_of[doc_id] = set(counts)
+        self.length[doc_id] = length
+        self.total_length += length
+
+    def remove(self, doc_id: int):
+        terms = self.terms_of.pop(doc_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            postings = self.postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self.postings[term]
+        self.total_length -= self.length.pop(doc_id)
+
+    def add_created(self, documents: Sequence[Any]):
+        """Index rows this process just committed, moving the watermark over them if there is no gap"""
+        for document in sorted(documents, key=lambda document: _field(document, "id")):
+            doc_id = _field(document, "id")
+            self.add(doc_id, document)
+            if doc_id == self.max_id + 1:
+                self.max_id = doc_id
+
+    async def catch_up(self, db: AsyncSession):
+        """Index every row above the watermark (all rows on the first call)"""
+        model = self.corpus.model
+        columns = [getattr(model, name) for name, _ in self.corpus.fields]
+        async with self._lock:
+            while True:
+                rows = (await db.execute(
+                    select(model.id, *columns).where(model.id > self.max_id).order_by(model.id).limit(LOAD_BATCH)
+                )).all()
+                for row in rows:
+                    self.add(row.id, row._mapping)
+                if rows:
+                    self.max_id = max(self.max_id, rows[-1].id)
+                if len(rows) < LOAD_BATCH:
+                    break
+            self.loaded = True
+
+    def search(self, required: Sequence[str], excluded: Sequence[str] = ()) -> List[Tuple[float, int]]:
+        """(score, id) of rows with every required term and no excluded one, best first"""
+        if not required:
+            return []
+        postings = [self.postings.get(term) for term in dict.fromkeys(required)]
+        if not all(postings):
+            return []
+        postings.sort(key=len)
+        candidates = set(postings[0]).intersection(*postings[1:])
+        for term in excluded:
+            candidates.difference_update(self.postings.get(term, ()))
+
+        n = len(self.length)
+        average_length = self.total_length / n or 1
+        scores = dict.fromkeys(candidates, 0.0)
+        for term_postings in postings:
+            idf = math.log(1 + (n - len(term_postings) + 0.5) / (len(term_postings) + 0.5))
+            for doc_id in candidates:
+                frequency = term_postings[doc_id]
+                norm = self.K1 * (1 - self.B + self.B * self.length[doc_id] / average_length)
+                scores[doc_id] += idf * frequency * (self.K1 + 1) / (frequency + norm)
+        return sorted(((score, doc_id) for doc_id, score in scores.items()), reverse=True)
+
+
+fallback_indexes = {corpus: InvertedIndex(corpus) for corpus in (EVENTS, PREDICTIONS)}
+
+
+def index_created(db: AsyncSession, corpus: Corpus, *documents: Any):
+    """Add committed rows (ORM objects or mappings with id and the corpus fields) to the fallback index"""
+    index = fallback_indexes[corpus]
+    # Postgres maintains its generated columns itself; an unloaded index reads them on the first search
+    if db.bind.dialect.name == "postgresql" or not index.loaded:
+        return
+    index.add_created(documents)
+
+
+# ---------- search ----------
+
+async def search(db: AsyncSession, corpus: Corpus, q: str, filters: Sequence[Any] = (),
+                 cursor: Optional[str] = None, limit: int = 20) -> SearchPage:
+    """Ids of rows matching `q` and the SQL `filters`, best first (raises InvalidCursor)"""
+    if db.bind.dialect.name == "postgresql":
+        return await _search_postgres(db, corpus, q, filters, cursor, limit)
+    return await _search_fallback(db, corpus, q, filters, cursor, limit)
+
+
+def postgres_query(corpus: Corpus, q: str, filters: Sequence[Any] = ()) -> Tuple[Any, Keyset]:
+    """(id, rank) of matching rows, and the keyset to page them with"""
+    tsquery = func.websearch_to_tsquery(TS_CONFIG, q)
+    rank = func.ts_rank_cd(corpus.vector, tsquery, type_=Float).label("rank")
+    query = select(corpus.model.id, rank).where(corpus.vector.op("@@")(tsquery), *filters)
+    return query, Keyset(rank, corpus.model.id, descending=True)
+
+
+async def _search_postgres(db: AsyncSession, corpus: Corpus, q: str, filters: Sequence[Any],
+                           cursor: Optional[str], limit: int) -> SearchPage:
+    query, keyset = postgres_query(corpus, q, filters)
+    rows = (await db.execute(keyset.paginate(query, cursor, limit))).all()
+    return SearchPage([row.id for row in rows], keyset.next_cursor(rows, limit))
+
+
+async def _search_fallback(db: AsyncSession, corpus: Corpus, q: str, filters: Sequence[Any],
+                           cursor: Optional[str], limit: int) -> SearchPage:
+    after = tuple(decode_cursor(cursor, (float, int))) if cursor else None
+    index = fallback_indexes[corpus]
+    await index.catch_up(db)
+    matches = index.search(*parse_query(q))
+    if after:
+        matches = [match for match in matches if match < after]
+
+    page = []
+    for start in range(0, len(matches), FILTER_CHUNK):
+        chunk = matches[start:start + FILTER_CHUNK]
+        if filters:
+            keep = set((await db.execute(
+                select(corpus.model.id).where(corpus.model.id.in_([doc_id for _, doc_id in chunk]), *filters)
+            )).scalars())
+            chunk = [match for match in chunk if match[1] in keep]
+        page.extend(chunk)
+        if len(page) >= limit:
+            break
+    page = page[:limit]
+    next_cursor = encode_cursor(*page[-1]) if len(page) == limit else None
+    return SearchPage([doc_id for _, doc_id in page], next_cursor)
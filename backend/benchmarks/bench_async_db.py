@@ -0,0 +1,154 @@
+"""
+Load benchmark: sync Session vs AsyncSession request paths.
+
+Drives the app in-process with concurrent httpx clients and reports
+requests/sec for the same read endpoints served two ways:
+  sync  - `async def` handlers calling a blocking Session (the old pattern)
+  async - the real routers on AsyncSession (asyncpg / aiosqlite)
+
+Usage (from backend/):
+    python -m benchmarks.bench_async_db --clients 50 --requests 2000
+    python -m benchmarks.bench_async_db --database-url postgresql://...
+
+SQLite serializes on one file, so the gap is much wider on Postgres.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import create_engine, desc, func
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import Settings
+from app.core.database import Base, get_db
+from app.main import app as async_app
+from app.models.agent import Agent
+from app.models.event import Event
+from app.models.prediction import Prediction
+from benchmarks.bench_resolve_event import seed
+
+PATHS = [
+    "/v1/agents/?limit=50",
+    "/v1/stats/",
+    "/v1/events/{event_id}",
+    "/v1/agents/bench_agent_{n}",
+]
+
+
+def build_sync_app(session_factory) -> FastAPI:
+    """The same endpoints on a blocking Session, as the routers used to be"""
+    app = FastAPI()
+
+    @app.get("/v1/agents/")
+    async def leaderboard(skip: int = 0, limit: int = 100):
+        with session_factory() as db:
+            return [
+                {"id": a.id, "username": a.username, "reputation": a.reputation}
+                for a in db.query(Agent).order_by(desc(Agent.reputation)).offset(skip).limit(limit).all()
+            ]
+
+    @app.get("/v1/stats/")
+    async def stats():
+        with session_factory() as db:
+            return {
+                "totalAgents": db.query(func.count(Agent.id)).scalar(),
+                "totalSubmissions": db.query(func.count(Prediction.id)).scalar(),
+                "activeChallenges": db.query(func.count(Event.id)).filter(Event.status == "open").scalar(),
+                "totalChallenges": db.query(func.count(Event.id)).scalar(),
+            }
+
+    @app.get("/v1/events/{event_id}")
+    async def event(event_id: int):
+        with session_factory() as db:
+            e = db.query(Event).filter(Event.id == event_id).first()
+            return {"id": e.id, "title": e.title, "status": e.status}
+
+    @app.get("/v1/agents/{username}")
+    async def agent(username: str):
+        with session_factory() as db:
+            a = db.query(Agent).filter(Agent.username == username).first()
+            return {"id": a.id, "username": a.username}
+
+    return app
+
+
+async def drive(app, clients: int, total: int, event_id: int, n_agents: int) -> dict:
+    """Fire `total` GETs from `clients` concurrent clients; return throughput"""
+    transport = httpx.ASGITransport(app=app)
+    counter = iter(range(total))
+    errors = 0
+
+    async def client():
+        nonlocal errors
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+            for i in counter:
+                path = PATHS[i % len(PATHS)].format(event_id=event_id, n=i % n_agents)
+                response = await http.get(path)
+                if response.status_code != 200:
+                    errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    elapsed = time.perf_counter() - started
+    return {"requests": total, "seconds": round(elapsed, 3), "rps": round(total / elapsed, 1), "errors": errors}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--agents", type=int, default=2000)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    tmpdir = None
+    url = args.database_url
+    if not url:
+        tmpdir = tempfile.TemporaryDirectory()
+        url = f"sqlite:///{os.path.join(tmpdir.name, 'bench.db')}"
+    async_url = Settings(DATABASE_URL=url).async_database_url
+
+    engine = create_engine(url)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    SyncSession = sessionmaker(bind=engine, autoflush=False)
+    async_engine = create_async_engine(async_url)
+    AsyncSession = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    async def get_bench_db():
+        async with AsyncSession() as db:
+            yield db
+
+    async_app.dependency_overrides[get_db] = get_bench_db
+
+    try:
+        with SyncSession() as db:
+            event_id = seed(db, args.agents).id
+
+        async def run_all():
+            results = {}
+            for name, app in (("sync", build_sync_app(SyncSession)), ("async", async_app)):
+                await drive(app, args.clients, min(200, args.requests), event_id, args.agents)  # warm-up
+                results[name] = await drive(app, args.clients, args.requests, event_id, args.agents)
+            await async_engine.dispose()
+            return results
+
+        results = asyncio.run(run_all())
+        print(f"backend: {engine.dialect.name}, clients: {args.clients}")
+        for name, r in results.items():
+            print(f"{name:>5}: {r['rps']:>8} req/s  ({r['requests']} requests in {r['seconds']}s, {r['errors']} errors)")
+    finally:
+        async_app.dependency_overrides.pop(get_db, None)
+        Base.metadata.drop_all(engine)
+        engine.dispose()
+        if tmpdir:
+            tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Benchmark: one POST /v1/predictions/batch vs one POST per prediction.
+
+An agent predicts on --events open events, first with a request per event,
+then (as a second agent) with batches of --batch-size. Reports wall time,
+requests and SQL statements (X-DB-Queries) for each, and checks the event
+and agent counters match the rows written. Exits 1 on any mismatch.
+
+Usage (from backend/):
+    python -m benchmarks.bench_bulk_predictions --events 100 --batch-size 100
+    python -m benchmarks.bench_bulk_predictions --database-url postgresql://...
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+import httpx
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+
+from app.core import metrics
+from app.core.config import Settings, settings
+from app.core.database import Base, get_db
+from app.main import app
+from app.models.agent import Agent
+from app.models.event import Event
+from app.models.prediction import Prediction
+from app.services.auth_cache import api_key_cache
+
+
+def item(event_id: int) -> dict:
+    return {
+        "event_id": event_id,
+        "prediction": "YES" if event_id % 2 else "NO",
+        "confidence": 60,
+        "reasoning": "Benchmark submission " + "x" * 100,
+    }
+
+
+async def submit(event_ids: list, batch_size: int) -> dict:
+    """Single requests (agent 1) then batches (agent 2) over the same events"""
+    transport = httpx.ASGITransport(app=app)
+    results = {}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+        for name, api_key in (("single", "bench_key_1"), ("batch", "bench_key_2")):
+            headers = {"Authorization": f"Bearer {api_key}"}
+            requests = queries = created = 0
+            started = time.perf_counter()
+            if name == "single":
+                for event_id in event_ids:
+                    response = await http.post("/v1/predictions/", headers=headers, json=item(event_id))
+                    requests += 1
+                    queries += int(response.headers["X-DB-Queries"])
+                    created += response.status_code == 200
+            else:
+                for i in range(0, len(event_ids), batch_size):
+                    items = [item(event_id) for event_id in event_ids[i:i + batch_size]]
+                    response = await http.post("/v1/predictions/batch", headers=headers, json={"items": items})
+                    response.raise_for_status()
+                    requests += 1
+                    queries += int(response.headers["X-DB-Queries"])
+                    created += response.json()["created"]
+            results[name] = {
+                "seconds": time.perf_counter() - started,
+                "requests": requests,
+                "queries": queries,
+                "created": created,
+            }
+    return results
+
+
+def verify(db, event_ids: list) -> list:
+    """Event counters and agent totals against the prediction rows"""
+    errors = []
+    for event in db.scalars(select(Event).where(Event.id.in_(event_ids))):
+        rows = dict(db.execute(
+            select(Prediction.prediction, func.count()).where(Prediction.event_id == event.id).group_by(Prediction.prediction)
+        ).all())
+        if (event.total_predictions, event.yes_count, event.no_count) != (sum(rows.values()), rows.get("YES", 0), rows.get("NO", 0)):
+            errors.append(f"event {event.id}: counters {event.total_predictions}/{event.yes_count}/{event.no_count} != rows {rows}")
+    for agent in db.scalars(select(Agent)):
+        predictions = db.scalar(select(func.count()).where(Prediction.agent_id == agent.id))
+        if (agent.total_predictions, agent.reputation) != (predictions, 100 + 10 * predictions):
+            errors.append(f"agent {agent.id}: {agent.total_predictions} predictions / {agent.reputation} REP for {predictions} rows")
+    return errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    tmpdir = None
+    url = args.database_url
+    if not url:
+        tmpdir = tempfile.TemporaryDirectory()
+        url = f"sqlite:///{os.path.join(tmpdir.name, 'bench.db')}"
+
+    engine = create_engine(url)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    async_engine = create_async_engine(Settings(DATABASE_URL=url).async_database_url)
+    metrics.instrument_engine(async_engine.sync_engine)
+    AsyncSession = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    async def get_bench_db():
+        async with AsyncSession() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = get_bench_db
+    settings.DB_METRICS_HEADERS = True
+
+    try:
+        with sessionmaker(bind=engine)() as db:
+            db.add_all([
+                Agent(username=f"bench_agent_{i}", api_key=f"bench_key_{i}", reputation=100, total_predictions=0)
+                for i in (1, 2)
+            ])
+            now = datetime.now(timezone.utc)
+            events = [
+                Event(title=f"Bulk event {i}", description="Bulk", resolution_criteria="Bulk",
+                      closes_at=now + timedelta(days=1), resolves_at=now + timedelta(days=2), category="benchmark")
+                for i in range(args.events)
+            ]
+            db.add_all(events)
+            db.commit()
+            event_ids = [event.id for event in events]
+
+        async def run():
+            result = await submit(event_ids, args.batch_size)
+            await async_engine.dispose()
+            return result
+
+        results = asyncio.run(run())
+        with sessionmaker(bind=engine)() as db:
+            errors = verify(db, event_ids)
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+        api_key_cache.local.clear()
+        Base.metadata.drop_all(engine)
+        engine.dispose()
+        if tmpdir:
+            tmpdir.cleanup()
+
+    print(f"backend: {engine.dialect.name}, events: {args.events}, batch size: {args.batch_size}")
+    for name, r in results.items():
+        print(f"{name:>7}: {r['seconds'] * 1000:>8.1f} ms  {r['requests']:>5} requests  "
+              f"{r['queries']:>6} statements  {r['created']} created")
+    for error in errors[:20]:
+        print("FAIL", error)
+    print("counters exact" if not errors else f"{len(errors)} mismatches")
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
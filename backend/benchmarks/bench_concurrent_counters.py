@@ -0,0 +1,165 @@
+"""
+Stress test: concurrent predictions and likes keep every counter exact.
+
+Each agent submits one prediction on a shared event and likes one shared
+prediction, all from concurrent clients. Afterwards the denormalized
+counters (event totals / yes / no / percentages, like_count, agent
+reputation and total_predictions) are checked against the rows actually
+written. Exits 1 on any mismatch.
+
+Usage (from backend/):
+    python -m benchmarks.bench_concurrent_counters --agents 500 --clients 50
+    python -m benchmarks.bench_concurrent_counters --database-url postgresql://...
+
+SQLite serializes writers, so it checks correctness more than throughput;
+run it against Postgres for contention numbers.
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+import httpx
+from sqlalchemy import String, cast, create_engine, func, literal, select, update
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import Settings, settings
+from app.core.database import Base, get_db
+from app.main import app
+from app.models.agent import Agent
+from app.models.event import Event
+from app.models.prediction import Prediction, PredictionLike
+from app.services.auth_cache import api_key_cache
+from benchmarks.bench_resolve_event import seed
+
+
+async def submit_all(n_agents: int, clients: int, event_id: int, liked_id: int) -> dict:
+    """Every agent predicts on event_id and likes liked_id, in random order"""
+    transport = httpx.ASGITransport(app=app)
+    work = [("predict", i) for i in range(n_agents)] + [("like", i) for i in range(n_agents)]
+    random.Random(7).shuffle(work)
+    queue = iter(work)
+    statuses = {}
+
+    async def client():
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+            for action, i in queue:
+                headers = {"Authorization": f"Bearer bench_key_{i}"}
+                if action == "predict":
+                    response = await http.post("/v1/predictions/", headers=headers, json={
+                        "event_id": event_id,
+                        "prediction": "YES" if i % 3 else "NO",
+                        "confidence": 60,
+                        "reasoning": "Stress test submission " + "x" * 100,
+                    })
+                else:
+                    response = await http.post(f"/v1/predictions/{liked_id}/like", headers=headers)
+                key = f"{action} {response.status_code}"
+                statuses[key] = statuses.get(key, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    elapsed = time.perf_counter() - started
+    return {"requests": len(work), "seconds": round(elapsed, 3), "rps": round(len(work) / elapsed, 1), "statuses": statuses}
+
+
+def verify(db, event_id: int, liked_id: int, reputation_before: dict) -> list:
+    """Compare denormalized counters with the rows behind them"""
+    errors = []
+    event = db.get(Event, event_id)
+    rows = dict(db.execute(
+        select(Prediction.prediction, func.count()).where(Prediction.event_id == event_id).group_by(Prediction.prediction)
+    ).all())
+    total = sum(rows.values())
+    if (event.total_predictions, event.yes_count, event.no_count) != (total, rows.get("YES", 0), rows.get("NO", 0)):
+        errors.append(f"event counters {event.total_predictions}/{event.yes_count}/{event.no_count} != rows {total}/{rows}")
+    if total and abs(float(event.yes_percentage) - rows.get("YES", 0) * 100 / total) > 0.01:
+        errors.append(f"yes_percentage {event.yes_percentage} is stale")
+
+    liked = db.get(Prediction, liked_id)
+    likes = db.scalar(select(func.count()).where(PredictionLike.prediction_id == liked_id))
+    if liked.like_count != likes:
+        errors.append(f"like_count {liked.like_count} != {likes} likes")
+
+    predicted = set(db.scalars(select(Prediction.agent_id).where(Prediction.event_id == event_id)))
+    likers = set(db.scalars(select(PredictionLike.agent_id).where(PredictionLike.prediction_id == liked_id)))
+    for agent_id, reputation in db.execute(select(Agent.id, Agent.reputation)):
+        expected = reputation_before[agent_id] + 10 * (agent_id in predicted) + 5 * (agent_id in likers)
+        if agent_id == liked.agent_id:
+            expected += 5 * likes
+        if reputation != expected:
+            errors.append(f"agent {agent_id}: reputation {reputation} != {expected}")
+    return errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--agents", type=int, default=500)
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    tmpdir = None
+    url = args.database_url
+    if not url:
+        tmpdir = tempfile.TemporaryDirectory()
+        url = f"sqlite:///{os.path.join(tmpdir.name, 'bench.db')}"
+
+    engine = create_engine(url)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    connect_args = {"timeout": 60} if url.startswith("sqlite") else {}
+    async_engine = create_async_engine(Settings(DATABASE_URL=url).async_database_url, connect_args=connect_args)
+    AsyncSession = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    async def get_bench_db():
+        async with AsyncSession() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = get_bench_db
+    settings.DB_METRICS_HEADERS = False
+
+    try:
+        with sessionmaker(bind=engine)() as db:
+            seed(db, args.agents)  # agents bench_agent_{i} (id i + 1), each with one prediction
+            liked_id = db.scalar(select(func.min(Prediction.id)))
+            db.execute(update(Agent).values(api_key=literal("bench_key_") + cast(Agent.id - 1, String)))
+            now = datetime.now(timezone.utc)
+            event = Event(title="Stress event", description="Stress", resolution_criteria="Stress",
+                          closes_at=now + timedelta(days=1), resolves_at=now + timedelta(days=2), category="benchmark")
+            db.add(event)
+            db.commit()
+            event_id = event.id
+            reputation_before = dict(db.execute(select(Agent.id, Agent.reputation)).all())
+
+        async def run():
+            result = await submit_all(args.agents, args.clients, event_id, liked_id)
+            await async_engine.dispose()
+            return result
+
+        result = asyncio.run(run())
+        with sessionmaker(bind=engine)() as db:
+            errors = verify(db, event_id, liked_id, reputation_before)
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+        api_key_cache.local.clear()
+        Base.metadata.drop_all(engine)
+        engine.dispose()
+        if tmpdir:
+            tmpdir.cleanup()
+
+    print(f"backend: {engine.dialect.name}, agents: {args.agents}, clients: {args.clients}")
+    print(f"{result['requests']} requests in {result['seconds']}s ({result['rps']} req/s), statuses: {result['statuses']}")
+    for error in errors[:20]:
+        print("FAIL", error)
+    print("counters exact" if not errors else f"{len(errors)} mismatches")
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Benchmark: deep event listing pages, OFFSET vs keyset cursor.
+
+Seeds --events resolved events. It then walks the whole
+`GET /events/?status=resolved&order=desc` listing twice, --page rows at a
+time. The first walk uses OFFSET, as the old endpoint did. The second walk
+follows the keyset cursor. It reports the time per page at the start and
+end of each walk. OFFSET pages get slower the deeper they go; cursor pages
+do not.
+
+Usage (from backend/):
+    python -m benchmarks.bench_event_pagination --events 200000
+    python -m benchmarks.bench_event_pagination --database-url postgresql://...
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, insert, select, text
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.event import Event
+from app.routes.events import EVENT_ORDERS
+from benchmarks.check_indexes import ALEMBIC_INI
+
+
+def walk(db, page: int, use_cursor: bool) -> list:
+    """Seconds per page for the whole listing"""
+    keyset = EVENT_ORDERS["desc"]
+    query = select(Event).where(Event.status == "resolved")
+    timings, cursor, offset = [], None, 0
+    while True:
+        started = time.perf_counter()
+        if use_cursor:
+            rows = db.execute(keyset.paginate(query, cursor, page)).scalars().all()
+            cursor = keyset.next_cursor(rows, page)
+        else:
+            rows = db.execute(keyset.paginate(query, None, page).offset(offset)).scalars().all()
+            offset += page
+        timings.append(time.perf_counter() - started)
+        db.expunge_all()
+        if len(rows) < page or (use_cursor and not cursor):
+            return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, default=200000)
+    parser.add_argument("--page", type=int, default=100)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    tmpdir = None
+    url = args.database_url
+    if not url:
+        tmpdir = tempfile.TemporaryDirectory()
+        url = f"sqlite:///{os.path.join(tmpdir.name, 'bench.db')}"
+
+    engine = create_engine(url)
+    Base.metadata.drop_all(engine)
+    with engine.begin() as connection:
+        connection.execute(text("DROP TABLE IF EXISTS alembic_version"))
+    config = Config(ALEMBIC_INI)
+    config.attributes["configure_logger"] = False
+    try:
+        with engine.connect() as connection:
+            config.attributes["connection"] = connection
+            command.upgrade(config, "head")
+            connection.commit()
+        with sessionmaker(bind=engine)() as db:
+            start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+            for first in range(0, args.events, 10000):
+                db.execute(insert(Event), [
+                    {
+                        "title": f"Past event {i}", "description": "Past", "resolution_criteria": "Past",
+                        "closes_at": start + timedelta(hours=i // 3),  # ties: three events per closing time
+                        "resolves_at": start + timedelta(hours=i // 3 + 1),
+                        "status": "resolved", "result": "YES", "category": "benchmark",
+                    }
+                    for i in range(first, min(first + 10000, args.events))
+                ])
+            db.commit()
+
+            results = {name: walk(db, args.page, use_cursor) for name, use_cursor in (("offset", False), ("cursor", True))}
+    finally:
+        Base.metadata.drop_all(engine)
+        with engine.begin() as connection:
+            connection.execute(text("DROP TABLE IF EXISTS alembic_version"))
+        engine.dispose()
+        if tmpdir:
+            tmpdir.cleanup()
+
+    print(f"backend: {engine.dialect.name}, {args.events} resolved events, {args.page} per page")
+    for name, timings in results.items():
+        tenth = max(len(timings) // 10, 1)
+        print(f"{name:>7}: {len(timings)} pages in {sum(timings):.2f}s; "
+              f"first 10% {statistics.mean(timings[:tenth]) * 1000:.2f} ms/page, "
+              f"last 10% {statistics.mean(timings[-tenth:]) * 1000:.2f} ms/page")
+
+
+if __name__ == "__main__":
+    main()
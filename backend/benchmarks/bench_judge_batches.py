@@ -0,0 +1,79 @@
+"""
+Benchmark: batched, parallel judging vs one prompt holding every submission.
+
+Judges synthetic submissions with the fake scorer (--delay seconds per
+generated line stands in for model latency) and reports wall time, model
+calls, rounds, the largest prompt sent (context budget) and the winner for
+each batch size / concurrency setting. The first row is the old shape:
+every submission in a single prompt.
+
+Usage (from backend/):
+    python -m benchmarks.bench_judge_batches --submissions 200 --delay 0.002
+    python -m benchmarks.bench_judge_batches --configs 10x1,10x4,10x8,25x8
+"""
+import argparse
+import asyncio
+import time
+
+from app.services.ai_judge import stream_judging
+from app.services.judge_client import Challenge, FakeJudgeClient, Submission, review_prompt
+
+
+class MeasuredFakeClient(FakeJudgeClient):
+    """Fake scorer that records the largest prompt it would have sent"""
+
+    def __init__(self, delay: float):
+        super().__init__(delay=delay)
+        self.max_prompt_chars = 0
+
+    def review(self, challenge, submissions, final=False):
+        self.max_prompt_chars = max(self.max_prompt_chars, len(review_prompt(challenge, submissions, final)))
+        return super().review(challenge, submissions, final)
+
+
+async def judge(challenge, submissions, delay: float, batch_size: int, concurrency: int) -> dict:
+    client = MeasuredFakeClient(delay)
+    started = time.perf_counter()
+    async for step in stream_judging(challenge, submissions, client, batch_size=batch_size, concurrency=concurrency):
+        if step.type == "decision":
+            winner = step.data["winner_name"]
+        elif step.type == "done":
+            rounds = step.data["rounds"]
+    return {
+        "seconds": time.perf_counter() - started,
+        "calls": client.calls,
+        "rounds": rounds,
+        "max_prompt_chars": client.max_prompt_chars,
+        "winner": winner,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--submissions", type=int, default=200)
+    parser.add_argument("--delay", type=float, default=0.002, help="fake model latency per generated line (s)")
+    parser.add_argument("--configs", default="10x1,10x4,10x8,25x8",
+                        help="comma-separated BATCHxCONCURRENCY settings")
+    args = parser.parse_args()
+
+    challenge = Challenge(
+        event_id=1, title="Synthetic benchmark challenge", description="Synthetic " * 50,
+        criteria="Correctness, clarity and efficiency", category="benchmark", rep_reward=100
+    )
+    submissions = [
+        Submission(index=i, agent_id=i, agent_name=f"bench_agent_{i}", reputation=100 * i,
+                   created_at=None, solution=f"Solution {i}: " + "x" * 1500)
+        for i in range(1, args.submissions + 1)
+    ]
+    configs = [(args.submissions, 1)] + [tuple(int(v) for v in c.split("x")) for c in args.configs.split(",")]
+
+    print(f"submissions: {args.submissions}, fake model delay: {args.delay * 1000:.1f} ms/line")
+    print(f"{'batch x conc':>13} {'seconds':>8} {'calls':>6} {'rounds':>7} {'max prompt':>11}  winner")
+    for batch_size, concurrency in configs:
+        r = asyncio.run(judge(challenge, submissions, args.delay, batch_size, concurrency))
+        label = "single" if batch_size >= args.submissions else f"{batch_size} x {concurrency}"
+        print(f"{label:>13} {r['seconds']:>8.2f} {r['calls']:>6} {r['rounds']:>7} {r['max_prompt_chars']:>11}  {r['winner']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Benchmark: time-to-first-byte of the streaming judge vs a buffered one.
+
+Runs the judge over one synthetic event with the fake model backend
+(JUDGE_FAKE_DELAY seconds per generated line) and measures, at the ASGI
+boundary, when the first and last body bytes leave the app:
+  buffered - run the whole judge, then send the transcript (the old
+             judge_challenge_stream behaviour)
+  sse      - GET /v1/events/{id}/judging/stream
+
+Usage (from backend/):
+    python -m benchmarks.bench_judge_stream --submissions 20 --delay 0.05
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import Settings, settings
+from app.core.database import Base, get_db
+from app.main import app
+from app.services.ai_judge import judge_challenge
+from benchmarks.bench_resolve_event import seed
+
+
+def build_buffered_app(session_factory) -> FastAPI:
+    """The judge as it used to stream: full result first, then split into lines"""
+    buffered = FastAPI()
+
+    @buffered.get("/judge/{event_id}")
+    async def judge(event_id: int):
+        async with session_factory() as db:
+            result = await judge_challenge(event_id, db)
+
+        async def lines():
+            for line in result["analysis"].split("\n"):
+                yield line + "\n"
+        return StreamingResponse(lines(), media_type="text/plain")
+
+    return buffered
+
+
+async def timed_get(asgi_app, path: str, query: str = "") -> dict:
+    """Call the app directly and timestamp the first and last body chunks"""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": query.encode(),
+        "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 1), "server": ("bench", 80),
+    }
+    times = {"status": None, "first": None, "last": None, "bytes": 0}
+    request_sent = False
+    finished = asyncio.Event()
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await finished.wait()  # the client stays connected until the response ends
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        now = time.perf_counter()
+        if message["type"] == "http.response.start":
+            times["status"] = message["status"]
+        elif message["type"] == "http.response.body" and message.get("body"):
+            times["first"] = times["first"] or now
+            times["last"] = now
+            times["bytes"] += len(message["body"])
+        if message["type"] == "http.response.body" and not message.get("more_body"):
+            finished.set()
+
+    started = time.perf_counter()
+    await asgi_app(scope, receive, send)
+    return {
+        "status": times["status"],
+        "ttfb_ms": (times["first"] - started) * 1000,
+        "total_ms": (times["last"] - started) * 1000,
+        "bytes": times["bytes"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--submissions", type=int, default=20)
+    parser.add_argument("--delay", type=float, default=0.02, help="fake model latency per generated line (s)")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    settings.JUDGE_BACKEND = "fake"
+    settings.JUDGE_FAKE_DELAY = args.delay
+
+    tmpdir = tempfile.TemporaryDirectory()
+    url = f"sqlite:///{os.path.join(tmpdir.name, 'bench.db')}"
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    async_engine = create_async_engine(Settings(DATABASE_URL=url).async_database_url)
+    AsyncSession = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    async def get_bench_db():
+        async with AsyncSession() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = get_bench_db
+    try:
+        with sessionmaker(bind=engine)() as db:
+            event_id = seed(db, args.submissions).id
+
+        async def run_all():
+            targets = {
+                "buffered": (build_buffered_app(AsyncSession), f"/judge/{event_id}", ""),
+                "sse": (app, f"/v1/events/{event_id}/judging/stream", f"admin_key={settings.ADMIN_KEY}"),
+            }
+            results = {}
+            for name, (asgi_app, path, query) in targets.items():
+                runs = [await timed_get(asgi_app, path, query) for _ in range(args.runs)]
+                assert all(r["status"] == 200 for r in runs), runs
+                results[name] = {
+                    "ttfb_ms": statistics.median(r["ttfb_ms"] for r in runs),
+                    "total_ms": statistics.median(r["total_ms"] for r in runs),
+                    "bytes": runs[0]["bytes"],
+                }
+            await async_engine.dispose()
+            return results
+
+        results = asyncio.run(run_all())
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+        engine.dispose()
+        tmpdir.cleanup()
+
+    print(f"submissions: {args.submissions}, fake model delay: {args.delay * 1000:.0f} ms/line, median of {args.runs}")
+    for name, r in results.items():
+        print(f"{name:>8}: TTFB {r['ttfb_ms']:>9.1f} ms   total {r['total_ms']:>9.1f} ms   ({r['bytes']} bytes)")
+
+
+if __name__ == "__main__":
+    main()
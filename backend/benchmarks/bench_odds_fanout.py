@@ -0,0 +1,95 @@
+"""
+Benchmark: odds feed fan-out to many subscribers.
+
+Opens --subscribers subscriptions to one event on an OddsHub with the local
+broker. Each subscription is consumed by its own task, the way an SSE or
+WebSocket handler consumes it. The benchmark then publishes --updates odds
+updates, --rate per second. It reports how many updates were sent after
+coalescing, total deliveries, and per-delivery latency (publish to receipt,
+p50 / p99 / max). It also reports how long the last subscriber waited for
+each sent update. Run with --interval 0 to see the cost without coalescing.
+
+Usage (from backend/):
+    python -m benchmarks.bench_odds_fanout --subscribers 10000
+    python -m benchmarks.bench_odds_fanout --subscribers 10000 --interval 0 --updates 200
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from app.services.odds_feed import LocalBroker, OddsHub
+
+
+def percentile(values: list, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def run(subscribers: int, updates: int, rate: float, interval: float) -> dict:
+    hub = OddsHub(LocalBroker(), interval=interval)
+    await hub.start()
+    published_at = {}  # message text -> publish time (each sent message is one shared string)
+    latencies = []
+    last_receipt = {}
+
+    async def consume(subscription):
+        async for message in subscription:
+            now = time.perf_counter()
+            sent = published_at.get(message)
+            if sent is None:
+                sent = published_at[message] = json.loads(message)["published_at"]
+            latencies.append(now - sent)
+            last_receipt[message] = now
+
+    subscriptions = [hub.subscribe([1]) for _ in range(subscribers)]
+    tasks = [asyncio.create_task(consume(s)) for s in subscriptions]
+    await asyncio.sleep(0)
+
+    started = time.perf_counter()
+    for seq in range(1, updates + 1):
+        await hub.publish({"event_id": 1, "seq": seq, "published_at": time.perf_counter()})
+        await asyncio.sleep(1 / rate)
+    await asyncio.sleep(interval + 0.5)  # trailing coalesced update, then let every consumer drain
+    elapsed = time.perf_counter() - started
+
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    for subscription in subscriptions:
+        hub.unsubscribe(subscription)
+    await hub.stop()
+
+    fanout = [last_receipt[m] - published_at[m] for m in last_receipt]
+    return {
+        "seconds": elapsed,
+        "published": hub.received,
+        "sent": hub.sent,
+        "deliveries": hub.deliveries,
+        "received": len(latencies),
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "max_ms": max(latencies) * 1000,
+        "fanout_ms": statistics.median(fanout) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--subscribers", type=int, default=10000)
+    parser.add_argument("--updates", type=int, default=1000)
+    parser.add_argument("--rate", type=float, default=500.0, help="published updates per second")
+    parser.add_argument("--interval", type=float, default=0.25, help="coalescing interval (s); 0 sends every update")
+    args = parser.parse_args()
+
+    r = asyncio.run(run(args.subscribers, args.updates, args.rate, args.interval))
+    print(f"subscribers: {args.subscribers}, updates: {args.updates} at {args.rate:.0f}/s, coalescing: {args.interval * 1000:.0f} ms")
+    print(f"published {r['published']}, sent {r['sent']}, deliveries {r['deliveries']} "
+          f"({r['received']} read by subscribers) in {r['seconds']:.2f}s")
+    print(f"delivery latency: p50 {r['p50_ms']:.1f} ms  p99 {r['p99_ms']:.1f} ms  max {r['max_ms']:.1f} ms")
+    print(f"median time until the last subscriber has an update: {r['fanout_ms']:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+Benchmark: POST /v1/predictions latency.
+
+Seeds --agents agents and --events open events, plus a closed event. Then
+--concurrency clients submit --requests predictions through the app. Each
+submission is a new (agent, event) pair, except for a --duplicates share that
+repeat an earlier pair, and a few for the closed event and for a missing
+one. It reports p50 / p99 latency and SQL statements per request
+(X-DB-Queries) for created predictions and for each kind of rejection.
+
+Every response must have the expected status, and the event and agent
+counters must match the rows written. The benchmark exits 1 otherwise.
+
+Usage (from backend/):
+    python -m benchmarks.bench_prediction_writes --requests 2000 --concurrency 8
+    python -m benchmarks.bench_prediction_writes --database-url postgresql://...
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+import httpx
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+
+from app.core import metrics
+from app.core.config import Settings, settings
+from app.core.database import Base, get_db
+from app.main import app
+from app.models.agent import Agent
+from app.models.event import Event
+from app.services.auth_cache import api_key_cache
+from app.services.counters import recount
+from benchmarks.bench_bulk_predictions import item, verify
+
+# (kind, expected status)
+KINDS = {"created": 200, "duplicate": 400, "closed": 400, "missing": 404}
+
+
+def plan(n_requests: int, agents: int, event_ids: list, closed_id: int, duplicates: float, rng: random.Random) -> list:
+    """(kind, agent number, event id) per request, in submission order"""
+    pairs = [(agent, event_id) for agent in range(agents) for event_id in event_ids]
+    rng.shuffle(pairs)
+    requests, made = [], []
+    for _ in range(n_requests):
+        roll = rng.random()
+        if made and roll < duplicates:
+            requests.append(("duplicate", *rng.choice(made)))
+        elif roll < duplicates + 0.02:
+            requests.append(("closed", rng.randrange(agents), closed_id))
+        elif roll < duplicates + 0.04:
+            requests.append(("missing", rng.randrange(agents), 10**9))
+        elif pairs:
+            made.append(pairs.pop())
+            requests.append(("created", *made[-1]))
+    return requests
+
+
+async def submit(requests: list, concurrency: int) -> dict:
+    """Latencies (seconds) and statement counts per kind; wrong statuses under "errors" """
+    results = {kind: {"latency": [], "queries": []} for kind in KINDS}
+    errors = []
+    queue = list(reversed(requests))
+    # A duplicate must not overtake the request that creates its pair
+    in_flight = set()
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as http:
+        async def client():
+            while queue:
+                kind, agent, event_id = queue.pop()
+                while kind == "duplicate" and (agent, event_id) in in_flight:
+                    await asyncio.sleep(0)
+                in_flight.add((agent, event_id))
+                started = time.perf_counter()
+                response = await http.post(
+                    "/v1/predictions/", headers={"Authorization": f"Bearer bench_key_{agent}"}, json=item(event_id)
+                )
+                elapsed = time.perf_counter() - started
+                in_flight.discard((agent, event_id))
+                if response.status_code != KINDS[kind]:
+                    errors.append(f"{kind} ({agent}, {event_id}): {response.status_code} {response.text[:200]}")
+                results[kind]["latency"].append(elapsed)
+                results[kind]["queries"].append(int(response.headers["X-DB-Queries"]))
+
+        for agent in range(max(a for _, a, _ in requests) + 1):  # warm the API key cache
+            await http.get("/v1/agents/me", headers={"Authorization": f"Bearer bench_key_{agent}"})
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+    results["errors"] = errors
+    return results
+
+
+def percentile(values: list, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--agents", type=int, default=50)
+    parser.add_argument("--events", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duplicates", type=float, default=0.1, help="share of requests repeating an earlier pair")
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    tmpdir = None
+    url = args.database_url
+    if not url:
+        tmpdir = tempfile.TemporaryDirectory()
+        url = f"sqlite:///{os.path.join(tmpdir.name, 'bench.db')}"
+
+    engine = create_engine(url)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    async_engine = create_async_engine(Settings(DATABASE_URL=url).async_database_url)
+    metrics.instrument_engine(async_engine.sync_engine)
+    AsyncSession = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    async def get_bench_db():
+        async with AsyncSession() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = get_bench_db
+    settings.DB_METRICS_HEADERS = True
+    settings.RESPONSE_CACHE_ENABLED = False
+
+    try:
+        with sessionmaker(bind=engine)() as db:
+            db.add_all([
+                Agent(username=f"bench_agent_{i}", api_key=f"bench_key_{i}", reputation=100, total_predictions=0)
+                for i in range(args.agents)
+            ])
+            now = datetime.now(timezone.utc)
+            events = [
+                Event(title=f"Write event {i}", description="Write", resolution_criteria="Write",
+                      closes_at=now + timedelta(days=1), resolves_at=now + timedelta(days=2), category="benchmark",
+                      status="closed" if i == args.events else "open")
+                for i in range(args.events + 1)
+            ]
+            db.add_all(events)
+            db.commit()
+            event_ids = [event.id for event in events]
+
+        async def run():
+            async with AsyncSession() as db:
+                await recount(db)
+            requests = plan(args.requests, args.agents, event_ids[:-1], event_ids[-1], args.duplicates, random.Random(3))
+            started = time.perf_counter()
+            result = await submit(requests, args.concurrency)
+            result["seconds"] = time.perf_counter() - started
+            await async_engine.dispose()
+            return result
+
+        results = asyncio.run(run())
+        with sessionmaker(bind=engine)() as db:
+            errors = results["errors"] + verify(db, event_ids)
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+        api_key_cache.local.clear()
+        Base.metadata.drop_all(engine)
+        engine.dispose()
+        if tmpdir:
+            tmpdir.cleanup()
+
+    total = sum(len(results[kind]["latency"]) for kind in KINDS)
+    print(f"backend: {engine.dialect.name}, {total} requests, concurrency {args.concurrency}, "
+          f"{total / results['seconds']:.0f} requests/s")
+    for kind in KINDS:
+        latency = results[kind]["latency"]
+        if latency:
+            print(f"{kind:>9}: {len(latency):>6} requests  p50 {percentile(latency, 0.5) * 1000:7.2f} ms  "
+                  f"p99 {percentile(latency, 0.99) * 1000:7.2f} ms  "
+                  f"{statistics.mean(results[kind]['queries']):.1f} statements")
+    for error in errors[:20]:
+        print("FAIL", error)
+    print("statuses and counters exact" if not errors else f"{len(errors)} mismatches")
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark: vectorized reputation backtest.
+
+Parity: the benchmark seeds a small database and resolves it through the
+live SQL path (apply_resolution). It then replays the history with the live
+rule. Every agent's replayed REP must equal its stored REP, and every
+replayed tier must equal its stored tier. The benchmark exits 1 if not.
+
+Scale: the benchmark replays a synthetic history of --predictions predictions
+over --agents agents, once with the live rule and once with a
+confidence-weighted rule. It reports the time each replay takes.
+
+Usage (from backend/; requires numpy):
+    python -m benchmarks.bench_rep_backtest --predictions 5000000 --agents 200000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.agent import Agent
+from app.services.rep_backtest import load_history, replay, score, scoring_table
+from app.services.reputation import apply_resolution
+from benchmarks.bench_resolve_event import seed
+
+
+def confidence_weighted(prediction: str, result: str, confidence: int, is_early_bird: bool, is_contrarian: bool) -> int:
+    """Example candidate rule: stake-like scoring scaled by confidence"""
+    stake = 50 + 3 * confidence
+    return stake if prediction == result else -stake // 2
+
+
+def parity(n_agents: int) -> int:
+    """Agents whose replayed REP or tier differs from the live SQL resolution"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        engine = create_engine(f"sqlite:///{os.path.join(tmpdir, 'bench.db')}")
+        Base.metadata.create_all(engine)
+        with sessionmaker(bind=engine)() as db:
+            event = seed(db, n_agents)
+            while apply_resolution(db, event.id, "YES"):
+                pass
+            db.commit()
+            result = replay(load_history(db))
+            stored = dict(db.execute(select(Agent.id, Agent.tier)).all())
+        engine.dispose()
+    mismatched = result["new_reputation"] != result["reputation"]
+    mismatched |= result["new_tier"] != np.array([stored[agent_id] for agent_id in result["agent_id"].tolist()])
+    return int(np.count_nonzero(mismatched))
+
+
+def synthetic_history(n_predictions: int, n_agents: int, rng: np.random.Generator) -> dict:
+    agent_ids = np.arange(1, n_agents + 1, dtype=np.int64)
+    history = {
+        "agent_id": rng.integers(1, n_agents + 1, n_predictions),
+        "is_yes": rng.integers(0, 2, n_predictions),
+        "correct": rng.integers(0, 2, n_predictions),
+        "early": (rng.random(n_predictions) < 0.3).astype(np.int64),
+        "contrarian": (rng.random(n_predictions) < 0.2).astype(np.int64),
+        "confidence": rng.integers(0, 101, n_predictions),
+        "agent_ids": agent_ids,
+        "usernames": np.array([f"agent_{i}" for i in range(n_agents)]),
+    }
+    history["rep_change"] = score(history, scoring_table())  # as if resolved under the live rule
+    history["reputation"] = np.bincount(
+        history["agent_id"] - 1, weights=history["rep_change"], minlength=n_agents
+    ).astype(np.int64)
+    return history
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--predictions", type=int, default=5000000)
+    parser.add_argument("--agents", type=int, default=200000)
+    parser.add_argument("--parity-agents", type=int, default=5000)
+    args = parser.parse_args()
+
+    mismatched = parity(args.parity_agents)
+    print(f"parity with live resolution ({args.parity_agents} agents): "
+          + ("ok" if not mismatched else f"{mismatched} agents differ"))
+
+    history = synthetic_history(args.predictions, args.agents, np.random.default_rng(7))
+    print(f"synthetic history: {args.predictions} predictions, {args.agents} agents")
+    for name, rule in (("live rule", None), ("confidence-weighted", confidence_weighted)):
+        started = time.perf_counter()
+        result = replay(history, rule) if rule else replay(history)
+        elapsed = time.perf_counter() - started
+        print(f"{name:>20}: {elapsed:.2f}s ({args.predictions / elapsed / 1e6:.1f}M predictions/s), "
+              f"{np.count_nonzero(result['rank_delta'])} agents change rank")
+    sys.exit(1 if mismatched else 0)
+
+
+if __name__ == "__main__":
+    main()
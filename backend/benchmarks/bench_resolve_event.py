@@ -0,0 +1,144 @@
+"""
+Benchmark: resolve one synthetic event with a large number of predictions.
+The event is resolved as production does it: a resolve_event job, run by a
+JobWorker, scoring --chunk-size predictions per committed chunk.
+
+Usage (from backend/):
+    python -m benchmarks.bench_resolve_event --predictions 100000
+    python -m benchmarks.bench_resolve_event --database-url postgresql://...
+
+Defaults to a throwaway SQLite file. Against Postgres, point it at an empty
+scratch database: the tables are created and dropped by the script.
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import create_engine, insert, func
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import Settings, settings
+from app.core.database import Base, pool_options
+from app.models.agent import Agent
+from app.models.event import Event
+from app.models.job import Job
+from app.models.prediction import Prediction
+from app.services.jobs import JobWorker, enqueue_job
+
+
+def seed(db, n_predictions: int, batch: int = 10000) -> Event:
+    """Insert one open event and n agents with one prediction each"""
+    now = datetime.now(timezone.utc)
+    event = Event(
+        title="Synthetic benchmark event",
+        description="Synthetic",
+        resolution_criteria="Synthetic",
+        closes_at=now + timedelta(days=1),
+        resolves_at=now + timedelta(days=2),
+        category="benchmark",
+    )
+    db.add(event)
+    db.commit()
+
+    rng = random.Random(42)
+    for start in range(0, n_predictions, batch):
+        stop = min(start + batch, n_predictions)
+        db.execute(insert(Agent), [
+            {
+                "id": i + 1,
+                "username": f"bench_agent_{i}",
+                "reputation": rng.randint(0, 12000),
+                "total_predictions": rng.randint(1, 50),
+                "correct_predictions": 0,
+                "current_streak": rng.randint(0, 5),
+                "best_streak": 5,
+            }
+            for i in range(start, stop)
+        ])
+        db.execute(insert(Prediction), [
+            {
+                "event_id": event.id,
+                "agent_id": i + 1,
+                "prediction": rng.choice(("YES", "NO")),
+                "confidence": rng.randint(0, 100),
+                "reasoning": "x" * 100,
+                "is_early_bird": rng.random() < 0.3,
+                "is_contrarian": rng.random() < 0.2,
+            }
+            for i in range(start, stop)
+        ])
+    db.commit()
+    return event
+
+
+async def resolve(url: str, event_id: int, chunk_size: int) -> tuple:
+    """Run a resolve_event job for the event to completion: (seconds, job status)"""
+    settings.JOB_CHUNK_SIZE = chunk_size
+    async_url = Settings(DATABASE_URL=url).async_database_url
+    async_engine = create_async_engine(async_url, **pool_options(async_url))
+    Session = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    try:
+        async with Session() as db:
+            job = await enqueue_job(db, "resolve_event", event_id, {"result": "YES"})
+        started = time.perf_counter()
+        await JobWorker(Session).run_until_idle()
+        elapsed = time.perf_counter() - started
+        async with Session() as db:
+            status = (await db.get(Job, job.id)).status
+    finally:
+        await async_engine.dispose()
+    return elapsed, status
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--predictions", type=int, default=100000)
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    tmpdir = None
+    url = args.database_url
+    if not url:
+        tmpdir = tempfile.TemporaryDirectory()
+        url = f"sqlite:///{os.path.join(tmpdir.name, 'bench.db')}"
+
+    engine = create_engine(url)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+
+    try:
+        with Session() as db:
+            started = time.perf_counter()
+            event_id = seed(db, args.predictions).id
+            seeded = time.perf_counter() - started
+
+        elapsed, status = asyncio.run(resolve(url, event_id, args.chunk_size))
+
+        with Session() as db:
+            resolved = db.query(func.count(Prediction.id)).filter(
+                Prediction.event_id == event_id,
+                Prediction.was_correct.isnot(None)
+            ).scalar()
+
+        print(f"backend:     {engine.dialect.name}")
+        print(f"predictions: {args.predictions}")
+        print(f"chunk size:  {args.chunk_size}")
+        print(f"seed:        {seeded:.2f}s")
+        print(f"resolve:     {elapsed:.3f}s ({args.predictions / elapsed:,.0f} predictions/s), job {status}")
+        print(f"resolved:    {resolved}")
+    finally:
+        Base.metadata.drop_all(engine)
+        engine.dispose()
+        if tmpdir:
+            tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+Benchmark: hot read endpoints with and without the response cache.
+
+Replays a read-heavy mix (event list, event detail, agent profile and
+stats) against a seeded database. Every --write-every reads, one agent
+makes a prediction, which invalidates that event and agent. The mix runs
+once with the cache off and once with it on. For each run it reports mean
+latency, SQL statements per request (X-DB-Queries) and the cache hit rate.
+A final pass checks that every cached body matches a fresh uncached read,
+and exits 1 if any is stale.
+
+Usage (from backend/):
+    python -m benchmarks.bench_response_cache --requests 2000 --write-every 20
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+import httpx
+from sqlalchemy import String, cast, create_engine, literal, update
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+
+from app.core import metrics
+from app.core.cache import MemoryCache
+from app.core.config import Settings, settings
+from app.core.database import Base, get_db
+from app.main import app
+from app.models.agent import Agent
+from app.models.event import Event
+from app.services.auth_cache import api_key_cache
+from app.services.response_cache import response_cache
+from benchmarks.bench_resolve_event import seed
+
+
+def read_url(n_agents: int, event_ids: list, rng: random.Random) -> str:
+    """One read from the hot set (a few popular agents / events get most traffic)"""
+    agent = min(int(rng.expovariate(0.05)), n_agents - 1)
+    return rng.choice([
+        "/v1/events/?status=open&limit=20",
+        f"/v1/events/{rng.choice(event_ids[:5])}",
+        f"/v1/agents/bench_agent_{agent}",
+        f"/v1/agents/bench_agent_{agent}/stats",
+    ])
+
+
+async def replay(n_requests: int, write_every: int, n_agents: int, event_ids: list, enabled: bool) -> dict:
+    response_cache.enabled = enabled
+    response_cache.backend = MemoryCache(max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES)
+    response_cache.routes.clear()
+    rng = random.Random(11)
+    # The two runs take writers from opposite ends, so no prediction is a duplicate
+    writers = iter(range(n_agents)) if enabled else iter(range(n_agents - 1, -1, -1))
+    transport = httpx.ASGITransport(app=app)
+    latencies, queries = [], 0
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+        for i in range(1, n_requests + 1):
+            if write_every and i % write_every == 0:
+                writer = next(writers)
+                await http.post("/v1/predictions/", headers={"Authorization": f"Bearer bench_key_{writer}"}, json={
+                    "event_id": rng.choice(event_ids[:5]),
+                    "prediction": "YES",
+                    "confidence": 60,
+                    "reasoning": "Cache benchmark submission " + "x" * 100,
+                })
+            started = time.perf_counter()
+            response = await http.get(read_url(n_agents, event_ids, rng))
+            latencies.append(time.perf_counter() - started)
+            response.raise_for_status()
+            queries += int(response.headers["X-DB-Queries"])
+    stats = response_cache.stats()
+    return {
+        "mean_ms": sum(latencies) / len(latencies) * 1000,
+        "queries_per_request": queries / n_requests,
+        "hit_rate": stats["hit_rate"],
+    }
+
+
+async def stale_responses(n_agents: int, event_ids: list) -> list:
+    """URLs whose cached body differs from a fresh read"""
+    transport = httpx.ASGITransport(app=app)
+    stale = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+        urls = ["/v1/events/?status=open&limit=20"] + [f"/v1/events/{event_id}" for event_id in event_ids[:5]]
+        urls += [f"/v1/agents/bench_agent_{i}{suffix}" for i in range(min(n_agents, 50)) for suffix in ("", "/stats")]
+        for url in urls:
+            response_cache.enabled = True
+            cached = (await http.get(url)).json()
+            response_cache.enabled = False
+            if (await http.get(url)).json() != cached:
+                stale.append(url)
+    return stale
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--write-every", type=int, default=20)
+    parser.add_argument("--agents", type=int, default=500)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    tmpdir = None
+    url = args.database_url
+    if not url:
+        tmpdir = tempfile.TemporaryDirectory()
+        url = f"sqlite:///{os.path.join(tmpdir.name, 'bench.db')}"
+
+    engine = create_engine(url)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    async_engine = create_async_engine(Settings(DATABASE_URL=url).async_database_url)
+    metrics.instrument_engine(async_engine.sync_engine)
+    AsyncSession = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    async def get_bench_db():
+        async with AsyncSession() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = get_bench_db
+    settings.DB_METRICS_HEADERS = True
+    enabled = response_cache.enabled
+
+    try:
+        with sessionmaker(bind=engine)() as db:
+            seed(db, args.agents)  # agents bench_agent_{i} (id i + 1)
+            db.execute(update(Agent).values(api_key=literal("bench_key_") + cast(Agent.id - 1, String)))
+            now = datetime.now(timezone.utc)
+            events = [
+                Event(title=f"Cache event {i}", description="Cache", resolution_criteria="Cache",
+                      closes_at=now + timedelta(days=1 + i), resolves_at=now + timedelta(days=2 + i), category="benchmark")
+                for i in range(50)
+            ]
+            db.add_all(events)
+            db.commit()
+            event_ids = [event.id for event in events]
+
+        async def run():
+            results = {}
+            for name, cache_enabled in (("uncached", False), ("cached", True)):
+                results[name] = await replay(args.requests, args.write_every, args.agents, event_ids, cache_enabled)
+            stale = await stale_responses(args.agents, event_ids)
+            await async_engine.dispose()
+            return results, stale
+
+        results, stale = asyncio.run(run())
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+        api_key_cache.local.clear()
+        response_cache.enabled = enabled
+        Base.metadata.drop_all(engine)
+        engine.dispose()
+        if tmpdir:
+            tmpdir.cleanup()
+
+    print(f"backend: {engine.dialect.name}, reads: {args.requests}, a write every {args.write_every} reads")
+    for name, r in results.items():
+        print(f"{name:>9}: {r['mean_ms']:>7.2f} ms/read  {r['queries_per_request']:>5.2f} statements/read  "
+              f"hit rate {r['hit_rate']:.1%}")
+    for url in stale:
+        print("STALE", url)
+    print("no stale responses" if not stale else f"{len(stale)} stale responses")
+    sys.exit(1 if stale else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+Benchmark: full-text search vs an ILIKE scan.
+
+Builds the schema with the Alembic migrations, so Postgres gets the tsvector
+columns and GIN indexes. It then seeds --events events and --predictions
+predictions with text drawn from a skewed vocabulary and runs --queries
+two-word searches. Each search runs once through app.services.search and
+once as the ILIKE scan it replaces: every word as a substring of any field,
+unranked, first page only. It reports ms per query for each. It also checks
+that every search hit contains the words of its query; the benchmark exits
+1 if one does not.
+
+On SQLite the search is the in-process fallback index. Its one-off load
+(the first search) is timed separately.
+
+Usage (from backend/):
+    python -m benchmarks.bench_search --events 10000 --predictions 100000
+    python -m benchmarks.bench_search --database-url postgresql://...
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import and_, create_engine, insert, or_, select, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import Settings
+from app.core.database import Base
+from app.models.agent import Agent
+from app.models.event import Event
+from app.models.prediction import Prediction
+from app.services.search import EVENTS, PREDICTIONS, fallback_indexes, search, tokenize
+from benchmarks.check_indexes import ALEMBIC_INI
+
+BATCH = 10000
+
+
+def vocabulary(size: int, rng: random.Random) -> list:
+    """Made-up words, so substring matches between them are rare"""
+    consonants, vowels = "bcdfghklmnprstvz", "aeiou"
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(consonants) + rng.choice(vowels) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def seed(db, n_events: int, n_predictions: int, words: list, rng: random.Random):
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(words))))  # Zipf-like
+
+    def sentence(n: int) -> str:
+        return " ".join(rng.choices(words, cum_weights=cum_weights, k=n))
+
+    now = datetime.now(timezone.utc)
+    n_agents = max(-(-n_predictions // n_events), 1)  # one prediction per (event, agent)
+    db.execute(insert(Agent), [{"username": f"search_agent_{i}"} for i in range(n_agents)])
+    for first in range(0, n_events, BATCH):
+        db.execute(insert(Event), [
+            {"title": sentence(8), "description": sentence(40), "resolution_criteria": "Search",
+             "closes_at": now + timedelta(days=1), "resolves_at": now + timedelta(days=2),
+             "status": rng.choice(("open", "resolved")), "category": "benchmark", "tags": rng.sample(words[:20], 2)}
+            for _ in range(first, min(first + BATCH, n_events))
+        ])
+    for first in range(0, n_predictions, BATCH):
+        db.execute(insert(Prediction), [
+            {"event_id": i % n_events + 1, "agent_id": i // n_events + 1, "prediction": "YES", "confidence": 50,
+             "reasoning": sentence(30)}
+            for i in range(first, min(first + BATCH, n_predictions))
+        ])
+    db.commit()
+
+
+def ilike_query(corpus, words: list):
+    fields = [getattr(corpus.model, name) for name, _ in corpus.fields if name != "tags"]
+    return select(corpus.model.id).where(and_(*(
+        or_(*(field.ilike(f"%{word}%") for field in fields)) for word in words
+    ))).limit(20)
+
+
+async def run(async_url: str, corpus, queries: list) -> dict:
+    engine = create_async_engine(async_url)
+    Session = async_sessionmaker(engine, expire_on_commit=False)
+    timings = {"search": [], "ilike": []}
+    misses = []
+    try:
+        async with Session() as db:
+            started = time.perf_counter()
+            if db.bind.dialect.name != "postgresql":
+                await fallback_indexes[corpus].catch_up(db)
+            load = time.perf_counter() - started
+            fields = [getattr(corpus.model, name) for name, _ in corpus.fields]
+            for words in queries:
+                started = time.perf_counter()
+                page = await search(db, corpus, " ".join(words), limit=20)
+                timings["search"].append(time.perf_counter() - started)
+
+                started = time.perf_counter()
+                (await db.execute(ilike_query(corpus, words))).all()
+                timings["ilike"].append(time.perf_counter() - started)
+
+                for row in (await db.execute(select(corpus.model.id, *fields).where(corpus.model.id.in_(page.ids)))).all():
+                    found = set()
+                    for value in row[1:]:
+                        found.update(tokenize(" ".join(value) if isinstance(value, list) else value or ""))
+                    if not set(tokenize(" ".join(words))) <= found:
+                        misses.append((corpus.model.__tablename__, row.id, words))
+    finally:
+        await engine.dispose()
+    return {"load": load, "timings": timings, "misses": misses}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, default=10000)
+    parser.add_argument("--predictions", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    tmpdir = None
+    url = args.database_url
+    if not url:
+        tmpdir = tempfile.TemporaryDirectory()
+        url = f"sqlite:///{os.path.join(tmpdir.name, 'bench.db')}"
+
+    rng = random.Random(11)
+    words = vocabulary(5000, rng)
+    # Mid-frequency words: common enough to match, rare enough to be worth searching for
+    queries = [rng.sample(words[20:400], 2) for _ in range(args.queries)]
+
+    engine = create_engine(url)
+    Base.metadata.drop_all(engine)
+    with engine.begin() as connection:
+        connection.execute(text("DROP TABLE IF EXISTS alembic_version"))
+    config = Config(ALEMBIC_INI)
+    config.attributes["configure_logger"] = False
+    try:
+        with engine.connect() as connection:
+            config.attributes["connection"] = connection
+            command.upgrade(config, "head")
+            connection.commit()
+        with sessionmaker(bind=engine)() as db:
+            seed(db, args.events, args.predictions, words, rng)
+        async_url = Settings(DATABASE_URL=url).async_database_url
+        results = {corpus.model.__tablename__: asyncio.run(run(async_url, corpus, queries)) for corpus in (EVENTS, PREDICTIONS)}
+    finally:
+        Base.metadata.drop_all(engine)
+        with engine.begin() as connection:
+            connection.execute(text("DROP TABLE IF EXISTS alembic_version"))
+        engine.dispose()
+        if tmpdir:
+            tmpdir.cleanup()
+
+    print(f"backend: {engine.dialect.name}, {args.events} events, {args.predictions} predictions, {args.queries} queries")
+    misses = []
+    for table, result in results.items():
+        if engine.dialect.name != "postgresql":
+            print(f"{table}: fallback index loaded in {result['load']:.2f}s")
+        for name, timings in result["timings"].items():
+            print(f"{table:>12} {name:>6}: median {statistics.median(timings) * 1000:7.2f} ms, "
+                  f"mean {statistics.mean(timings) * 1000:7.2f} ms, max {max(timings) * 1000:7.2f} ms")
+        misses += result["misses"]
+    for table, row_id, words in misses[:20]:
+        print(f"FAIL {table} {row_id} matched {' '.join(words)!r} without containing it")
+    sys.exit(1 if misses else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+Benchmark: JSON response serialization, default path vs FAST_JSON.
+
+Seeds a database with benchmarks.loadgen and requests each hot read endpoint
+--requests times in each mode, with the response cache off so every request
+serializes. For each endpoint it reports p50 / mean latency and the speedup.
+It also times serialization alone for --rows rows of each response model:
+pydantic models validated and dumped as FastAPI does, then json.dumps,
+against the pre-built serializer plus orjson. Exits 1 if any endpoint's body
+or X-Next-Cursor differs between the two modes.
+
+Usage (from backend/):
+    python -m benchmarks.bench_serialization --requests 200
+    python -m benchmarks.bench_serialization --scale medium --database-url postgresql://...
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import List
+
+import httpx
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import Settings, settings
+from app.core.database import get_db, pool_options
+from app.core.serialization import dumps, serializer
+from app.main import app
+from app.models.agent import Agent
+from app.models.event import Event
+from app.models.prediction import Prediction
+from app.routes.predictions import LISTING_COLUMNS, _prediction_response
+from app.schemas.agent import AgentResponse
+from app.schemas.event import EventResponse
+from app.schemas.prediction import PredictionResponse
+from app.services.leaderboard import leaderboard
+from app.services.response_cache import response_cache
+from benchmarks.bench_prediction_writes import percentile
+from benchmarks.loadgen import add_scale_arguments, create_schema, drop_schema, generate, scale_from_args
+
+ENDPOINTS = (
+    ("event list", "/v1/events/?status=all&limit=100"),
+    ("event", "/v1/events/{event_id}"),
+    ("event search", "/v1/events/search?q=market&limit=100"),
+    ("leaderboard", "/v1/agents/?limit=100"),
+    ("agent", "/v1/agents/load_agent_0"),
+    ("me", "/v1/agents/me"),
+    ("predictions", "/v1/predictions/?limit=100"),
+    ("event predictions", "/v1/predictions/events/{event_id}?limit=500"),
+    ("prediction search", "/v1/predictions/search?q=market&limit=100"),
+)
+AUTH = {"Authorization": "Bearer load_key_0"}
+
+
+async def time_endpoint(http: httpx.AsyncClient, url: str, requests: int, fast: bool):
+    settings.FAST_JSON = fast
+    for _ in range(max(requests // 10, 1)):  # warm up
+        await http.get(url, headers=AUTH)
+    latencies = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        response = await http.get(url, headers=AUTH)
+        latencies.append(time.perf_counter() - started)
+        response.raise_for_status()
+    return latencies, response
+
+
+def time_serialization(model, objects: list, build_models, repeat: int) -> tuple:
+    """Seconds per call: (models, validated and dumped as FastAPI does, json.dumps) vs (serializer, orjson)"""
+    adapter = TypeAdapter(List[model])
+    fast = serializer(model, mapping=isinstance(objects[0], dict))
+
+    def standard():
+        dumped = adapter.dump_python(adapter.validate_python(build_models()), mode="json")
+        return json.dumps(dumped, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+    def prebuilt():
+        return dumps([fast(obj) for obj in objects])
+
+    timings = []
+    for run in (standard, prebuilt):
+        run()
+        started = time.perf_counter()
+        for _ in range(repeat):
+            run()
+        timings.append((time.perf_counter() - started) / repeat)
+    return timings
+
+
+async def bench(url: str, args) -> int:
+    async_url = Settings(DATABASE_URL=url).async_database_url
+    async_engine = create_async_engine(async_url, **pool_options(async_url))
+    Session = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    async def get_bench_db():
+        async with Session() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = get_bench_db
+    response_cache.enabled = False
+    failed = 0
+    try:
+        async with Session() as db:
+            event_id = await db.scalar(select(Prediction.event_id).group_by(Prediction.event_id).order_by(
+                Prediction.event_id).limit(1))
+
+        print(f"{'endpoint':<20} {'default p50':>12} {'fast p50':>10} {'default mean':>13} {'fast mean':>10} {'speedup':>8}")
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+            for name, template in ENDPOINTS:
+                url = template.format(event_id=event_id)
+                default, default_response = await time_endpoint(http, url, args.requests, fast=False)
+                fast, fast_response = await time_endpoint(http, url, args.requests, fast=True)
+                same = (default_response.content == fast_response.content and
+                        default_response.headers.get("X-Next-Cursor") == fast_response.headers.get("X-Next-Cursor"))
+                failed += not same
+                print(f"{name:<20} {percentile(default, 0.5) * 1000:>9.2f} ms {percentile(fast, 0.5) * 1000:>7.2f} ms "
+                      f"{statistics.mean(default) * 1000:>10.2f} ms {statistics.mean(fast) * 1000:>7.2f} ms "
+                      f"{statistics.mean(default) / statistics.mean(fast):>7.2f}x"
+                      + ("" if same else "  BODY DIFFERS"))
+
+        async with Session() as db:
+            events = (await db.execute(select(Event).order_by(Event.id).limit(args.rows))).scalars().all()
+            await leaderboard.ensure_fresh(db)
+            agents, _ = leaderboard.page(leaderboard.board_name("reputation", None, None), limit=args.rows)
+            rows = (await db.execute(
+                select(*LISTING_COLUMNS).join(Agent, Prediction.agent_id == Agent.id).limit(args.rows)
+            )).all()
+        predictions = [_prediction_response(row, {"username": row.username, "reputation": row.reputation,
+                                                  "tier": row.tier, "accuracy": float(row.accuracy_overall)})
+                       for row in rows]
+
+        print(f"\nserialization only, {args.rows} rows")
+        print(f"{'model':<20} {'default':>12} {'fast':>10} {'speedup':>8}")
+        for model, objects, build_models in (
+            (EventResponse, events, lambda: [EventResponse.model_validate(event) for event in events]),
+            (AgentResponse, agents, lambda: agents),  # leaderboard rows go to FastAPI as dicts
+            (PredictionResponse, predictions, lambda: predictions),
+        ):
+            default, fast = time_serialization(model, objects, build_models, args.repeat)
+            print(f"{model.__name__:<20} {default * 1000:>9.3f} ms {fast * 1000:>7.3f} ms {default / fast:>7.2f}x")
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+        settings.FAST_JSON = False
+        await async_engine.dispose()
+
+    if failed:
+        print(f"\n{failed} endpoint(s) rendered different JSON with FAST_JSON", file=sys.stderr)
+    return 1 if failed else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    add_scale_arguments(parser)
+    parser.add_argument("--requests", type=int, default=200, help="per endpoint and mode")
+    parser.add_argument("--rows", type=int, default=100, help="rows per serialization-only call")
+    parser.add_argument("--repeat", type=int, default=200, help="serialization-only calls per model and mode")
+    parser.add_argument("--database-url", default=None, help="default: a throwaway SQLite file")
+    args = parser.parse_args()
+
+    tmpdir = None
+    url = args.database_url
+    if not url:
+        tmpdir = tempfile.TemporaryDirectory()
+        url = f"sqlite:///{os.path.join(tmpdir.name, 'serialization.db')}"
+
+    engine = create_engine(url)
+    try:
+        create_schema(engine)
+        with sessionmaker(bind=engine)() as db:
+            print(f"seeded {generate(db, scale_from_args(args), args.seed).summary()}\n")
+        status = asyncio.run(bench(url, args))
+    finally:
+        drop_schema(engine)
+        engine.dispose()
+        if tmpdir:
+            tmpdir.cleanup()
+    sys.exit(status)
+
+
+if __name__ == "__main__":
+    main()
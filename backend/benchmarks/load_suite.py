@@ -0,0 +1,473 @@
+"""
+Load-test suite: API scenarios over synthetic data, JSON report, regression compare.
+
+`run` seeds a database with benchmarks.loadgen. It then drives the real
+app in-process through httpx's ASGI transport. --concurrency clients each
+run a scenario's steps until --requests requests are recorded, after
+--warmup unrecorded steps. Scenarios run in this order, read-only ones
+first:
+
+  leaderboard      browse boards (overall, accuracy, tier, category) a few
+                   pages deep, agent profiles and ranks
+  stats_polling    dashboards polling GET /stats/, half of them with
+                   If-None-Match
+  hot_event_burst  every client predicts on the one hot event, with some
+                   duplicate submissions and spectators reading the event
+  mass_resolution  --resolve-events busy events resolved at once; the job
+                   worker drains them while clients browse the leaderboard
+
+Each scenario reports throughput, latency percentiles (overall and per
+operation), SQL statements per request (X-DB-Queries) and unexpected
+statuses. The report is JSON: to stdout, or to --output. A summary goes to
+stderr. Data and request mixes are seeded, so runs are repeatable up to
+scheduling order.
+
+`compare BASELINE CANDIDATE` flags a regression when throughput drops, or
+p50 / p99 latency rises, by more than --threshold (relative) and
+--min-delta-ms (absolute). Half a SQL statement per request more (on
+average, per operation) or more errors are always flagged. It exits 1 on any regression, so CI can gate
+on it. Only compare runs with the same backend, scale and concurrency.
+
+Usage (from backend/):
+    python -m benchmarks.load_suite run --scale small --output before.json
+    python -m benchmarks.load_suite run --scale small --output after.json --compare before.json
+    python -m benchmarks.load_suite run --scenarios leaderboard,stats_polling --database-url postgresql://...
+    python -m benchmarks.load_suite compare before.json after.json --threshold 0.15
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+import httpx
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core import metrics
+from app.core.config import Settings, settings
+from app.core.database import get_db, pool_options
+from app.main import app
+from app.models.event import Event
+from app.models.prediction import Prediction
+from app.services.jobs import JobWorker
+from benchmarks.bench_prediction_writes import percentile
+from benchmarks.loadgen import CATEGORIES, HOT_EVENT_ID, Dataset, add_scale_arguments, create_schema, drop_schema, generate, scale_from_args
+
+TIERS = ("Bronze", "Silver", "Gold", "Platinum", "Diamond")
+
+
+def latency_summary(latencies: List[float]) -> dict:
+    """Percentiles in milliseconds"""
+    if not latencies:
+        return {}
+    return {
+        "p50": round(percentile(latencies, 0.5) * 1000, 3),
+        "p90": round(percentile(latencies, 0.9) * 1000, 3),
+        "p99": round(percentile(latencies, 0.99) * 1000, 3),
+        "max": round(max(latencies) * 1000, 3),
+        "mean": round(statistics.mean(latencies) * 1000, 3),
+    }
+
+
+@dataclass
+class Recorder:
+    """Per-operation latencies, statuses and statement counts"""
+    latency: Dict[str, List[float]] = field(default_factory=lambda: defaultdict(list))
+    queries: Dict[str, List[int]] = field(default_factory=lambda: defaultdict(list))
+    statuses: Dict[str, Dict[int, int]] = field(default_factory=lambda: defaultdict(lambda: defaultdict(int)))
+    errors: List[str] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return sum(len(values) for values in self.latency.values())
+
+    def report(self, seconds: float) -> dict:
+        everything = [value for values in self.latency.values() for value in values]
+        queries = [value for values in self.queries.values() for value in values]
+        return {
+            "requests": len(everything),
+            "seconds": round(seconds, 3),
+            "throughput_rps": round(len(everything) / seconds, 1) if seconds else 0.0,
+            "latency_ms": latency_summary(everything),
+            "statements_per_request": round(statistics.mean(queries), 3) if queries else 0.0,
+            "errors": len(self.errors),
+            "error_samples": self.errors[:10],
+            "operations": {
+                operation: {
+                    "requests": len(latencies),
+                    "latency_ms": latency_summary(latencies),
+                    "statements_per_request": round(statistics.mean(self.queries[operation]), 3),
+                    "statuses": {str(status): n for status, n in sorted(self.statuses[operation].items())},
+                }
+                for operation, latencies in sorted(self.latency.items())
+            },
+        }
+
+
+class Context:
+    """What a scenario step gets: the client, the data and a recorder"""
+
+    def __init__(self, http: httpx.AsyncClient, Session, dataset: Dataset, args):
+        self.http = http
+        self.Session = Session
+        self.dataset = dataset
+        self.args = args
+        self.recorder = Recorder()
+
+    async def call(self, operation: str, method: str, url: str, expect=(200,), **kwargs) -> httpx.Response:
+        started = time.perf_counter()
+        response = await self.http.request(method, url, **kwargs)
+        elapsed = time.perf_counter() - started
+        recorder = self.recorder
+        recorder.latency[operation].append(elapsed)
+        recorder.queries[operation].append(int(response.headers.get("X-DB-Queries", 0)))
+        recorder.statuses[operation][response.status_code] += 1
+        if response.status_code not in expect:
+            recorder.errors.append(f"{method} {url}: {response.status_code} {response.text[:200]}")
+        return response
+
+
+async def drive(ctx: Context, step: Callable, requests: int, warmup: int, until: Optional[asyncio.Task] = None) -> float:
+    """Run step(ctx, rng) on --concurrency clients: `warmup` steps unrecorded, then until
+    `requests` requests are recorded (or `until` finishes). Returns the recorded seconds."""
+    async def clients(stop: Callable[[], bool], seed: int):
+        async def client(number: int):
+            rng = random.Random(seed * 1000 + number)
+            while not stop():
+                await step(ctx, rng)
+        await asyncio.gather(*(client(number) for number in range(ctx.args.concurrency)))
+
+    steps = 0
+
+    def warming() -> bool:
+        nonlocal steps
+        steps += 1
+        return steps > warmup
+
+    await clients(warming, ctx.args.seed)
+    ctx.recorder = Recorder()
+    started = time.perf_counter()
+    await clients(lambda: len(ctx.recorder) >= requests or (until is not None and until.done()), ctx.args.seed + 1)
+    return time.perf_counter() - started
+
+
+# ---------- scenarios ----------
+
+async def browse_leaderboard(ctx: Context, rng: random.Random, prefix: str = ""):
+    roll = rng.random()
+    if roll < 0.6:
+        label, board = rng.choice((
+            ("reputation", {}), ("reputation", {}), ("reputation", {}), ("accuracy", {"sort_by": "accuracy"}),
+            ("tier", {"tier": rng.choice(TIERS)}), ("category", {"category": rng.choice(CATEGORIES)}),
+        ))
+        params = {**board, "limit": 50}
+        response = await ctx.call(f"{prefix}GET /agents/ ({label})", "GET", "/v1/agents/", params=params)
+        for _ in range(rng.randint(0, 3)):
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+            response = await ctx.call(f"{prefix}GET /agents/ ({label}, next page)", "GET", "/v1/agents/",
+                                      params={**params, "cursor": cursor})
+    elif roll < 0.85:
+        await ctx.call(f"{prefix}GET /agents/{{username}}", "GET", f"/v1/agents/load_agent_{rng.randrange(ctx.dataset.scale.agents)}")
+    else:
+        await ctx.call(f"{prefix}GET /agents/{{username}}/rank", "GET",
+                       f"/v1/agents/load_agent_{rng.randrange(ctx.dataset.scale.agents)}/rank", expect=(200, 404))
+
+
+async def leaderboard(ctx: Context) -> dict:
+    seconds = await drive(ctx, browse_leaderboard, ctx.args.requests, ctx.args.warmup)
+    return ctx.recorder.report(seconds)
+
+
+async def stats_polling(ctx: Context) -> dict:
+    etags: Dict[int, str] = {}
+
+    async def poll(ctx: Context, rng: random.Random):
+        client = id(rng)
+        if client in etags and rng.random() < 0.5:
+            await ctx.call("GET /stats/ (If-None-Match)", "GET", "/v1/stats/",
+                           headers={"If-None-Match": etags[client]}, expect=(200, 304))
+        else:
+            response = await ctx.call("GET /stats/", "GET", "/v1/stats/")
+            if "ETag" in response.headers:
+                etags[client] = response.headers["ETag"]
+
+    seconds = await drive(ctx, poll, ctx.args.requests, ctx.args.warmup)
+    return ctx.recorder.report(seconds)
+
+
+async def hot_event_burst(ctx: Context) -> dict:
+    agents = iter(range(ctx.dataset.scale.agents))
+    posted: List[int] = []
+
+    async def burst(ctx: Context, rng: random.Random):
+        roll = rng.random()
+        body = {"event_id": HOT_EVENT_ID, "prediction": rng.choice(("YES", "NO")), "confidence": rng.randint(50, 100),
+                "reasoning": "Momentum and volume both point the same way on this one, and the last three "
+                             "comparable events resolved like this, so I am taking that side."}
+        agent = next(agents, None) if roll >= 0.3 else None
+        if agent is not None:
+            response = await ctx.call("POST /predictions/", "POST", "/v1/predictions/", json=body,
+                                      headers={"Authorization": f"Bearer load_key_{agent}"})
+            if response.status_code == 200:
+                posted.append(agent)  # only now, so a duplicate cannot overtake it
+        elif roll < 0.05 and posted:
+            await ctx.call("POST /predictions/ (duplicate)", "POST", "/v1/predictions/", json=body,
+                           headers={"Authorization": f"Bearer load_key_{rng.choice(posted)}"}, expect=(400,))
+        else:
+            await ctx.call("GET /events/{event_id}", "GET", f"/v1/events/{HOT_EVENT_ID}")
+
+    seconds = await drive(ctx, burst, ctx.args.requests, ctx.args.warmup)
+    report = ctx.recorder.report(seconds)
+    async with ctx.Session() as db:
+        total = await db.scalar(select(Event.total_predictions).where(Event.id == HOT_EVENT_ID))
+        rows = await db.scalar(select(func.count(Prediction.id)).where(Prediction.event_id == HOT_EVENT_ID))
+    report["hot_event"] = {"predictions": rows, "total_predictions": total}
+    if total != rows or rows != len(posted):
+        report["errors"] += 1
+        report["error_samples"].append(f"hot event counts {total} / rows {rows} / posted {len(posted)} disagree")
+    return report
+
+
+async def mass_resolution(ctx: Context) -> dict:
+    candidates = ctx.dataset.open_event_ids + ctx.dataset.closed_event_ids
+    busiest = sorted((event_id for event_id in candidates if event_id != HOT_EVENT_ID),
+                     key=lambda event_id: -ctx.dataset.predictions_per_event[event_id])[:ctx.args.resolve_events]
+    rng = random.Random(ctx.args.seed)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        ctx.call("POST /events/{event_id}/resolve", "POST", f"/v1/events/{event_id}/resolve",
+                 params={"admin_key": settings.ADMIN_KEY}, json={"result": rng.choice(("YES", "NO"))}, expect=(202,))
+        for event_id in busiest
+    ))
+    enqueue = ctx.recorder
+    worker = JobWorker(session_factory=ctx.Session)
+    drain = asyncio.create_task(worker.run_until_idle())
+    seconds = await drive(ctx, lambda ctx, rng: browse_leaderboard(ctx, rng, "during resolution: "),
+                          ctx.args.requests, 0, until=drain)
+    await drain
+    resolution_seconds = time.perf_counter() - started
+
+    report = ctx.recorder.report(seconds)
+    report["operations"].update(enqueue.report(resolution_seconds)["operations"])
+    report["errors"] += len(enqueue.errors)
+    report["error_samples"] += enqueue.errors[:10]
+    async with ctx.Session() as db:
+        resolved = await db.scalar(select(func.count(Event.id)).where(Event.id.in_(busiest), Event.status == "resolved"))
+        unscored = await db.scalar(select(func.count(Prediction.id)).where(Prediction.event_id.in_(busiest), Prediction.was_correct.is_(None)))
+    scored = sum(ctx.dataset.predictions_per_event[event_id] for event_id in busiest)
+    report["resolution"] = {
+        "events": len(busiest), "resolved": resolved, "predictions": scored, "unscored": unscored,
+        "seconds": round(resolution_seconds, 3),
+        "predictions_per_second": round(scored / resolution_seconds, 1) if resolution_seconds else 0.0,
+    }
+    if resolved != len(busiest) or unscored:
+        report["errors"] += 1
+        report["error_samples"].append(f"{resolved}/{len(busiest)} events resolved, {unscored} predictions unscored")
+    return report
+
+
+SCENARIOS = {
+    "leaderboard": leaderboard,
+    "stats_polling": stats_polling,
+    "hot_event_burst": hot_event_burst,
+    "mass_resolution": mass_resolution,
+}
+
+
+# ---------- run ----------
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run_scenarios(url: str, dataset: Dataset, names: List[str], args) -> dict:
+    async_url = Settings(DATABASE_URL=url).async_database_url
+    options = pool_options(async_url)
+    if async_url.startswith("sqlite"):
+        options["connect_args"] = {"timeout": 60}  # queue for the single writer rather than fail after 5s
+    async_engine = create_async_engine(async_url, **options)
+    metrics.instrument_engine(async_engine.sync_engine)
+    Session = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    async def get_load_db():
+        async with Session() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = get_load_db
+    results = {}
+    try:
+        # Server errors come back as 500s and count as errors, as they would over the network
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        async with httpx.AsyncClient(transport=transport, base_url="http://load", timeout=None) as http:
+            for name in names:
+                print(f"running {name}", file=sys.stderr)
+                results[name] = await SCENARIOS[name](Context(http, Session, dataset, args))
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+        await async_engine.dispose()
+    return results
+
+
+def run(args) -> int:
+    names = [name for name in SCENARIOS if name in args.scenarios.split(",")]
+    unknown = set(args.scenarios.split(",")) - set(SCENARIOS)
+    if unknown or not names:
+        sys.exit(f"unknown scenarios: {', '.join(sorted(unknown)) or args.scenarios} (choose from {', '.join(SCENARIOS)})")
+
+    tmpdir = None
+    url = args.database_url
+    if not url:
+        tmpdir = tempfile.TemporaryDirectory()
+        url = f"sqlite:///{os.path.join(tmpdir.name, 'load.db')}"
+
+    settings.DB_METRICS_HEADERS = True
+    settings.RESPONSE_CACHE_ENABLED = not args.no_response_cache
+    engine = create_engine(url)
+    try:
+        create_schema(engine)
+        if engine.dialect.name == "sqlite":
+            # Readers don't block the writer in WAL mode, closer to Postgres under concurrent load
+            with engine.connect() as connection:
+                connection.exec_driver_sql("PRAGMA journal_mode=WAL")
+        started = time.perf_counter()
+        with sessionmaker(bind=engine)() as db:
+            dataset = generate(db, scale_from_args(args), args.seed)
+        print(f"seeded {dataset.summary()} in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+        results = asyncio.run(run_scenarios(url, dataset, names, args))
+    finally:
+        drop_schema(engine)
+        engine.dispose()
+        if tmpdir:
+            tmpdir.cleanup()
+
+    report = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git_commit": git_commit(),
+            "backend": engine.dialect.name,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "dataset": dataset.summary(),
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "warmup": args.warmup,
+            "response_cache": settings.RESPONSE_CACHE_ENABLED,
+            "job_chunk_size": settings.JOB_CHUNK_SIZE,
+        },
+        "scenarios": results,
+    }
+    for name, result in results.items():
+        latency = result["latency_ms"]
+        print(f"{name:>16}: {result['requests']:>6} requests  {result['throughput_rps']:>8.1f}/s  "
+              f"p50 {latency.get('p50', 0):8.2f} ms  p99 {latency.get('p99', 0):8.2f} ms  "
+              f"{result['statements_per_request']:.2f} statements  {result['errors']} errors", file=sys.stderr)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    failed = any(result["errors"] for result in results.values())
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            failed |= compare_reports(json.load(f), report, args.threshold, args.min_delta_ms)
+    return 1 if failed else 0
+
+
+# ---------- compare ----------
+
+def compare_reports(baseline: dict, candidate: dict, threshold: float, min_delta_ms: float) -> bool:
+    """Print a comparison to stderr; True if the candidate regressed"""
+    out = sys.stderr
+    for key in ("backend", "dataset", "concurrency"):
+        if baseline["meta"].get(key) != candidate["meta"].get(key):
+            print(f"warning: {key} differs ({baseline['meta'].get(key)} vs {candidate['meta'].get(key)}), "
+                  f"numbers may not be comparable", file=out)
+
+    regressed = False
+
+    def check(label: str, before: float, after: float, worse: bool):
+        nonlocal regressed
+        change = (after - before) / before * 100 if before else 0.0
+        regressed |= worse
+        print(f"{'REGRESSION' if worse else 'ok':>10}  {label:<72} {before:>10.2f} -> {after:>10.2f}  {change:+7.1f}%", file=out)
+
+    for name in [name for name in baseline["scenarios"] if name in candidate["scenarios"]]:
+        before, after = baseline["scenarios"][name], candidate["scenarios"][name]
+        check(f"{name} throughput_rps", before["throughput_rps"], after["throughput_rps"],
+              after["throughput_rps"] < before["throughput_rps"] * (1 - threshold))
+        for q in ("p50", "p99"):
+            b, a = before["latency_ms"].get(q, 0), after["latency_ms"].get(q, 0)
+            check(f"{name} {q}_ms", b, a, a > b * (1 + threshold) and a - b > min_delta_ms)
+        for operation in sorted(before["operations"].keys() & after["operations"].keys()):
+            b = before["operations"][operation]["statements_per_request"]
+            a = after["operations"][operation]["statements_per_request"]
+            # Cache hits make these fractional; an N+1 or an extra query moves them by whole statements
+            if abs(a - b) >= 0.5:
+                check(f"{name} {operation} statements", b, a, a > b)
+        check(f"{name} errors", before["errors"], after["errors"], after["errors"] > before["errors"])
+    for name in baseline["scenarios"].keys() ^ candidate["scenarios"].keys():
+        print(f"{'skipped':>10}  {name}: only in one report", file=out)
+    print("regressions found" if regressed else "no regressions", file=out)
+    return regressed
+
+
+def compare(args) -> int:
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.candidate, encoding="utf-8") as f:
+        candidate = json.load(f)
+    return 1 if compare_reports(baseline, candidate, args.threshold, args.min_delta_ms) else 0
+
+
+def add_compare_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--threshold", type=float, default=0.15, help="relative change that counts as a regression")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="ignore latency changes smaller than this")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="seed, run scenarios, report JSON")
+    add_scale_arguments(run_parser)
+    run_parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma-separated subset")
+    run_parser.add_argument("--requests", type=int, default=2000, help="recorded requests per scenario")
+    run_parser.add_argument("--warmup", type=int, default=100, help="unrecorded steps per scenario")
+    run_parser.add_argument("--concurrency", type=int, default=16)
+    run_parser.add_argument("--resolve-events", type=int, default=20, help="events resolved by mass_resolution")
+    run_parser.add_argument("--no-response-cache", action="store_true")
+    run_parser.add_argument("--database-url", default=None)
+    run_parser.add_argument("--output", default=None, help="write the JSON report here instead of stdout")
+    run_parser.add_argument("--compare", default=None, metavar="BASELINE", help="compare against an earlier report")
+    add_compare_arguments(run_parser)
+
+    compare_parser = commands.add_parser("compare", help="compare two reports")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("candidate")
+    add_compare_arguments(compare_parser)
+
+    args = parser.parse_args()
+    sys.exit(run(args) if args.command == "run" else compare(args))
+
+
+if __name__ == "__main__":
+    main()
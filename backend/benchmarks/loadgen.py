@@ -0,0 +1,273 @@
+"""
+Synthetic data for load tests: agents, events, predictions and likes.
+
+The generator is deterministic for a given --scale and --seed, and the data
+is consistent. Event odds, agent totals, reputation, tiers, category stats,
+like counts and the platform counters all match the rows written. Events
+are 60% open, 10% closed and 30% resolved. Prediction counts per event
+follow a Zipf-like popularity curve. Event HOT_EVENT_ID is open and has no
+seeded predictions, so every agent can still predict on it. Agent i
+(0-based) is `load_agent_{i}` with API key `load_key_{i}`.
+
+The schema is built with the Alembic migrations, as in production.
+load_suite uses this module. It can also seed a scratch database for
+external load tools.
+
+Usage (from backend/):
+    python -m benchmarks.loadgen --scale medium --database-url postgresql://...
+    python -m benchmarks.loadgen --scale small --predictions 50000
+"""
+import argparse
+import itertools
+import os
+import random
+import tempfile
+import time
+from collections import defaultdict
+from dataclasses import asdict, dataclass, field, replace
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, delete, insert, text
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.agent import Agent
+from app.models.event import Event
+from app.models.prediction import CategoryStats, Prediction, PredictionLike
+from app.models.stats import PlatformCounter
+from app.services.counters import COUNTERS, SHARDS
+from app.services.reputation import calculate_rep_change, tier_for_reputation
+from benchmarks.check_indexes import ALEMBIC_INI
+
+BATCH = 10000
+HOT_EVENT_ID = 1
+CATEGORIES = ("crypto", "politics", "sports", "tech", "science", "economy")
+WORDS = ("market", "price", "signal", "trend", "volume", "rally", "policy", "vote", "launch", "adoption",
+         "forecast", "model", "data", "history", "momentum", "risk", "support", "resistance", "growth", "demand")
+
+
+@dataclass(frozen=True)
+class Scale:
+    agents: int
+    events: int
+    predictions: int
+    likes: int
+
+
+SCALES = {
+    "small": Scale(agents=1000, events=200, predictions=20000, likes=10000),
+    "medium": Scale(agents=10000, events=2000, predictions=200000, likes=100000),
+    "large": Scale(agents=100000, events=10000, predictions=2000000, likes=1000000),
+}
+
+
+@dataclass
+class Dataset:
+    """What was generated: the counts and the event ids by status"""
+    scale: Scale
+    seed: int
+    predictions: int = 0  # may fall short of scale.predictions when events fill up
+    likes: int = 0
+    open_event_ids: List[int] = field(default_factory=list)
+    closed_event_ids: List[int] = field(default_factory=list)
+    resolved_event_ids: List[int] = field(default_factory=list)
+    predictions_per_event: dict = field(default_factory=dict)
+
+    def summary(self) -> dict:
+        return {
+            **asdict(self.scale), "seed": self.seed, "predictions": self.predictions, "likes": self.likes,
+            "open_events": len(self.open_event_ids), "closed_events": len(self.closed_event_ids),
+            "resolved_events": len(self.resolved_event_ids),
+        }
+
+
+def create_schema(engine):
+    """Drop everything, then build the schema with the Alembic migrations"""
+    drop_schema(engine)
+    config = Config(ALEMBIC_INI)
+    config.attributes["configure_logger"] = False
+    with engine.connect() as connection:
+        config.attributes["connection"] = connection
+        command.upgrade(config, "head")
+        connection.commit()
+
+
+def drop_schema(engine):
+    Base.metadata.drop_all(engine)
+    with engine.begin() as connection:
+        connection.execute(text("DROP TABLE IF EXISTS alembic_version"))
+
+
+def _sentence(rng: random.Random, n: int) -> str:
+    return " ".join(rng.choices(WORDS, k=n))
+
+
+def _insert(db, model, rows: list):
+    for first in range(0, len(rows), BATCH):
+        db.execute(insert(model), rows[first:first + BATCH])
+
+
+def generate(db, scale: Scale, seed: int = 7) -> Dataset:
+    """Fill an empty schema with `scale` worth of consistent synthetic data and commit"""
+    rng = random.Random(seed)
+    dataset = Dataset(scale, seed)
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+
+    # Events: status, outcome, lean (share of YES) and a Zipf-like share of the predictions
+    events = []
+    for i in range(scale.events):
+        event_id = i + 1
+        roll = rng.random()
+        status = "open" if event_id == HOT_EVENT_ID or roll < 0.6 else "closed" if roll < 0.7 else "resolved"
+        closes_at = now + timedelta(hours=rng.randint(1, 720)) if status == "open" else now - timedelta(hours=rng.randint(1, 720))
+        events.append({
+            "id": event_id, "title": f"Will {_sentence(rng, 4)} happen by {closes_at:%B %d}?",
+            "description": _sentence(rng, 30), "resolution_criteria": _sentence(rng, 12),
+            "opens_at": closes_at - timedelta(days=rng.randint(7, 60)), "closes_at": closes_at,
+            "resolves_at": closes_at + timedelta(days=1), "status": status,
+            "result": rng.choice(("YES", "NO")) if status == "resolved" else None,
+            "category": rng.choice(CATEGORIES), "tags": rng.sample(WORDS, 2),
+            "rep_reward": rng.choice((50, 100, 200)),
+        })
+        (dataset.open_event_ids if status == "open" else
+         dataset.closed_event_ids if status == "closed" else dataset.resolved_event_ids).append(event_id)
+    weights = [0.0 if event["id"] == HOT_EVENT_ID else 1 / (rank + 1) for rank, event in enumerate(events)]
+    total_weight = sum(weights)
+    counts = [min(scale.agents, round(scale.predictions * weight / total_weight)) for weight in weights]
+
+    # Likes are drawn up front so predictions go in with their like_count
+    n_predictions = sum(counts)
+    like_count = defaultdict(int)
+    likes = set()
+    for _ in range(scale.likes if n_predictions else 0):
+        pair = (int(n_predictions * rng.random() ** 2) + 1, rng.randrange(scale.agents) + 1)  # popular = early ids
+        if pair not in likes:
+            likes.add(pair)
+            like_count[pair[0]] += 1
+
+    agent_stats = defaultdict(lambda: [0, 0, 0, 0])  # total, correct, confidence sum, REP from resolutions
+    category_stats = defaultdict(lambda: [0, 0])  # (agent, category) -> total, correct (resolved only)
+    prediction_id = 0
+    rows = []
+    for event, count in zip(events, counts):
+        lean = rng.uniform(0.15, 0.85)
+        yes = 0
+        for agent_index in rng.sample(range(scale.agents), count):
+            prediction_id += 1
+            agent_id = agent_index + 1
+            choice = "YES" if rng.random() < lean else "NO"
+            yes += choice == "YES"
+            confidence = rng.randint(50, 100)
+            early, contrarian = rng.random() < 0.2, rng.random() < 0.15
+            row = {
+                "id": prediction_id, "event_id": event["id"], "agent_id": agent_id, "prediction": choice,
+                "confidence": confidence, "reasoning": _sentence(rng, 25), "is_early_bird": early,
+                "is_contrarian": contrarian, "like_count": like_count.get(prediction_id, 0),
+                "created_at": event["opens_at"] + (event["closes_at"] - event["opens_at"]) * rng.random(),
+                "was_correct": None, "rep_change": 0,
+            }
+            stats = agent_stats[agent_id]
+            stats[0] += 1
+            stats[2] += confidence
+            if event["result"]:
+                row["was_correct"] = choice == event["result"]
+                row["rep_change"] = calculate_rep_change(choice, event["result"], confidence, early, contrarian)
+                stats[1] += row["was_correct"]
+                stats[3] += row["rep_change"]
+                category = category_stats[(agent_id, event["category"])]
+                category[0] += 1
+                category[1] += row["was_correct"]
+            rows.append(row)
+        event.update({
+            "total_predictions": count, "yes_count": yes, "no_count": count - yes,
+            "yes_percentage": round(yes * 100 / count, 2) if count else 0,
+            "no_percentage": round((count - yes) * 100 / count, 2) if count else 0,
+        })
+        dataset.predictions_per_event[event["id"]] = count
+
+    agents = []
+    for i in range(scale.agents):
+        total, correct, confidence_sum, earned = agent_stats[i + 1]
+        reputation = max(rng.randint(0, 2000) + earned, 0)
+        streak = rng.randint(0, 8)
+        agents.append({
+            "id": i + 1, "username": f"load_agent_{i}", "api_key": f"load_key_{i}",
+            "reputation": reputation, "tier": tier_for_reputation(reputation),
+            "total_predictions": total, "correct_predictions": correct,
+            "accuracy_overall": round(correct * 100 / total, 2) if total else 0,
+            "avg_confidence": round(confidence_sum / total, 2) if total else 0,
+            "current_streak": streak, "best_streak": streak + rng.randint(0, 8),
+            "twitter_verified": rng.random() < 0.3,
+        })
+
+    _insert(db, Agent, agents)
+    _insert(db, Event, events)
+    _insert(db, Prediction, rows)
+    _insert(db, PredictionLike, [{"prediction_id": p, "agent_id": a} for p, a in sorted(likes)])
+    _insert(db, CategoryStats, [
+        {"agent_id": agent_id, "category": category, "total_predictions": total, "correct_predictions": correct,
+         "accuracy": round(correct * 100 / total, 2)}
+        for (agent_id, category), (total, correct) in category_stats.items()
+    ])
+    totals = {"agents": scale.agents, "predictions": prediction_id, "events": scale.events,
+              "open_events": len(dataset.open_event_ids)}
+    db.execute(delete(PlatformCounter))
+    _insert(db, PlatformCounter, [
+        {"name": name, "shard": shard, "value": totals[name] if shard == 0 else 0}
+        for name, shard in itertools.product(COUNTERS, range(SHARDS))
+    ])
+    db.commit()
+
+    dataset.predictions = prediction_id
+    dataset.likes = len(likes)
+    return dataset
+
+
+def scale_from_args(args) -> Scale:
+    overrides = {name: getattr(args, name) for name in ("agents", "events", "predictions", "likes") if getattr(args, name) is not None}
+    return replace(SCALES[args.scale], **overrides)
+
+
+def add_scale_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    for name in ("agents", "events", "predictions", "likes"):
+        parser.add_argument(f"--{name}", type=int, default=None, help=f"override the scale's {name}")
+    parser.add_argument("--seed", type=int, default=7)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    add_scale_arguments(parser)
+    parser.add_argument("--database-url", default=None, help="default: a throwaway SQLite file, dropped afterwards")
+    args = parser.parse_args()
+
+    tmpdir = None
+    url = args.database_url
+    if not url:
+        tmpdir = tempfile.TemporaryDirectory()
+        url = f"sqlite:///{os.path.join(tmpdir.name, 'load.db')}"
+
+    engine = create_engine(url)
+    try:
+        create_schema(engine)
+        started = time.perf_counter()
+        with sessionmaker(bind=engine)() as db:
+            dataset = generate(db, scale_from_args(args), args.seed)
+        elapsed = time.perf_counter() - started
+    finally:
+        if tmpdir:
+            drop_schema(engine)
+        engine.dispose()
+        if tmpdir:
+            tmpdir.cleanup()
+
+    print(f"backend: {engine.dialect.name}, generated in {elapsed:.1f}s")
+    for name, value in dataset.summary().items():
+        print(f"{name:>16}: {value}")
+
+
+if __name__ == "__main__":
+    main()
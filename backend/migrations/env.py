@@ -0,0 +1,73 @@
+"""
+Alembic environment
+Migrates the database from the app settings (DATABASE_URL). Override it with
+sqlalchemy.url in alembic.ini or `alembic -x database_url=...`. The models
+are imported so `alembic revision --autogenerate` compares against them.
+"""
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import create_engine, pool
+
+from app.core.config import settings
+from app.core.database import Base
+from app.models import agent, event, job, judge, prediction, stats  # noqa: F401 (register tables)
+from app.services.search import SEARCH_OBJECTS
+
+config = context.config
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def database_url() -> str:
+    return (
+        context.get_x_argument(as_dictionary=True).get("database_url")
+        or config.get_main_option("sqlalchemy.url")
+        or settings.database_url
+    )
+
+
+def include_object(object, name, type_, reflected, compare_to) -> bool:
+    """Leave the Postgres-only search columns and indexes (0004) out of autogenerate"""
+    return not (reflected and compare_to is None and name in SEARCH_OBJECTS)
+
+
+def run_migrations_offline() -> None:
+    """Emit the SQL instead of running it (alembic upgrade head --sql)"""
+    context.configure(
+        url=database_url(),
+        target_metadata=target_metadata,
+        include_object=include_object,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    connection = config.attributes.get("connection")  # passed in by tooling that already has one
+    if connection is not None:
+        _run(connection)
+        return
+    with create_engine(database_url(), poolclass=pool.NullPool).connect() as connection:
+        _run(connection)
+
+
+def _run(connection) -> None:
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_object=include_object,
+        render_as_batch=connection.dialect.name == "sqlite",  # SQLite cannot ALTER most things in place
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,179 @@
+"""Baseline schema
+
+The original schema: agents, events, predictions, prediction_replies,
+prediction_likes and category_stats. Databases created earlier with
+Base.metadata.create_all() already have it. Mark them instead of
+upgrading, then upgrade: alembic stamp 0001_baseline && alembic upgrade head
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-18 12:42:49.369768
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '0001_baseline'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('agents',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('username', sa.String(length=50), nullable=False),
+    sa.Column('email', sa.String(length=255), nullable=True),
+    sa.Column('twitter', sa.String(length=50), nullable=True),
+    sa.Column('bio', sa.Text(), nullable=True),
+    sa.Column('avatar_url', sa.String(length=255), nullable=True),
+    sa.Column('reputation', sa.Integer(), nullable=True),
+    sa.Column('tier', sa.String(length=20), nullable=True),
+    sa.Column('total_predictions', sa.Integer(), nullable=True),
+    sa.Column('correct_predictions', sa.Integer(), nullable=True),
+    sa.Column('accuracy_overall', sa.DECIMAL(precision=5, scale=2), nullable=True),
+    sa.Column('avg_confidence', sa.DECIMAL(precision=5, scale=2), nullable=True),
+    sa.Column('calibration_score', sa.DECIMAL(precision=5, scale=2), nullable=True),
+    sa.Column('current_streak', sa.Integer(), nullable=True),
+    sa.Column('best_streak', sa.Integer(), nullable=True),
+    sa.Column('password_hash', sa.String(length=255), nullable=True),
+    sa.Column('twitter_verified', sa.Boolean(), nullable=True),
+    sa.Column('api_key', sa.String(length=64), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('last_active_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('email'),
+    sa.UniqueConstraint('twitter')
+    )
+    op.create_index('ix_agents_api_key', 'agents', ['api_key'], unique=True)
+    op.create_index('ix_agents_id', 'agents', ['id'], unique=False)
+    op.create_index('ix_agents_reputation', 'agents', ['reputation'], unique=False)
+    op.create_index('ix_agents_username', 'agents', ['username'], unique=True)
+
+    op.create_table('category_stats',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('agent_id', sa.Integer(), nullable=False),
+    sa.Column('category', sa.String(length=50), nullable=False),
+    sa.Column('total_predictions', sa.Integer(), nullable=True),
+    sa.Column('correct_predictions', sa.Integer(), nullable=True),
+    sa.Column('accuracy', sa.DECIMAL(precision=5, scale=2), nullable=True),
+    sa.ForeignKeyConstraint(['agent_id'], ['agents.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('agent_id', 'category', name='uix_agent_category')
+    )
+    op.create_index('ix_category_stats_id', 'category_stats', ['id'], unique=False)
+
+    op.create_table('events',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('title', sa.String(length=255), nullable=False),
+    sa.Column('description', sa.Text(), nullable=False),
+    sa.Column('resolution_criteria', sa.Text(), nullable=False),
+    sa.Column('resolution_source', sa.String(length=255), nullable=True),
+    sa.Column('opens_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('closes_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('resolves_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=True),
+    sa.Column('result', sa.String(length=10), nullable=True),
+    sa.Column('category', sa.String(length=50), nullable=False),
+    sa.Column('difficulty', sa.String(length=20), nullable=True),
+    sa.Column('rep_reward', sa.Integer(), nullable=True),
+    sa.Column('tags', sa.ARRAY(sa.String()).with_variant(sa.JSON(), 'sqlite'), nullable=True),
+    sa.Column('image_url', sa.String(length=255), nullable=True),
+    sa.Column('created_by', sa.Integer(), nullable=True),
+    sa.Column('total_predictions', sa.Integer(), nullable=True),
+    sa.Column('total_volume', sa.Integer(), nullable=True),
+    sa.Column('yes_count', sa.Integer(), nullable=True),
+    sa.Column('no_count', sa.Integer(), nullable=True),
+    sa.Column('yes_percentage', sa.DECIMAL(precision=5, scale=2), nullable=True),
+    sa.Column('no_percentage', sa.DECIMAL(precision=5, scale=2), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.ForeignKeyConstraint(['created_by'], ['agents.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_events_category', 'events', ['category'], unique=False)
+    op.create_index('ix_events_closes_at', 'events', ['closes_at'], unique=False)
+    op.create_index('ix_events_id', 'events', ['id'], unique=False)
+    op.create_index('ix_events_status', 'events', ['status'], unique=False)
+
+    op.create_table('predictions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('event_id', sa.Integer(), nullable=False),
+    sa.Column('agent_id', sa.Integer(), nullable=False),
+    sa.Column('prediction', sa.String(length=10), nullable=False),
+    sa.Column('confidence', sa.Integer(), nullable=False),
+    sa.Column('reasoning', sa.Text(), nullable=False),
+    sa.Column('was_correct', sa.Boolean(), nullable=True),
+    sa.Column('rep_change', sa.Integer(), nullable=True),
+    sa.Column('is_early_bird', sa.Boolean(), nullable=True),
+    sa.Column('is_contrarian', sa.Boolean(), nullable=True),
+    sa.Column('like_count', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.ForeignKeyConstraint(['agent_id'], ['agents.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['event_id'], ['events.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('event_id', 'agent_id', name='uix_event_agent')
+    )
+    op.create_index('ix_predictions_agent_id', 'predictions', ['agent_id'], unique=False)
+    op.create_index('ix_predictions_created_at', 'predictions', ['created_at'], unique=False)
+    op.create_index('ix_predictions_event_id', 'predictions', ['event_id'], unique=False)
+    op.create_index('ix_predictions_id', 'predictions', ['id'], unique=False)
+
+    op.create_table('prediction_likes',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('prediction_id', sa.Integer(), nullable=False),
+    sa.Column('agent_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.ForeignKeyConstraint(['agent_id'], ['agents.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['prediction_id'], ['predictions.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('prediction_id', 'agent_id', name='uix_prediction_like')
+    )
+    op.create_index('ix_prediction_likes_id', 'prediction_likes', ['id'], unique=False)
+
+    op.create_table('prediction_replies',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('prediction_id', sa.Integer(), nullable=False),
+    sa.Column('agent_id', sa.Integer(), nullable=False),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.ForeignKeyConstraint(['agent_id'], ['agents.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['prediction_id'], ['predictions.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_prediction_replies_id', 'prediction_replies', ['id'], unique=False)
+
+
+
+def downgrade() -> None:
+    op.drop_index('ix_prediction_replies_id', table_name='prediction_replies')
+
+    op.drop_table('prediction_replies')
+    op.drop_index('ix_prediction_likes_id', table_name='prediction_likes')
+
+    op.drop_table('prediction_likes')
+    op.drop_index('ix_predictions_id', table_name='predictions')
+    op.drop_index('ix_predictions_event_id', table_name='predictions')
+    op.drop_index('ix_predictions_created_at', table_name='predictions')
+    op.drop_index('ix_predictions_agent_id', table_name='predictions')
+
+    op.drop_table('predictions')
+    op.drop_index('ix_events_status', table_name='events')
+    op.drop_index('ix_events_id', table_name='events')
+    op.drop_index('ix_events_closes_at', table_name='events')
+    op.drop_index('ix_events_category', table_name='events')
+
+    op.drop_table('events')
+    op.drop_index('ix_category_stats_id', table_name='category_stats')
+
+    op.drop_table('category_stats')
+    op.drop_index('ix_agents_username', table_name='agents')
+    op.drop_index('ix_agents_reputation', table_name='agents')
+    op.drop_index('ix_agents_id', table_name='agents')
+    op.drop_index('ix_agents_api_key', table_name='agents')
+
+    op.drop_table('agents')
@@ -0,0 +1,114 @@
+"""Tables added after the baseline
+
+- platform_counters: sharded platform-wide counters (GET /stats)
+- calibration_buckets: per-agent calibration stats
+- jobs: background resolve / judge jobs
+- judge_scores: cached AI judge scores
+
+Tables that already exist are skipped, so databases that got them from
+Base.metadata.create_all() before this revision upgrade cleanly too. The
+counters seed themselves on first read; calibration stats for existing
+predictions are rebuilt with `python -m app.services.agent_stats`.
+
+Revision ID: 0001a_feature_tables
+Revises: 0001_baseline
+Create Date: 2026-10-18 12:50:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '0001a_feature_tables'
+down_revision: Union[str, None] = '0001_baseline'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if 'platform_counters' not in existing:
+        op.create_table('platform_counters',
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('shard', sa.Integer(), nullable=False),
+        sa.Column('value', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('name', 'shard')
+        )
+
+    if 'calibration_buckets' not in existing:
+        op.create_table('calibration_buckets',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('agent_id', sa.Integer(), nullable=False),
+        sa.Column('bucket', sa.Integer(), nullable=False),
+        sa.Column('predictions', sa.Integer(), nullable=True),
+        sa.Column('correct_predictions', sa.Integer(), nullable=True),
+        sa.Column('confidence_sum', sa.Integer(), nullable=True),
+        sa.Column('squared_error_sum', sa.Float(), nullable=True),
+        sa.ForeignKeyConstraint(['agent_id'], ['agents.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('agent_id', 'bucket', name='uix_agent_bucket')
+        )
+        op.create_index('ix_calibration_buckets_id', 'calibration_buckets', ['id'], unique=False)
+
+    if 'jobs' not in existing:
+        op.create_table('jobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('kind', sa.String(length=50), nullable=False),
+        sa.Column('event_id', sa.Integer(), nullable=True),
+        sa.Column('payload', sa.JSON(), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('progress_done', sa.Integer(), nullable=False),
+        sa.Column('progress_total', sa.Integer(), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('result', sa.JSON(), nullable=True),
+        sa.Column('locked_by', sa.String(length=100), nullable=True),
+        sa.Column('locked_until', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['event_id'], ['events.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_jobs_event_id', 'jobs', ['event_id'], unique=False)
+        op.create_index('ix_jobs_id', 'jobs', ['id'], unique=False)
+        op.create_index('ix_jobs_status', 'jobs', ['status'], unique=False)
+
+    if 'judge_scores' not in existing:
+        op.create_table('judge_scores',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('event_id', sa.Integer(), nullable=False),
+        sa.Column('prediction_id', sa.Integer(), nullable=True),
+        sa.Column('agent_id', sa.Integer(), nullable=True),
+        sa.Column('criteria_hash', sa.String(length=64), nullable=False),
+        sa.Column('content_hash', sa.String(length=64), nullable=False),
+        sa.Column('judge_version', sa.String(length=100), nullable=False),
+        sa.Column('context_hash', sa.String(length=64), nullable=False),
+        sa.Column('round', sa.Integer(), nullable=False),
+        sa.Column('score', sa.Float(), nullable=False),
+        sa.Column('review', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(['agent_id'], ['agents.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['event_id'], ['events.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['prediction_id'], ['predictions.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('criteria_hash', 'content_hash', 'judge_version', 'context_hash', name='uix_judge_score_key')
+        )
+        op.create_index('ix_judge_scores_event_round', 'judge_scores', ['event_id', 'round'], unique=False)
+        op.create_index('ix_judge_scores_id', 'judge_scores', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_judge_scores_id', table_name='judge_scores')
+    op.drop_index('ix_judge_scores_event_round', table_name='judge_scores')
+    op.drop_table('judge_scores')
+    op.drop_index('ix_jobs_status', table_name='jobs')
+    op.drop_index('ix_jobs_id', table_name='jobs')
+    op.drop_index('ix_jobs_event_id', table_name='jobs')
+    op.drop_table('jobs')
+    op.drop_index('ix_calibration_buckets_id', table_name='calibration_buckets')
+    op.drop_table('calibration_buckets')
+    op.drop_table('platform_counters')
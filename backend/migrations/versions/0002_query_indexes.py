@@ -0,0 +1,72 @@
+"""Composite and partial indexes for the hot query shapes
+
+- events: status / category filters ordered by closes_at (GET /events/)
+- predictions: (created_at, id) and (event_id, created_at, id) for the
+  keyset-paginated listings; unscored predictions per event (partial, for
+  resolution chunks)
+- agents: updated_at (leaderboard sync watermark)
+- jobs: (status, locked_until) for claiming
+
+The single-column indexes these make redundant are dropped. On Postgres the
+indexes are built CONCURRENTLY, so the tables stay writable during the
+upgrade. If a concurrent build fails, it leaves an INVALID index behind.
+Drop that index before re-running the upgrade.
+
+Revision ID: 0002_query_indexes
+Revises: 0001a_feature_tables
+Create Date: 2026-10-18 12:55:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '0002_query_indexes'
+down_revision: Union[str, None] = '0001a_feature_tables'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+UNSCORED = sa.text('was_correct IS NULL')
+
+# (name, table, columns, partial index condition)
+NEW_INDEXES = [
+    ('ix_events_status_closes_at', 'events', ['status', 'closes_at'], None),
+    ('ix_events_status_category_closes_at', 'events', ['status', 'category', 'closes_at'], None),
+    ('ix_events_category_closes_at', 'events', ['category', 'closes_at'], None),
+    ('ix_predictions_created_at_id', 'predictions', ['created_at', 'id'], None),
+    ('ix_predictions_event_created_at_id', 'predictions', ['event_id', 'created_at', 'id'], None),
+    ('ix_predictions_unscored', 'predictions', ['event_id', 'id'], UNSCORED),
+    ('ix_agents_updated_at', 'agents', ['updated_at'], None),
+    ('ix_jobs_status_locked_until', 'jobs', ['status', 'locked_until'], None),
+]
+
+# Covered by a new index (as its leading columns) or by a unique constraint
+REDUNDANT_INDEXES = [
+    ('ix_events_status', 'events', ['status']),
+    ('ix_events_category', 'events', ['category']),
+    ('ix_predictions_created_at', 'predictions', ['created_at']),
+    ('ix_predictions_event_id', 'predictions', ['event_id']),
+    ('ix_jobs_status', 'jobs', ['status']),
+]
+
+
+def upgrade() -> None:
+    # CREATE / DROP INDEX CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in NEW_INDEXES:
+            op.create_index(
+                name, table, columns, unique=False, if_not_exists=True,
+                postgresql_concurrently=True, postgresql_where=where, sqlite_where=where
+            )
+        for name, table, _ in REDUNDANT_INDEXES:
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns in REDUNDANT_INDEXES:
+            op.create_index(name, table, columns, unique=False, if_not_exists=True, postgresql_concurrently=True)
+        for name, table, _, _ in reversed(NEW_INDEXES):
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
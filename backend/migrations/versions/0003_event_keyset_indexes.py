@@ -0,0 +1,40 @@
+"""Event listing indexes cover the (closes_at, id) keyset
+
+GET /events/ pages on (closes_at, id). With id in the index, the sort order
+and the cursor comparison both come straight from the index scan.
+
+Revision ID: 0003_event_keyset_indexes
+Revises: 0002_query_indexes
+Create Date: 2026-10-18 13:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '0003_event_keyset_indexes'
+down_revision: Union[str, None] = '0002_query_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (old index, new index, leading columns); the new index appends id
+REPLACED = [
+    ('ix_events_status_closes_at', 'ix_events_status_closes_at_id', ['status', 'closes_at']),
+    ('ix_events_status_category_closes_at', 'ix_events_status_category_closes_at_id', ['status', 'category', 'closes_at']),
+    ('ix_events_category_closes_at', 'ix_events_category_closes_at_id', ['category', 'closes_at']),
+]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for old, new, columns in REPLACED:
+            op.create_index(new, 'events', columns + ['id'], unique=False, if_not_exists=True, postgresql_concurrently=True)
+            op.drop_index(old, table_name='events', if_exists=True, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for old, new, columns in REPLACED:
+            op.create_index(old, 'events', columns, unique=False, if_not_exists=True, postgresql_concurrently=True)
+            op.drop_index(new, table_name='events', if_exists=True, postgresql_concurrently=True)
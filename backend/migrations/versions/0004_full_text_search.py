@@ -0,0 +1,78 @@
+"""Full-text search columns for events and prediction reasoning (Postgres)
+
+Adds stored tsvector columns, which Postgres keeps up to date on every
+INSERT and UPDATE, and GIN indexes on them:
+
+- events.search_vector: title and tags (weight A), description (weight B)
+- predictions.search_vector: reasoning
+
+Adding a stored generated column rewrites the table under an ACCESS
+EXCLUSIVE lock, so run this upgrade in a quiet window on large databases.
+The GIN indexes are then built CONCURRENTLY.
+
+Other databases get nothing: SQLite searches with the in-process index in
+app.services.search. The columns are not declared on the models;
+migrations/env.py leaves them out of autogenerate (SEARCH_OBJECTS).
+
+Revision ID: 0004_full_text_search
+Revises: 0003_event_keyset_indexes
+Create Date: 2026-10-18 15:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '0004_full_text_search'
+down_revision: Union[str, None] = '0003_event_keyset_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# array_to_string is only STABLE, and generated columns need IMMUTABLE
+# expressions; joining text with spaces does not depend on any setting
+TAGS_TEXT = """
+CREATE OR REPLACE FUNCTION clawhub_tags_text(tags character varying[]) RETURNS text
+LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$ SELECT array_to_string(tags, ' ') $$
+"""
+
+# (table, tsvector expression, GIN index)
+SEARCH_COLUMNS = [
+    ('events',
+     "setweight(to_tsvector('english', coalesce(title, '')), 'A')"
+     " || setweight(to_tsvector('english', coalesce(clawhub_tags_text(tags), '')), 'A')"
+     " || setweight(to_tsvector('english', coalesce(description, '')), 'B')",
+     'ix_events_search_vector'),
+    ('predictions',
+     "to_tsvector('english', coalesce(reasoning, ''))",
+     'ix_predictions_search_vector'),
+]
+
+
+def upgrade() -> None:
+    if op.get_context().dialect.name != 'postgresql':
+        return
+    op.execute(TAGS_TEXT)
+    for table, expression, _ in SEARCH_COLUMNS:
+        op.execute(
+            f'ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector '
+            f'GENERATED ALWAYS AS ({expression}) STORED'
+        )
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        for table, _, index in SEARCH_COLUMNS:
+            op.create_index(
+                index, table, ['search_vector'], unique=False, if_not_exists=True,
+                postgresql_using='gin', postgresql_concurrently=True
+            )
+
+
+def downgrade() -> None:
+    if op.get_context().dialect.name != 'postgresql':
+        return
+    with op.get_context().autocommit_block():
+        for table, _, index in SEARCH_COLUMNS:
+            op.drop_index(index, table_name=table, if_exists=True, postgresql_concurrently=True)
+    for table, _, _ in SEARCH_COLUMNS:
+        op.execute(f'ALTER TABLE {table} DROP COLUMN IF EXISTS search_vector')
+    op.execute('DROP FUNCTION IF EXISTS clawhub_tags_text(character varying[])')
@@ -0,0 +1,60 @@
+"""
+Shared fixtures: a throwaway SQLite database per test, built from the models.
+
+The suite runs without pytest-asyncio: tests call `run(scenario)`, which
+runs `scenario(Session)` in a fresh event loop with an async session factory
+bound to the test database.
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.database import Base
+from app.models import agent, event, job, judge, prediction, stats  # noqa: F401 (register every table)
+from app.models.agent import Agent
+from app.models.event import Event
+from app.models.prediction import Prediction
+
+
+@pytest.fixture
+def run(tmp_path):
+    path = tmp_path / "test.db"
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    engine.dispose()
+
+    def run_scenario(scenario):
+        async def main():
+            # Two workers share the file, so wait for the writer rather than fail fast
+            async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}", connect_args={"timeout": 30})
+            try:
+                return await scenario(async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False))
+            finally:
+                await async_engine.dispose()
+        return asyncio.run(main())
+
+    return run_scenario
+
+
+async def seed_event(db, agents: int = 3, rep_reward: int = 100, status: str = "closed") -> Event:
+    """One event with `agents` agents (0 REP) that each submitted a prediction; committed"""
+    now = datetime.now(timezone.utc)
+    event = Event(
+        title="Will the test suite pass on the first run?", description="A seeded event for tests. " * 4,
+        resolution_criteria="Best reasoning wins", category="tech", rep_reward=rep_reward, status=status,
+        closes_at=now - timedelta(hours=1), resolves_at=now + timedelta(days=1)
+    )
+    db.add(event)
+    for i in range(agents):
+        db.add(Agent(username=f"test_agent_{i}", api_key=f"test_key_{i}", reputation=0, correct_predictions=0))
+    await db.flush()
+    for agent_id in range(1, agents + 1):
+        db.add(Prediction(
+            event_id=event.id, agent_id=agent_id, prediction="YES", confidence=60 + agent_id,
+            reasoning=f"Submission {agent_id}: " + "a careful argument " * (10 + agent_id)
+        ))
+    await db.commit()
+    return event
@@ -0,0 +1,86 @@
+"""Concurrent predictions and likes: every denormalized counter matches the rows written (no lost updates)"""
+import asyncio
+import random
+from datetime import datetime, timedelta, timezone
+
+import httpx
+from sqlalchemy import func, select
+
+from app.core.database import get_db
+from app.main import app
+from app.models.agent import Agent
+from app.models.event import Event
+from app.models.prediction import Prediction, PredictionLike
+from app.services.auth_cache import api_key_cache
+from tests.conftest import seed_event
+
+AGENTS = 30
+CLIENTS = 10
+
+
+def test_concurrent_predictions_and_likes_keep_counters_exact(run):
+    async def scenario(Session):
+        now = datetime.now(timezone.utc)
+        async with Session() as db:
+            await seed_event(db, agents=AGENTS)  # test_agent_{i} (id i + 1), each with one prediction
+            liked_id = await db.scalar(select(func.min(Prediction.id)))
+            event = Event(
+                title="Will the counters stay exact?", description="A seeded event for tests. " * 4,
+                resolution_criteria="Count the rows", category="tech", status="open",
+                closes_at=now + timedelta(days=1), resolves_at=now + timedelta(days=2)
+            )
+            db.add(event)
+            await db.commit()
+            reputation_before = dict((await db.execute(select(Agent.id, Agent.reputation))).all())
+
+        async def get_test_db():
+            async with Session() as db:
+                yield db
+
+        work = [("predict", i) for i in range(AGENTS)] + [("like", i) for i in range(AGENTS)]
+        random.Random(7).shuffle(work)
+        queue = iter(work)
+        statuses = []
+
+        async def client(http):
+            for action, i in queue:
+                headers = {"Authorization": f"Bearer test_key_{i}"}
+                if action == "predict":
+                    response = await http.post("/v1/predictions/", headers=headers, json={
+                        "event_id": event.id, "prediction": "YES" if i % 3 else "NO", "confidence": 60,
+                        "reasoning": "Concurrent submission " + "x" * 100,
+                    })
+                else:
+                    response = await http.post(f"/v1/predictions/{liked_id}/like", headers=headers)
+                statuses.append((action, response.status_code))
+
+        app.dependency_overrides[get_db] = get_test_db
+        try:
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+                await asyncio.gather(*(client(http) for _ in range(CLIENTS)))
+        finally:
+            app.dependency_overrides.pop(get_db, None)
+            api_key_cache.local.clear()
+
+        assert sorted(statuses) == [("like", 200)] * AGENTS + [("predict", 200)] * AGENTS, statuses
+        async with Session() as db:
+            event = await db.get(Event, event.id)
+            rows = dict((await db.execute(
+                select(Prediction.prediction, func.count()).where(Prediction.event_id == event.id)
+                .group_by(Prediction.prediction)
+            )).all())
+            assert (event.total_predictions, event.yes_count, event.no_count) == (AGENTS, rows["YES"], rows["NO"])
+            assert abs(float(event.yes_percentage) - rows["YES"] * 100 / AGENTS) < 0.01
+
+            liked = await db.get(Prediction, liked_id)
+            likers = set(await db.scalars(select(PredictionLike.agent_id).where(PredictionLike.prediction_id == liked_id)))
+            assert liked.like_count == len(likers) == AGENTS
+
+            for agent_id, reputation in (await db.execute(select(Agent.id, Agent.reputation))).all():
+                expected = reputation_before[agent_id] + 10 + 5 * (agent_id in likers)
+                if agent_id == liked.agent_id:
+                    expected += 5 * len(likers)
+                assert reputation == expected, agent_id
+
+    run(scenario)
@@ -0,0 +1,47 @@
+"""GET /events/ paging: skip only applies without a cursor"""
+from datetime import datetime, timedelta, timezone
+
+import httpx
+
+from app.core.database import get_db
+from app.main import app
+from app.models.event import Event
+from app.services.response_cache import response_cache
+
+
+def test_skip_is_ignored_with_a_cursor(run):
+    async def scenario(Session):
+        now = datetime.now(timezone.utc)
+        async with Session() as db:
+            for hours in range(1, 7):
+                db.add(Event(
+                    title=f"Will event {hours} happen?", description="A seeded event for tests. " * 4,
+                    resolution_criteria="Official announcement", category="tech", status="open",
+                    closes_at=now + timedelta(hours=hours), resolves_at=now + timedelta(days=1)
+                ))
+            await db.commit()
+
+        async def get_test_db():
+            async with Session() as db:
+                yield db
+
+        app.dependency_overrides[get_db] = get_test_db
+        response_cache.enabled = False
+        try:
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+                async def titles(**params):
+                    response = await http.get("/v1/events/", params={"limit": 2, **params})
+                    assert response.status_code == 200
+                    return [e["title"] for e in response.json()], response.headers.get("X-Next-Cursor")
+
+                first, cursor = await titles()
+                assert first == ["Will event 1 happen?", "Will event 2 happen?"]
+                assert (await titles(skip=2))[0] == ["Will event 3 happen?", "Will event 4 happen?"]
+                assert (await titles(cursor=cursor, skip=2))[0] == ["Will event 3 happen?", "Will event 4 happen?"]
+                assert (await http.get("/v1/events/", params={"skip": -1})).status_code == 422
+        finally:
+            app.dependency_overrides.pop(get_db, None)
+            response_cache.enabled = True
+
+    run(scenario)
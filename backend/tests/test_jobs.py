@@ -0,0 +1,149 @@
+"""Background jobs: retries and lease expiry never award REP twice"""
+import asyncio
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import func, select, update
+
+from app.core.config import settings
+from app.models.agent import Agent
+from app.models.event import Event
+from app.models.job import Job
+from app.services import jobs
+from app.services.jobs import JobWorker, claim_next_job, enqueue_job, run_job
+from tests.conftest import seed_event
+
+
+async def total_reputation(Session) -> int:
+    async with Session() as db:
+        return await db.scalar(select(func.sum(Agent.reputation)))
+
+
+async def load_job(Session, job_id: int) -> Job:
+    async with Session() as db:
+        return await db.get(Job, job_id)
+
+
+async def expire_lease(Session, job_id: int):
+    async with Session() as db:
+        await db.execute(update(Job).where(Job.id == job_id).values(locked_until=jobs._now() - timedelta(seconds=1)))
+        await db.commit()
+
+
+def test_select_winner_run_twice_awards_once(run):
+    async def scenario(Session):
+        async with Session() as db:
+            event = await seed_event(db)
+            first = await enqueue_job(db, "select_winner", event.id, {"winner_agent_id": 2})
+        worker = JobWorker(Session)
+        await worker.run_until_idle()
+        async with Session() as db:
+            second = await enqueue_job(db, "select_winner", event.id, {"winner_agent_id": 2})
+        await worker.run_until_idle()
+
+        first, second = await load_job(Session, first.id), await load_job(Session, second.id)
+        assert (first.status, second.status) == ("succeeded", "succeeded")
+        assert first.result["rep_awarded"] == 100
+        assert second.result["rep_awarded"] == 0
+        async with Session() as db:
+            winner = await db.get(Agent, 2)
+            assert (winner.reputation, winner.correct_predictions) == (100, 1)
+            event = await db.get(Event, event.id)
+            assert (event.status, event.result) == ("closed", "RESOLVED")
+        assert await total_reputation(Session) == 100
+
+    run(scenario)
+
+
+def test_expired_lease_cannot_overwrite_new_owner(run):
+    async def scenario(Session):
+        async with Session() as db:
+            event = await seed_event(db)
+            job = await enqueue_job(db, "select_winner", event.id, {"winner_agent_id": 1})
+        slow, fast = JobWorker(Session), JobWorker(Session)
+        async with Session() as slow_db:
+            stale = await claim_next_job(slow_db, slow.worker_id)
+            await expire_lease(Session, job.id)
+            assert await fast.run_once()
+            # The first worker finishes late: its award and completion are discarded
+            await run_job(stale, slow_db, Session)
+
+        job = await load_job(Session, job.id)
+        assert (job.status, job.attempts, job.locked_by) == ("succeeded", 2, None)
+        assert job.result["rep_awarded"] == 100
+        assert await total_reputation(Session) == 100
+
+    run(scenario)
+
+
+def test_expired_lease_failure_does_not_requeue(run, monkeypatch):
+    async def flaky(job, db):
+        raise RuntimeError("judge unavailable")
+
+    monkeypatch.setitem(jobs.HANDLERS, "flaky", flaky)
+
+    async def scenario(Session):
+        async with Session() as db:
+            job = await enqueue_job(db, "flaky")
+        slow, fast = JobWorker(Session), JobWorker(Session)
+        async with Session() as slow_db, Session() as fast_db:
+            stale = await claim_next_job(slow_db, slow.worker_id)
+            await expire_lease(Session, job.id)
+            await claim_next_job(fast_db, fast.worker_id)
+            await run_job(stale, slow_db, Session)
+
+        job = await load_job(Session, job.id)
+        assert (job.status, job.locked_by, job.error) == ("running", fast.worker_id, None)
+
+    run(scenario)
+
+
+def test_lease_is_renewed_while_judging(run, monkeypatch):
+    monkeypatch.setattr(settings, "JOB_LEASE_SECONDS", 1)
+    monkeypatch.setattr(settings, "JUDGE_FAKE_DELAY", 0.15)  # judging outlasts the lease several times
+
+    async def scenario(Session):
+        async with Session() as db:
+            event = await seed_event(db, rep_reward=100)
+            job = await enqueue_job(db, "judge_event", event.id)
+        first, second = JobWorker(Session, poll_interval=0.1), JobWorker(Session, poll_interval=0.1)
+        first.start()
+        await asyncio.sleep(0.2)
+        second.start()
+        try:
+            for _ in range(300):
+                job = await load_job(Session, job.id)
+                if job.status in ("succeeded", "failed"):
+                    break
+                await asyncio.sleep(0.1)
+            await asyncio.sleep(1.5)  # long enough for a stolen lease to run again
+        finally:
+            await first.stop()
+            await second.stop()
+
+        job = await load_job(Session, job.id)
+        assert (job.status, job.attempts) == ("succeeded", 1)
+        assert await total_reputation(Session) == 100
+
+    run(scenario)
+
+
+@pytest.mark.parametrize("kind", ["select_winner", "judge_event"])
+def test_stale_retry_after_award_pays_nothing(run, kind):
+    async def scenario(Session):
+        async with Session() as db:
+            event = await seed_event(db)
+            job = await enqueue_job(db, kind, event.id, {"winner_agent_id": 3} if kind == "select_winner" else {})
+        worker = JobWorker(Session)
+        await worker.run_until_idle()
+        # A crashed worker's retry: the same job runs again from the queue
+        async with Session() as db:
+            await db.execute(update(Job).where(Job.id == job.id).values(status="queued"))
+            await db.commit()
+        await worker.run_until_idle()
+
+        job = await load_job(Session, job.id)
+        assert (job.status, job.attempts, job.result["rep_awarded"]) == ("succeeded", 2, 0)
+        assert await total_reputation(Session) == 100
+
+    run(scenario)
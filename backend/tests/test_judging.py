@@ -0,0 +1,127 @@
+"""AI judge score cache: reuse across runs, duplicate-safe writes, no partial scores, admin-only reads"""
+import httpx
+from sqlalchemy import func, select
+
+from app.core.config import settings
+from app.core.database import get_db
+from app.main import app
+from app.models.agent import Agent
+from app.models.job import Job
+from app.models.judge import JudgeScore
+from app.services import ai_judge
+from app.services.ai_judge import judge_challenge
+from app.services.jobs import JobWorker, enqueue_job
+from app.services.judge_client import FakeJudgeClient
+from tests.conftest import seed_event
+
+
+class FailingJudgeClient(FakeJudgeClient):
+    """Fails on its `fail_on`-th model call"""
+
+    def __init__(self, fail_on: int):
+        super().__init__()
+        self.fail_on = fail_on
+
+    async def review(self, challenge, submissions, final=False):
+        if self.calls + 1 == self.fail_on:
+            self.calls += 1
+            raise RuntimeError("judge model timed out")
+        async for chunk in super().review(challenge, submissions, final):
+            yield chunk
+
+
+async def count_scores(Session) -> int:
+    async with Session() as db:
+        return await db.scalar(select(func.count()).select_from(JudgeScore))
+
+
+def test_rerun_reuses_cached_scores(run, monkeypatch):
+    monkeypatch.setattr(settings, "JUDGE_BATCH_SIZE", 2)
+
+    async def scenario(Session):
+        async with Session() as db:
+            event = await seed_event(db, agents=5)
+        first_client, second_client = FakeJudgeClient(), FakeJudgeClient()
+        async with Session() as db:
+            first = await judge_challenge(event.id, db, first_client)
+            await db.commit()
+        stored = await count_scores(Session)
+        async with Session() as db:
+            second = await judge_challenge(event.id, db, second_client)
+            await db.commit()
+
+        assert first_client.calls > 1 and stored > 0
+        assert second_client.calls == 0
+        assert second["winner_id"] == first["winner_id"]
+        assert await count_scores(Session) == stored
+
+    run(scenario)
+
+
+def test_duplicate_run_skips_stored_scores(run, monkeypatch):
+    async def scenario(Session):
+        async with Session() as db:
+            event = await seed_event(db)
+            await judge_challenge(event.id, db, FakeJudgeClient())
+            await db.commit()
+        stored = await count_scores(Session)
+
+        # A concurrent run that read the cache before the first one committed
+        async def nothing_cached(*args):
+            return {}
+
+        monkeypatch.setattr(ai_judge, "load_cached_scores", nothing_cached)
+        async with Session() as db:
+            await judge_challenge(event.id, db, FakeJudgeClient())
+            await db.commit()
+        assert await count_scores(Session) == stored
+
+    run(scenario)
+
+
+def test_failed_judge_job_leaves_no_partial_scores(run, monkeypatch):
+    monkeypatch.setattr(settings, "JUDGE_BATCH_SIZE", 2)
+    monkeypatch.setattr(settings, "JUDGE_CONCURRENCY", 1)
+    client = FailingJudgeClient(fail_on=2)
+    monkeypatch.setattr(ai_judge, "get_judge_client", lambda: client)
+
+    async def scenario(Session):
+        async with Session() as db:
+            event = await seed_event(db, agents=4)
+            job = await enqueue_job(db, "judge_event", event.id)
+        assert await JobWorker(Session).run_once()
+
+        async with Session() as db:
+            job = await db.get(Job, job.id)
+            assert (job.status, job.error) == ("queued", "judge model timed out")
+            assert await db.scalar(select(func.sum(Agent.reputation))) == 0
+        assert client.calls == 2
+        assert await count_scores(Session) == 0
+
+    run(scenario)
+
+
+def test_judge_scores_require_admin_key(run):
+    async def scenario(Session):
+        async with Session() as db:
+            event = await seed_event(db)
+            await judge_challenge(event.id, db, FakeJudgeClient())
+            await db.commit()
+
+        async def get_test_db():
+            async with Session() as db:
+                yield db
+
+        app.dependency_overrides[get_db] = get_test_db
+        try:
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+                url = f"/v1/events/{event.id}/judge-scores"
+                assert (await http.get(url)).status_code == 422
+                assert (await http.get(url, params={"admin_key": "wrong"})).status_code == 401
+                response = await http.get(url, params={"admin_key": settings.ADMIN_KEY})
+                assert response.status_code == 200 and len(response.json()) == 3
+        finally:
+            app.dependency_overrides.pop(get_db, None)
+
+    run(scenario)
@@ -0,0 +1,19 @@
+"""GET /metrics is admin only"""
+import asyncio
+
+import httpx
+
+from app.core.config import settings
+from app.main import app
+
+
+def test_metrics_require_admin_key():
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            assert (await http.get("/metrics")).status_code == 422
+            assert (await http.get("/metrics", params={"admin_key": "wrong"})).status_code == 401
+            response = await http.get("/metrics", params={"admin_key": settings.ADMIN_KEY})
+            assert response.status_code == 200 and "pool" in response.json()
+
+    asyncio.run(scenario())
@@ -0,0 +1,79 @@
+"""Prediction listings: statements per request do not grow with the page size (no N+1); cursor walks are exact"""
+import httpx
+import pytest
+from sqlalchemy import select
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.database import get_db
+from app.main import app
+from app.models.prediction import Prediction
+from app.services.response_cache import response_cache
+from tests.conftest import seed_event
+
+PAGE_SIZES = (1, 10, 50, 100)
+ENDPOINTS = (
+    "/v1/predictions/?limit={limit}",
+    "/v1/predictions/events/{event_id}?limit={limit}",
+)
+
+
+@pytest.fixture
+def listings(run, monkeypatch):
+    """run(scenario) with scenario(http, event_id, expected ids newest first) against 150 seeded predictions"""
+    monkeypatch.setattr(settings, "DB_METRICS_HEADERS", True)
+    monkeypatch.setattr(response_cache, "enabled", False)
+
+    def run_listing(scenario):
+        async def main(Session):
+            metrics.instrument_engine(Session.kw["bind"].sync_engine)
+            async with Session() as db:
+                event_id = (await seed_event(db, agents=150)).id
+                expected = list(await db.scalars(
+                    select(Prediction.id).order_by(Prediction.created_at.desc(), Prediction.id.desc())
+                ))
+
+            async def get_test_db():
+                async with Session() as db:
+                    yield db
+
+            app.dependency_overrides[get_db] = get_test_db
+            try:
+                transport = httpx.ASGITransport(app=app)
+                async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+                    await scenario(http, event_id, expected)
+            finally:
+                app.dependency_overrides.pop(get_db, None)
+        run(main)
+
+    return run_listing
+
+
+@pytest.mark.parametrize("endpoint", ENDPOINTS)
+def test_statements_do_not_grow_with_page_size(listings, endpoint):
+    async def scenario(http, event_id, expected):
+        counts = {}
+        for limit in PAGE_SIZES:
+            response = await http.get(endpoint.format(limit=limit, event_id=event_id))
+            assert response.status_code == 200
+            assert len(response.json()) == limit
+            counts[limit] = int(response.headers["X-DB-Queries"])
+        assert counts[1] > 0 and len(set(counts.values())) == 1, counts
+
+    listings(scenario)
+
+
+def test_cursor_walk_skips_and_repeats_nothing(listings):
+    async def scenario(http, event_id, expected):
+        ids, cursor = [], None
+        for _ in range(len(expected) // 37 + 2):  # bounded, in case the cursor never advances
+            params = {"limit": 37, **({"cursor": cursor} if cursor else {})}
+            response = await http.get(f"/v1/predictions/events/{event_id}", params=params)
+            assert response.status_code == 200
+            ids += [p["id"] for p in response.json()]
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+        assert ids == expected
+
+    listings(scenario)
@@ -0,0 +1,48 @@
+"""The live resolution SQL scores from the same table as the backtest, confidence included"""
+from datetime import datetime, timedelta, timezone
+from itertools import product
+
+from sqlalchemy import select
+
+from app.models.agent import Agent
+from app.models.event import Event
+from app.models.prediction import Prediction
+from app.services.reputation import calculate_rep_change, rep_change_expression
+
+
+def confidence_weighted(prediction: str, result: str, confidence: int, is_early_bird: bool, is_contrarian: bool) -> int:
+    stake = 50 + 3 * confidence + (25 if is_early_bird else 0)
+    return stake if prediction == result else -stake // 2
+
+
+def test_sql_matches_the_rule_for_every_input(run):
+    async def scenario(Session):
+        now = datetime.now(timezone.utc)
+        async with Session() as db:
+            event = Event(
+                title="Does the SQL score like Python?", description="A seeded event for tests. " * 4,
+                resolution_criteria="Compare them", category="tech", status="closed",
+                closes_at=now - timedelta(hours=1), resolves_at=now + timedelta(days=1)
+            )
+            db.add(event)
+            inputs = list(product(("YES", "NO"), (0, 1, 49, 50, 99, 100), (True, False), (True, False)))
+            for i in range(len(inputs)):
+                db.add(Agent(username=f"test_agent_{i}", api_key=f"test_key_{i}"))
+            await db.flush()
+            for agent_id, (prediction, confidence, early, contrarian) in enumerate(inputs, start=1):
+                db.add(Prediction(
+                    event_id=event.id, agent_id=agent_id, prediction=prediction, confidence=confidence,
+                    reasoning="Scored by both paths", is_early_bird=early, is_contrarian=contrarian
+                ))
+            await db.commit()
+
+            for rule, result in product((calculate_rep_change, confidence_weighted), ("YES", "NO")):
+                rows = (await db.execute(select(
+                    Prediction.prediction, Prediction.confidence, Prediction.is_early_bird, Prediction.is_contrarian,
+                    rep_change_expression(result, rule)
+                ))).all()
+                assert len(rows) == len(inputs)
+                for prediction, confidence, early, contrarian, points in rows:
+                    assert points == rule(prediction, result, confidence, early, contrarian), (rule.__name__, result)
+
+    run(scenario)
@@ -0,0 +1,32 @@
+"""Pre-built FAST_JSON serializers produce what the response models dump"""
+from datetime import datetime, timezone
+from decimal import Decimal
+from types import SimpleNamespace
+
+from app.core.serialization import serializer
+from app.schemas.agent import AgentResponse
+from app.schemas.event import EventResponse
+
+
+def assert_same_dump(model, obj, mapping=False):
+    expected = model.model_validate(obj).model_dump()
+    actual = serializer(model, mapping)(obj)
+    assert actual == expected
+    assert list(actual) == list(expected)  # key order decides the JSON bytes
+    assert [type(v) for v in actual.values()] == [type(v) for v in expected.values()]
+
+
+def test_attributes_with_defaults_decimals_and_computed_fields():
+    now = datetime(2026, 10, 18, 12, 0, tzinfo=timezone.utc)
+    event = SimpleNamespace(
+        id=7, title="Will the serializer match pydantic?", description="Checked field by field",
+        category="tech", rep_reward=None, status="open", result=None, closes_at=now, resolves_at=now,
+        yes_percentage=Decimal("62.5"), no_percentage=Decimal("37.5"), total_predictions=None, created_at=now
+    )  # no `difficulty`: the default applies
+    assert_same_dump(EventResponse, event)
+
+
+def test_mapping_with_missing_keys():
+    row = {"id": 3, "username": "agent_3", "reputation": 120, "accuracy": Decimal("0.75"),
+           "accuracy_overall": None, "created_at": datetime(2026, 1, 1, tzinfo=timezone.utc)}
+    assert_same_dump(AgentResponse, row, mapping=True)
@@ -0,0 +1,25 @@
+"""Trace export: queued off the request path, every trace written once close() returns"""
+import json
+
+from app.core.tracing import KIND_SERVER, FileSpanExporter, Span, Trace
+
+
+def finished_trace(n: int) -> Trace:
+    trace_id = f"{n:032x}"
+    root = Span("GET /test", trace_id, f"{n:016x}", None, KIND_SERVER, start=1, end=2)
+    return Trace(trace_id, spans=[root])
+
+
+def test_close_writes_every_queued_trace(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    exporter = FileSpanExporter(str(path))
+    for n in range(1, 201):
+        exporter.export(finished_trace(n))
+    exporter.close()
+    exporter.export(finished_trace(201))  # restarts the writer after a close
+    exporter.close()
+
+    lines = path.read_text(encoding="utf-8").splitlines()
+    trace_ids = [json.loads(line)["resourceSpans"][0]["scopeSpans"][0]["spans"][0]["traceId"] for line in lines]
+    assert trace_ids == [f"{n:032x}" for n in range(1, 202)]
+    assert exporter.exported == 201
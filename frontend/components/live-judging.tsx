@@ -45,7 +45,22 @@ export function LiveJudging({ challengeId, challengeTitle, isAdmin = false, onCo
         throw new Error(error.detail || 'Failed to start judging');
       }
 
-      const judgeResult = await response.json();
+      // Judging runs as a background job - poll until it finishes
+      let job = await response.json();
+      while (job.status === 'queued' || job.status === 'running') {
+        await new Promise(resolve => setTimeout(resolve, 1000));
+        const jobResponse = await fetch(`${API_URL}/v1/jobs/${job.id}`);
+        if (!jobResponse.ok) {
+          throw new Error('Failed to fetch judging status');
+        }
+        job = await jobResponse.json();
+      }
+
+      if (job.status !== 'succeeded') {
+        throw new Error(job.error || 'Judging failed');
+      }
+
+      const judgeResult = job.result;
       
       // Simulate streaming by adding lines with delay
       const lines = judgeResult.analysis.split('\n');